@@ -1,9 +1,11 @@
 from fastapi import APIRouter
-from app.api import integration_types, integrations, workflows, import_export
+from app.api import integration_types, integrations, workflows, import_export, executions, schedules
 
 api_router = APIRouter()
 
 api_router.include_router(integration_types.router)
 api_router.include_router(integrations.router)
 api_router.include_router(workflows.router)
-api_router.include_router(import_export.router)
\ No newline at end of file
+api_router.include_router(import_export.router)
+api_router.include_router(executions.router)
+api_router.include_router(schedules.router)
\ No newline at end of file
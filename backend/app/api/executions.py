@@ -0,0 +1,201 @@
+import asyncio
+import json
+import os
+from typing import Dict, Any, Optional, List, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Header, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.orm import Session
+from app.database import get_db, SessionLocal
+from app.services import WorkflowService, ExecutionStateError, WorkflowBusyError, dispatch_execution
+from app.services.execution_events import event_bus
+from app.api.workflows import WorkflowExecuteResponse, ExecutionAcceptedResponse, build_execute_response, busy_response
+
+router = APIRouter(prefix="/executions", tags=["Executions"])
+
+# Seconds between keep-alive comments on an idle event stream
+EVENT_STREAM_KEEPALIVE = float(os.getenv("EVENT_STREAM_KEEPALIVE", "15"))
+
+# Seconds between database checks for executions running in another process
+EVENT_STREAM_POLL_INTERVAL = float(os.getenv("EVENT_STREAM_POLL_INTERVAL", "1"))
+
+@router.get("/{execution_id}", response_model=WorkflowExecuteResponse)
+def get_execution(execution_id: int, db: Session = Depends(get_db)):
+    """
+    Get the current state of an execution
+    
+    Poll this endpoint after triggering a workflow with async=true. The
+    status moves from pending to running and then to success or failed
+    (or cancelled, if a drop_oldest overflow policy dropped it from the
+    workflow's queue).
+    """
+    execution_log = WorkflowService.get_execution(db, execution_id)
+    if not execution_log:
+        raise HTTPException(status_code=404, detail="Execution not found")
+    
+    return build_execute_response(db, execution_log)
+
+
+@router.post(
+    "/{execution_id}/resume",
+    response_model=WorkflowExecuteResponse,
+    responses={202: {"model": ExecutionAcceptedResponse}}
+)
+def resume_execution(
+    execution_id: int,
+    run_async: bool = Query(False, alias="async"),
+    db: Session = Depends(get_db)
+):
+    """
+    Resume a failed execution from its failed nodes
+    
+    Creates a new execution linked to the original through
+    resumed_from_execution_id. Nodes that succeeded in the original keep
+    their results and are not run again; the failed nodes and everything
+    downstream of them are executed. Supports async=true like /execute.
+    """
+    try:
+        if run_async:
+            execution_log = WorkflowService.create_resume_execution(db, execution_id)
+            dispatch_execution(db, execution_log)
+            
+            accepted = ExecutionAcceptedResponse(
+                execution_id=execution_log.id,
+                workflow_id=execution_log.workflow_id,
+                status=execution_log.status,
+                trigger_source="resume",
+                status_url=f"/api/executions/{execution_log.id}"
+            )
+            return JSONResponse(status_code=202, content=accepted.model_dump())
+        
+        execution_log = WorkflowService.resume_execution(db, execution_id)
+        return build_execute_response(db, execution_log)
+    except WorkflowBusyError as e:
+        return busy_response(e)
+    except ExecutionStateError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error resuming execution: {str(e)}")
+
+
+@router.get("/{execution_id}/nodes/{node_id}", response_model=Dict[str, Any])
+def get_execution_node(execution_id: int, node_id: str, db: Session = Depends(get_db)):
+    """Get the latest result of one node, including while the execution is running"""
+    row = WorkflowService.get_node_result(db, execution_id, node_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="Node result not found")
+    
+    return WorkflowService.node_result_dict(row)
+
+
+@router.get("/{execution_id}/events")
+def stream_execution_events(
+    execution_id: int,
+    last_event_id: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream the progress of an execution as Server-Sent Events
+    
+    Event types: execution.started, node.started, node.finished, node.failed
+    and execution.finished, after which the stream ends. Reconnect with the
+    Last-Event-ID header to receive only the events missed in between.
+    Executions run by a queue worker are followed through the database and
+    report finished nodes and the final status.
+    """
+    execution_log = WorkflowService.get_execution(db, execution_id)
+    if not execution_log:
+        raise HTTPException(status_code=404, detail="Execution not found")
+    
+    return StreamingResponse(
+        _event_stream(execution_id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _format_event(event_id: str, event_type: str, data: Dict[str, Any]) -> str:
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _parse_last_event_id(last_event_id: Optional[str]) -> Tuple[int, int]:
+    """
+    Split Last-Event-ID into (bus event id, stored node row id)
+    
+    Events from this process's bus use plain numbers; events read from the
+    database are prefixed with "db-".
+    """
+    if not last_event_id:
+        return 0, 0
+    try:
+        if last_event_id.startswith("db-"):
+            return 0, int(last_event_id[3:])
+        return int(last_event_id), 0
+    except ValueError:
+        return 0, 0
+
+
+async def _event_stream(execution_id: int, last_event_id: Optional[str]):
+    last_id, last_row_id = _parse_last_event_id(last_event_id)
+    waiter = event_bus.subscribe(execution_id)
+    try:
+        while True:
+            # Cleared before reading so a publish in between is not missed
+            waiter.clear()
+            events, finished = event_bus.events_after(execution_id, last_id)
+            for event in events:
+                last_id = event.id
+                yield _format_event(str(event.id), event.type, event.data)
+            if finished:
+                return
+            
+            if not event_bus.known(execution_id):
+                # Not running in this process: follow it through the database
+                stored, finished = await run_in_threadpool(_stored_events, execution_id, last_row_id)
+                for row_id, event_type, data in stored:
+                    last_row_id = row_id
+                    yield _format_event(f"db-{row_id}", event_type, data)
+                if finished:
+                    yield _format_event(f"db-{last_row_id}", "execution.finished", finished)
+                    return
+            
+            timeout = EVENT_STREAM_KEEPALIVE if event_bus.known(execution_id) else EVENT_STREAM_POLL_INTERVAL
+            try:
+                await asyncio.wait_for(waiter.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+    finally:
+        event_bus.unsubscribe(execution_id, waiter)
+
+
+def _stored_events(execution_id: int, after_row_id: int) -> Tuple[List[Tuple[int, str, Dict[str, Any]]], Optional[Dict[str, Any]]]:
+    """Node events stored after after_row_id, and the final event data if the run is over"""
+    db = SessionLocal()
+    try:
+        # Status first: rows are all stored by the time the final status is
+        execution_log = WorkflowService.get_execution(db, execution_id)
+        
+        events = []
+        for row in WorkflowService.get_finished_node_rows(db, execution_id, after_row_id):
+            result = WorkflowService.node_result_dict(row)
+            result.pop("data", None)
+            events.append((row.id, "node.finished" if row.success else "node.failed", {"execution_id": execution_id, **result}))
+        
+        if execution_log is None or execution_log.status not in ("success", "failed", "cancelled"):
+            return events, None
+        
+        summary = json.loads(execution_log.execution_data) if execution_log.execution_data else {}
+        return events, {
+            "execution_id": execution_id,
+            "workflow_id": execution_log.workflow_id,
+            "status": execution_log.status,
+            "error_message": execution_log.error_message,
+            "completed_at": execution_log.completed_at.isoformat() if execution_log.completed_at else None,
+            "nodes_total": summary.get("nodes_total"),
+            "nodes_executed": summary.get("nodes_executed"),
+            "nodes_successful": summary.get("nodes_successful")
+        }
+    finally:
+        db.close()
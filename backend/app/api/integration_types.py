@@ -4,6 +4,8 @@ from typing import List
 from pydantic import BaseModel
 from app.database import get_db
 from app.services import IntegrationService
+from app.utils.credential_cache import credential_cache
+from app.utils.task_cache import task_cache
 import json
 
 router = APIRouter(prefix="/integration-types", tags=["Integration Types"])
@@ -120,6 +122,9 @@ def update_integration_type(
         
         db.commit()
         db.refresh(integration_type)
+        # Cached credentials carry the type name, which may have changed
+        credential_cache.clear()
+        task_cache.clear()
         
         return IntegrationTypeResponse(
             id=integration_type.id,
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 from app.database import get_db
 from app.services import IntegrationService
@@ -17,6 +17,11 @@ class IntegrationCreate(BaseModel):
     integration_type_id: int
     credentials: Dict[str, Any]
 
+class IntegrationUpdate(BaseModel):
+    name: Optional[str] = None
+    credentials: Optional[Dict[str, Any]] = None
+    is_active: Optional[bool] = None
+
 class IntegrationResponse(BaseModel):
     id: int
     name: str
@@ -105,6 +110,32 @@ def get_integration(integration_id: int, db: Session = Depends(get_db)):
         created_at=integration.created_at.isoformat()
     )
 
+@router.put("/{integration_id}", response_model=IntegrationResponse)
+def update_integration(
+    integration_id: int,
+    data: IntegrationUpdate,
+    db: Session = Depends(get_db)
+):
+    """Update an integration's name, credentials or active flag"""
+    integration = IntegrationService.update_integration(
+        db=db,
+        integration_id=integration_id,
+        name=data.name,
+        credentials=data.credentials,
+        is_active=data.is_active
+    )
+    if not integration:
+        raise HTTPException(status_code=404, detail="Integration not found")
+    
+    return IntegrationResponse(
+        id=integration.id,
+        name=integration.name,
+        integration_type_id=integration.integration_type_id,
+        integration_type_name=integration.integration_type.name,
+        is_active=integration.is_active,
+        created_at=integration.created_at.isoformat()
+    )
+
 @router.delete("/{integration_id}")
 def delete_integration(integration_id: int, db: Session = Depends(get_db)):
     """Delete an integration"""
@@ -0,0 +1,135 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional
+from pydantic import BaseModel
+from app.database import get_db
+from app.models import WorkflowSchedule, SchedulerLease
+from app.services import ScheduleService, workflow_scheduler
+import json
+
+router = APIRouter(prefix="/schedules", tags=["Schedules"])
+
+class ScheduleCreate(BaseModel):
+    workflow_id: int
+    cron_expression: str
+    timezone: str = "UTC"
+    runtime_params: Optional[Dict[str, Any]] = None
+    name: Optional[str] = None
+    priority: Optional[str] = None
+    misfire_policy: str = "run_once"
+    max_catch_up: int = 1
+    is_active: bool = True
+
+class ScheduleUpdate(BaseModel):
+    cron_expression: Optional[str] = None
+    timezone: Optional[str] = None
+    runtime_params: Optional[Dict[str, Any]] = None
+    name: Optional[str] = None
+    priority: Optional[str] = None
+    misfire_policy: Optional[str] = None
+    max_catch_up: Optional[int] = None
+    is_active: Optional[bool] = None
+
+class ScheduleResponse(BaseModel):
+    id: int
+    workflow_id: int
+    name: Optional[str]
+    cron_expression: str
+    timezone: str
+    runtime_params: Dict[str, Any]
+    priority: Optional[str]
+    misfire_policy: str
+    max_catch_up: int
+    is_active: bool
+    next_fire_at: Optional[str]
+    last_fired_at: Optional[str]
+    created_at: str
+
+def build_schedule_response(schedule: WorkflowSchedule) -> ScheduleResponse:
+    return ScheduleResponse(
+        id=schedule.id,
+        workflow_id=schedule.workflow_id,
+        name=schedule.name,
+        cron_expression=schedule.cron_expression,
+        timezone=schedule.timezone,
+        runtime_params=json.loads(schedule.runtime_params or "{}"),
+        priority=schedule.priority,
+        misfire_policy=schedule.misfire_policy,
+        max_catch_up=schedule.max_catch_up,
+        is_active=schedule.is_active,
+        next_fire_at=schedule.next_fire_at.isoformat() if schedule.next_fire_at else None,
+        last_fired_at=schedule.last_fired_at.isoformat() if schedule.last_fired_at else None,
+        created_at=schedule.created_at.isoformat()
+    )
+
+@router.post("", response_model=ScheduleResponse)
+def create_schedule(data: ScheduleCreate, db: Session = Depends(get_db)):
+    """
+    Create a cron schedule for a workflow
+
+    - cron_expression: 5-field cron expression or @hourly/@daily/@weekly/@monthly/@yearly
+    - timezone: IANA timezone the expression is matched in (default UTC)
+    - runtime_params: Passed to every run, which has trigger_source "scheduled"
+    - priority: Priority class of the runs (default "scheduled")
+    - misfire_policy: What to do with fire times missed while no scheduler
+      was running: skip, run_once (default) or catch_up (up to max_catch_up runs)
+    """
+    try:
+        schedule = ScheduleService.create_schedule(db=db, **data.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    workflow_scheduler.notify()
+    return build_schedule_response(schedule)
+
+@router.get("", response_model=List[ScheduleResponse])
+def get_schedules(workflow_id: Optional[int] = None, db: Session = Depends(get_db)):
+    """Get all schedules, optionally of one workflow"""
+    return [build_schedule_response(s) for s in ScheduleService.get_schedules(db, workflow_id)]
+
+@router.get("/leader")
+def get_scheduler_leader(db: Session = Depends(get_db)):
+    """Which process currently fires schedules"""
+    lease = db.query(SchedulerLease).filter(SchedulerLease.name == workflow_scheduler.lease.name).first()
+    return {
+        "holder": lease.holder if lease else None,
+        "expires_at": lease.expires_at.isoformat() if lease else None,
+        "this_process": workflow_scheduler.lease.holder,
+        "is_leader": workflow_scheduler.is_leader
+    }
+
+@router.get("/{schedule_id}", response_model=ScheduleResponse)
+def get_schedule(schedule_id: int, db: Session = Depends(get_db)):
+    """Get a specific schedule"""
+    schedule = ScheduleService.get_schedule(db, schedule_id)
+    if not schedule:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    return build_schedule_response(schedule)
+
+@router.get("/{schedule_id}/preview")
+def preview_schedule(schedule_id: int, count: int = Query(5, ge=1, le=100), db: Session = Depends(get_db)):
+    """The next fire times of a schedule, in UTC"""
+    schedule = ScheduleService.get_schedule(db, schedule_id)
+    if not schedule:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    return {"schedule_id": schedule.id, "fire_times": [t.isoformat() for t in ScheduleService.preview(schedule, count)]}
+
+@router.put("/{schedule_id}", response_model=ScheduleResponse)
+def update_schedule(schedule_id: int, data: ScheduleUpdate, db: Session = Depends(get_db)):
+    """Update a schedule"""
+    try:
+        schedule = ScheduleService.update_schedule(db, schedule_id, **data.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not schedule:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    workflow_scheduler.notify()
+    return build_schedule_response(schedule)
+
+@router.delete("/{schedule_id}")
+def delete_schedule(schedule_id: int, db: Session = Depends(get_db)):
+    """Delete a schedule"""
+    success = ScheduleService.delete_schedule(db, schedule_id)
+    if not success:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    workflow_scheduler.notify()
+    return {"message": "Schedule deleted successfully"}
@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Header
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 from app.database import get_db
-from app.services import WorkflowService
+from app.services import WorkflowService, ExecutionStateError, AdmissionControl, WorkflowBusyError, dispatch_execution
+from app.models import ExecutionLog
+from app.services.fair_share import PRIORITY_CLASSES
+from app.services.trigger_spool import trigger_spool
+from datetime import datetime
 import json
 
 router = APIRouter(prefix="/workflows", tags=["Workflows"])
@@ -64,6 +69,8 @@ def create_workflow(
             created_at=workflow.created_at.isoformat(),
             updated_at=workflow.updated_at.isoformat()
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating workflow: {str(e)}")
 
@@ -111,13 +118,16 @@ def update_workflow(
     db: Session = Depends(get_db)
 ):
     """Update a workflow"""
-    workflow = WorkflowService.update_workflow(
-        db=db,
-        workflow_id=workflow_id,
-        name=data.name,
-        workflow_data=data.workflow_data,
-        description=data.description
-    )
+    try:
+        workflow = WorkflowService.update_workflow(
+            db=db,
+            workflow_id=workflow_id,
+            name=data.name,
+            workflow_data=data.workflow_data,
+            description=data.description
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not workflow:
         raise HTTPException(status_code=404, detail="Workflow not found")
     
@@ -145,6 +155,7 @@ class WorkflowExecuteRequest(BaseModel):
     runtime_params: Optional[Dict[str, Any]] = None
     trigger_source: Optional[str] = "manual"
     trigger_metadata: Optional[Dict[str, Any]] = None
+    priority: Optional[str] = None
 
 class WorkflowExecuteResponse(BaseModel):
     """Detailed workflow execution response"""
@@ -160,14 +171,111 @@ class WorkflowExecuteResponse(BaseModel):
     node_results: List[Dict[str, Any]]
     error_message: Optional[str]
     trigger_source: str
+    priority: Optional[str] = None
+    resumed_from_execution_id: Optional[int] = None
     
     class Config:
         from_attributes = True
 
-@router.post("/{workflow_id}/execute", response_model=WorkflowExecuteResponse)
+class TriggerAcceptedResponse(BaseModel):
+    """Response for triggers accepted by the ingestion spool"""
+    trigger_id: str
+    workflow_id: int
+    status: str
+
+class ExecutionAcceptedResponse(BaseModel):
+    """Response for executions queued with async=true"""
+    execution_id: int
+    workflow_id: int
+    status: str
+    trigger_source: str
+    status_url: str
+
+def build_execute_response(db: Session, execution_log: ExecutionLog) -> WorkflowExecuteResponse:
+    """Build the detailed execution response for an execution log"""
+    # Parse execution data
+    execution_data = json.loads(execution_log.execution_data) if execution_log.execution_data else {}
+    node_results = WorkflowService.get_node_results(db, [execution_log])[execution_log.id]
+    metadata = execution_data.get("metadata", {})
+    
+    # Calculate execution time
+    execution_time = None
+    if execution_log.completed_at and execution_log.started_at:
+        delta = execution_log.completed_at - execution_log.started_at
+        execution_time = delta.total_seconds()
+    
+    # Get workflow name
+    workflow = WorkflowService.get_workflow(db, execution_log.workflow_id)
+    workflow_name = workflow.name if workflow else "Unknown"
+    
+    # Count nodes
+    nodes_executed = len([r for r in node_results if r.get("success")])
+    nodes_total = len(node_results)
+    
+    return WorkflowExecuteResponse(
+        execution_id=execution_log.id,
+        workflow_id=execution_log.workflow_id,
+        workflow_name=workflow_name,
+        status=execution_log.status,
+        started_at=execution_log.started_at.isoformat(),
+        completed_at=execution_log.completed_at.isoformat() if execution_log.completed_at else None,
+        execution_time_seconds=execution_time,
+        nodes_executed=nodes_executed,
+        nodes_total=nodes_total,
+        node_results=node_results,
+        error_message=execution_log.error_message,
+        trigger_source=metadata.get("trigger_source") or "manual",
+        priority=metadata.get("priority"),
+        resumed_from_execution_id=metadata.get("resumed_from")
+    )
+
+def build_execution_log_responses(db: Session, logs: List[ExecutionLog]) -> List[ExecutionLogResponse]:
+    """Build execution log responses, loading node results for all logs at once"""
+    node_results = WorkflowService.get_node_results(db, logs)
+    responses = []
+    for log in logs:
+        execution_data = json.loads(log.execution_data) if log.execution_data else None
+        if execution_data is not None:
+            execution_data["node_results"] = node_results[log.id]
+        responses.append(ExecutionLogResponse(
+            id=log.id,
+            workflow_id=log.workflow_id,
+            status=log.status,
+            started_at=log.started_at.isoformat(),
+            completed_at=log.completed_at.isoformat() if log.completed_at else None,
+            execution_data=execution_data,
+            error_message=log.error_message
+        ))
+    return responses
+
+def resolve_idempotency_key(idempotency_key: Optional[str], trigger_metadata: Optional[Dict[str, Any]]) -> Optional[str]:
+    """The Idempotency-Key header, else trigger_metadata.idempotency_key; 400 if malformed"""
+    if not idempotency_key and trigger_metadata:
+        idempotency_key = trigger_metadata.get("idempotency_key")
+    if idempotency_key is not None:
+        idempotency_key = str(idempotency_key)
+        if not idempotency_key or len(idempotency_key) > 255:
+            raise HTTPException(status_code=400, detail="Idempotency key must be 1 to 255 characters")
+    return idempotency_key
+
+def busy_response(error: WorkflowBusyError) -> JSONResponse:
+    """429 answer for a trigger turned away by a workflow's overflow policy"""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(error), "occupancy": error.occupancy},
+        headers={"Retry-After": "1"}
+    )
+
+@router.post(
+    "/{workflow_id}/execute",
+    response_model=WorkflowExecuteResponse,
+    responses={202: {"model": ExecutionAcceptedResponse}}
+)
 def execute_workflow(
     workflow_id: int,
     request: Optional[WorkflowExecuteRequest] = None,
+    run_async: bool = Query(False, alias="async"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db: Session = Depends(get_db)
 ):
     """
@@ -180,6 +288,19 @@ def execute_workflow(
     - runtime_params: Optional parameters to pass to all nodes
     - trigger_source: Source of the trigger (api, manual, scheduled, webhook, etc.)
     - trigger_metadata: Additional metadata about the trigger
+    - priority: manual, api, scheduled or bulk; defaults to the class of
+      trigger_source. Background runs are dispatched by priority class and
+      weighted fair share across workflows.
+    - async: When true, respond with 202 and the execution id right away
+      and run the workflow in the background. Poll
+      GET /api/executions/{execution_id} for the result.
+    - Workflows with settings.max_concurrent_executions start pending and
+      wait for a slot; when the workflow is full, its overflow_policy may
+      answer 429 instead (see GET /api/workflows/{workflow_id}/occupancy).
+    - Idempotency-Key header (or trigger_metadata.idempotency_key): a
+      repeated key does not run the workflow again; the response describes
+      the execution the first request created and carries
+      "Idempotent-Replayed: true".
     
     Returns detailed execution information including:
     - Execution status
@@ -192,57 +313,78 @@ def execute_workflow(
         runtime_params = request.runtime_params if request else None
         trigger_source = request.trigger_source if request else "manual"
         trigger_metadata = request.trigger_metadata if request else {}
+        priority = request.priority if request else None
+        if priority is not None and priority not in PRIORITY_CLASSES:
+            raise HTTPException(status_code=400, detail=f"priority must be one of {', '.join(PRIORITY_CLASSES)}")
         
-        # Execute workflow with enhanced tracking
-        execution_log = WorkflowService.execute_workflow(
-            db, 
-            workflow_id,
-            runtime_params=runtime_params,
-            trigger_source=trigger_source,
-            trigger_metadata=trigger_metadata
-        )
-        
-        # Parse execution data
-        execution_data = json.loads(execution_log.execution_data) if execution_log.execution_data else {}
-        node_results = execution_data.get("node_results", [])
+        idempotency_key = resolve_idempotency_key(idempotency_key, trigger_metadata)
         
-        # Calculate execution time
-        execution_time = None
-        if execution_log.completed_at and execution_log.started_at:
-            delta = execution_log.completed_at - execution_log.started_at
-            execution_time = delta.total_seconds()
+        created = True
+        if idempotency_key:
+            execution_log, created = WorkflowService.create_idempotent_execution(
+                db,
+                workflow_id,
+                idempotency_key,
+                status="pending" if run_async else "running",
+                runtime_params=runtime_params,
+                trigger_source=trigger_source,
+                trigger_metadata=trigger_metadata,
+                priority=priority
+            )
+        else:
+            execution_log = WorkflowService.create_execution(
+                db,
+                workflow_id,
+                runtime_params=runtime_params,
+                trigger_source=trigger_source,
+                trigger_metadata=trigger_metadata,
+                status="pending" if run_async else "running",
+                priority=priority
+            )
+        replay_headers = {} if created else {"Idempotent-Replayed": "true"}
         
-        # Get workflow name
-        workflow = WorkflowService.get_workflow(db, workflow_id)
-        workflow_name = workflow.name if workflow else "Unknown"
+        if run_async:
+            if created:
+                dispatch_execution(db, execution_log)
+            
+            accepted = ExecutionAcceptedResponse(
+                execution_id=execution_log.id,
+                workflow_id=execution_log.workflow_id,
+                status=execution_log.status,
+                trigger_source=trigger_source,
+                status_url=f"/api/executions/{execution_log.id}"
+            )
+            return JSONResponse(status_code=202, content=accepted.model_dump(), headers=replay_headers)
         
-        # Count nodes
-        nodes_executed = len([r for r in node_results if r.get("success")])
-        nodes_total = len(node_results)
+        if created:
+            # Execute workflow with enhanced tracking
+            execution_log = WorkflowService.run_when_admitted(db, execution_log)
         
-        return WorkflowExecuteResponse(
-            execution_id=execution_log.id,
-            workflow_id=execution_log.workflow_id,
-            workflow_name=workflow_name,
-            status=execution_log.status,
-            started_at=execution_log.started_at.isoformat(),
-            completed_at=execution_log.completed_at.isoformat() if execution_log.completed_at else None,
-            execution_time_seconds=execution_time,
-            nodes_executed=nodes_executed,
-            nodes_total=nodes_total,
-            node_results=node_results,
-            error_message=execution_log.error_message,
-            trigger_source=trigger_source
-        )
+        response = build_execute_response(db, execution_log)
+        if not created:
+            return JSONResponse(content=response.model_dump(), headers=replay_headers)
+        return response
+    except HTTPException:
+        raise
+    except WorkflowBusyError as e:
+        return busy_response(e)
+    except ExecutionStateError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error executing workflow: {str(e)}")
 
-@router.post("/{workflow_id}/trigger", response_model=WorkflowExecuteResponse)
+@router.post(
+    "/{workflow_id}/trigger",
+    response_model=WorkflowExecuteResponse,
+    responses={202: {"model": ExecutionAcceptedResponse}}
+)
 def trigger_workflow_via_api(
     workflow_id: int,
     request: Optional[WorkflowExecuteRequest] = None,
+    run_async: bool = Query(False, alias="async"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db: Session = Depends(get_db)
 ):
     """
@@ -264,51 +406,99 @@ def trigger_workflow_via_api(
                 "branch": "main"
             }
         }
+    
+    Add ?async=true to get a 202 with the execution id immediately instead
+    of waiting for the workflow to finish. Senders that redeliver on timeout
+    should set an Idempotency-Key header so a redelivery does not run the
+    workflow again.
     """
     if not request:
         request = WorkflowExecuteRequest()
     
-    if not request.trigger_source:
+    if "trigger_source" not in request.model_fields_set or not request.trigger_source:
         request.trigger_source = "api"
     
-    return execute_workflow(workflow_id, request, db)
+    return execute_workflow(workflow_id, request, run_async, idempotency_key, db)
+
+@router.post("/{workflow_id}/ingest", status_code=202, response_model=TriggerAcceptedResponse)
+def ingest_workflow_trigger(
+    workflow_id: int,
+    request: Optional[WorkflowExecuteRequest] = None,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    """
+    Accept a webhook trigger without waiting for the database
+    
+    Takes the same body as /trigger. The trigger is validated and written
+    to the local trigger spool, and the 202 is sent as soon as it is safely
+    on disk. A background drainer then creates the execution and runs it
+    like async=true; trigger_metadata.trigger_id links the execution to the
+    trigger_id returned here. Use this for webhook senders (GitHub, Jira,
+    ...) that need a fast acknowledgement and must not lose deliveries when
+    the database is slow or briefly unavailable. trigger_source defaults
+    to "webhook".
+    
+    Unknown workflows are only detected by the drainer, which records them
+    in the spool's dead_letter.jsonl. Triggers that find the workflow at its
+    concurrency limits stay in the spool and are retried.
+    """
+    if not request:
+        request = WorkflowExecuteRequest()
+    if "trigger_source" not in request.model_fields_set:
+        request.trigger_source = "webhook"
+    if request.priority is not None and request.priority not in PRIORITY_CLASSES:
+        raise HTTPException(status_code=400, detail=f"priority must be one of {', '.join(PRIORITY_CLASSES)}")
+    idempotency_key = resolve_idempotency_key(idempotency_key, request.trigger_metadata)
+    
+    try:
+        trigger_id = trigger_spool.append(workflow_id, request.model_dump(), idempotency_key)
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except OSError as e:
+        raise HTTPException(status_code=503, detail=f"Trigger spool unavailable: {str(e)}")
+    
+    return TriggerAcceptedResponse(trigger_id=trigger_id, workflow_id=workflow_id, status="accepted")
+
+@router.get("/{workflow_id}/occupancy")
+def get_workflow_occupancy(workflow_id: int, db: Session = Depends(get_db)):
+    """Running and queued executions of a workflow, with its concurrency limits"""
+    workflow = WorkflowService.get_workflow(db, workflow_id)
+    if not workflow:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    return AdmissionControl.occupancy(db, workflow_id, AdmissionControl.limits(workflow))
 
 @router.get("/executions/all", response_model=List[ExecutionLogResponse])
-def get_all_executions(db: Session = Depends(get_db)):
-    """Get all execution logs across all workflows"""
+def get_all_executions(
+    status: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    before: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Get execution logs across all workflows, newest first
+    
+    Optional filters: status (pending, running, success, failed,
+    cancelled), limit, and before (the started_at of the last execution of
+    the previous page). Filtering by status lets large histories be read
+    from the (status, started_at) index.
+    """
     try:
-        logs = WorkflowService.get_execution_logs(db)
-        return [
-            ExecutionLogResponse(
-                id=log.id,
-                workflow_id=log.workflow_id,
-                status=log.status,
-                started_at=log.started_at.isoformat(),
-                completed_at=log.completed_at.isoformat() if log.completed_at else None,
-                execution_data=json.loads(log.execution_data) if log.execution_data else None,
-                error_message=log.error_message
-            )
-            for log in logs
-        ]
+        logs = WorkflowService.get_execution_logs(db, status=status, limit=limit, before=before)
+        return build_execution_log_responses(db, logs)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching execution logs: {str(e)}")
 
 @router.get("/{workflow_id}/executions", response_model=List[ExecutionLogResponse])
-def get_workflow_executions(workflow_id: int, db: Session = Depends(get_db)):
-    """Get execution logs for a specific workflow"""
+def get_workflow_executions(
+    workflow_id: int,
+    status: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    before: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """Get execution logs for a specific workflow, newest first, with the same filters as /executions/all"""
     try:
-        logs = WorkflowService.get_execution_logs(db, workflow_id)
-        return [
-            ExecutionLogResponse(
-                id=log.id,
-                workflow_id=log.workflow_id,
-                status=log.status,
-                started_at=log.started_at.isoformat(),
-                completed_at=log.completed_at.isoformat() if log.completed_at else None,
-                execution_data=json.loads(log.execution_data) if log.execution_data else None,
-                error_message=log.error_message
-            )
-            for log in logs
-        ]
+        logs = WorkflowService.get_execution_logs(db, workflow_id, status=status, limit=limit, before=before)
+        return build_execution_log_responses(db, logs)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching execution logs: {str(e)}")
\ No newline at end of file
@@ -1,6 +1,8 @@
 import requests
 from typing import Dict, Any
+from app.utils.task_cache import cacheable
 
+@cacheable(ttl_seconds=60)
 def test_connection(credentials: Dict[str, Any]) -> Dict[str, Any]:
     """
     Test AWS connection with provided credentials
@@ -48,6 +50,7 @@ def test_connection(credentials: Dict[str, Any]) -> Dict[str, Any]:
             "message": f"Unexpected error: {str(e)}"
         }
 
+@cacheable(ttl_seconds=30)
 def list_s3_buckets(credentials: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
     """
     List S3 buckets (example task)
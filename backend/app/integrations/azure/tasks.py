@@ -1,5 +1,7 @@
 from typing import Dict, Any
+from app.utils.task_cache import cacheable
 
+@cacheable(ttl_seconds=60)
 def test_connection(credentials: Dict[str, Any]) -> Dict[str, Any]:
     """
     Test Azure connection with provided credentials
@@ -41,6 +43,7 @@ def test_connection(credentials: Dict[str, Any]) -> Dict[str, Any]:
             "message": f"Unexpected error: {str(e)}"
         }
 
+@cacheable(ttl_seconds=30)
 def list_resource_groups(credentials: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
     """
     List Azure resource groups (example task)
@@ -1,6 +1,9 @@
 import requests
+from app.utils.http_client import http_client
 from typing import Dict, Any
+from app.utils.task_cache import cacheable
 
+@cacheable(ttl_seconds=60)
 def test_connection(credentials: Dict[str, Any]) -> Dict[str, Any]:
     """
     Test GitHub connection with provided credentials
@@ -21,13 +24,12 @@ def test_connection(credentials: Dict[str, Any]) -> Dict[str, Any]:
             }
         
         # Test connection by fetching authenticated user info
-        response = requests.get(
+        response = http_client.get(
             "https://api.github.com/user",
             headers={
                 "Authorization": f"Bearer {token}",
                 "Accept": "application/vnd.github.v3+json"
-            },
-            timeout=10
+            }
         )
         
         if response.status_code == 200:
@@ -93,14 +95,13 @@ def create_repo(credentials: Dict[str, Any], params: Dict[str, Any]) -> Dict[str
             "auto_init": True
         }
         
-        response = requests.post(
+        response = http_client.post(
             "https://api.github.com/user/repos",
             json=payload,
             headers={
                 "Authorization": f"Bearer {token}",
                 "Accept": "application/vnd.github.v3+json"
-            },
-            timeout=10
+            }
         )
         
         if response.status_code == 201:
@@ -155,14 +156,13 @@ def create_issue(credentials: Dict[str, Any], params: Dict[str, Any]) -> Dict[st
             "body": body
         }
         
-        response = requests.post(
+        response = http_client.post(
             f"https://api.github.com/repos/{repo}/issues",
             json=payload,
             headers={
                 "Authorization": f"Bearer {token}",
                 "Accept": "application/vnd.github.v3+json"
-            },
-            timeout=10
+            }
         )
         
         if response.status_code == 201:
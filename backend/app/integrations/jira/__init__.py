@@ -1,3 +1,3 @@
-from .tasks import test_connection, create_issue
+from .tasks import test_connection, create_issue, create_issues_bulk
 
-__all__ = ["test_connection", "create_issue"]
+__all__ = ["test_connection", "create_issue", "create_issues_bulk"]
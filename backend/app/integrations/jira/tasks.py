@@ -1,6 +1,13 @@
 import requests
-from typing import Dict, Any
+from app.utils.http_client import http_client
+from typing import List, Dict, Any, Optional
+from app.utils.task_batching import batchable
+from app.utils.task_cache import cacheable
 
+# Issues accepted per call by /rest/api/3/issue/bulk
+JIRA_BULK_LIMIT = 50
+
+@cacheable(ttl_seconds=60)
 def test_connection(credentials: Dict[str, Any]) -> Dict[str, Any]:
     """
     Test Jira connection with provided credentials
@@ -24,11 +31,10 @@ def test_connection(credentials: Dict[str, Any]) -> Dict[str, Any]:
             }
         
         # Test connection by fetching user info
-        response = requests.get(
+        response = http_client.get(
             f"{url}/rest/api/3/myself",
             auth=(email, api_token),
-            headers={"Accept": "application/json"},
-            timeout=10
+            headers={"Accept": "application/json"}
         )
         
         if response.status_code == 200:
@@ -63,6 +69,110 @@ def test_connection(credentials: Dict[str, Any]) -> Dict[str, Any]:
             "message": f"Unexpected error: {str(e)}"
         }
 
+def _issue_payload(params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Build the create-issue request body, or None if required params are missing"""
+    project = params.get("project")
+    summary = params.get("summary")
+    description = params.get("description", "")
+    issue_type = params.get("issue_type", "Task")
+    
+    if not all([project, summary]):
+        return None
+    
+    return {
+        "fields": {
+            "project": {"key": project},
+            "summary": summary,
+            "description": {
+                "type": "doc",
+                "version": 1,
+                "content": [
+                    {
+                        "type": "paragraph",
+                        "content": [
+                            {
+                                "type": "text",
+                                "text": description
+                            }
+                        ]
+                    }
+                ]
+            },
+            "issuetype": {"name": issue_type}
+        }
+    }
+
+def _issue_result(issue_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "success": True,
+        "message": f"Issue created successfully: {issue_data.get('key')}",
+        "data": {
+            "key": issue_data.get("key"),
+            "id": issue_data.get("id"),
+            "self": issue_data.get("self")
+        }
+    }
+
+def create_issues_batch(credentials: Dict[str, Any], issues: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Create many issues through the bulk endpoint, JIRA_BULK_LIMIT per request
+    
+    issues is a list of create_issue params; returns one create_issue style
+    result per issue, in the same order.
+    """
+    url = credentials.get("url", "").rstrip("/")
+    email = credentials.get("email")
+    api_token = credentials.get("api_token")
+    
+    results: List[Optional[Dict[str, Any]]] = [None] * len(issues)
+    valid = []
+    for index, params in enumerate(issues):
+        payload = _issue_payload(params or {})
+        if payload is None:
+            results[index] = {
+                "success": False,
+                "message": "Missing required parameters: project or summary"
+            }
+        else:
+            valid.append((index, payload))
+    
+    for start in range(0, len(valid), JIRA_BULK_LIMIT):
+        chunk = valid[start:start + JIRA_BULK_LIMIT]
+        try:
+            response = http_client.post(
+                f"{url}/rest/api/3/issue/bulk",
+                json={"issueUpdates": [payload for _, payload in chunk]},
+                auth=(email, api_token),
+                headers={"Accept": "application/json", "Content-Type": "application/json"}
+            )
+            body = response.json() if response.content else {}
+        except Exception as e:
+            for index, _ in chunk:
+                results[index] = {"success": False, "message": f"Error creating issue: {str(e)}"}
+            continue
+        
+        if response.status_code not in (200, 201, 400) or not isinstance(body, dict):
+            for index, _ in chunk:
+                results[index] = {"success": False, "message": f"Failed to create issue: {response.text}"}
+            continue
+        
+        # Created issues come back in request order, skipping the failed elements
+        failed = {error.get("failedElementNumber"): error for error in body.get("errors", [])}
+        created = iter(body.get("issues", []))
+        for position, (index, _) in enumerate(chunk):
+            if position in failed:
+                error = failed[position].get("elementErrors", {})
+                details = error.get("errorMessages", []) + [f"{k}: {v}" for k, v in error.get("errors", {}).items()]
+                results[index] = {"success": False, "message": f"Failed to create issue: {'; '.join(details) or 'unknown error'}"}
+            else:
+                issue_data = next(created, None)
+                results[index] = _issue_result(issue_data) if issue_data else {
+                    "success": False,
+                    "message": "Failed to create issue: missing from bulk response"
+                }
+    return results
+
+@batchable(create_issues_batch, max_batch_size=JIRA_BULK_LIMIT)
 def create_issue(credentials: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
     """
     Create a Jira issue
@@ -80,59 +190,22 @@ def create_issue(credentials: Dict[str, Any], params: Dict[str, Any]) -> Dict[st
         email = credentials.get("email")
         api_token = credentials.get("api_token")
         
-        project = params.get("project")
-        summary = params.get("summary")
-        description = params.get("description", "")
-        issue_type = params.get("issue_type", "Task")
-        
-        if not all([project, summary]):
+        payload = _issue_payload(params)
+        if payload is None:
             return {
                 "success": False,
                 "message": "Missing required parameters: project or summary"
             }
         
-        payload = {
-            "fields": {
-                "project": {"key": project},
-                "summary": summary,
-                "description": {
-                    "type": "doc",
-                    "version": 1,
-                    "content": [
-                        {
-                            "type": "paragraph",
-                            "content": [
-                                {
-                                    "type": "text",
-                                    "text": description
-                                }
-                            ]
-                        }
-                    ]
-                },
-                "issuetype": {"name": issue_type}
-            }
-        }
-        
-        response = requests.post(
+        response = http_client.post(
             f"{url}/rest/api/3/issue",
             json=payload,
             auth=(email, api_token),
-            headers={"Accept": "application/json", "Content-Type": "application/json"},
-            timeout=10
+            headers={"Accept": "application/json", "Content-Type": "application/json"}
         )
         
         if response.status_code == 201:
-            issue_data = response.json()
-            return {
-                "success": True,
-                "message": f"Issue created successfully: {issue_data.get('key')}",
-                "data": {
-                    "key": issue_data.get("key"),
-                    "id": issue_data.get("id"),
-                    "self": issue_data.get("self")
-                }
-            }
+            return _issue_result(response.json())
         else:
             return {
                 "success": False,
@@ -144,3 +217,37 @@ def create_issue(credentials: Dict[str, Any], params: Dict[str, Any]) -> Dict[st
             "success": False,
             "message": f"Error creating issue: {str(e)}"
         }
+
+def create_issues_bulk(credentials: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Create several Jira issues with the bulk endpoint
+    
+    params:
+    {
+        "issues": [
+            {"project": "PROJECT_KEY", "summary": "...", "description": "...", "issue_type": "Bug"},
+            ...
+        ]
+    }
+    """
+    issues = params.get("issues")
+    if not isinstance(issues, list) or not issues:
+        return {
+            "success": False,
+            "message": "Missing required parameter: issues (a non-empty list)"
+        }
+    
+    results = create_issues_batch(credentials, issues)
+    failed = [r for r in results if not r["success"]]
+    return {
+        "success": not failed,
+        "message": f"Created {len(results) - len(failed)} of {len(results)} issues",
+        "data": {
+            "created": len(results) - len(failed),
+            "failed": len(failed),
+            "issues": [
+                {"success": r["success"], **r.get("data", {})} if r["success"] else {"success": False, "message": r["message"]}
+                for r in results
+            ]
+        }
+    }
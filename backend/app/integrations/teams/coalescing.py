@@ -0,0 +1,155 @@
+"""
+Coalescing of Teams webhook messages
+
+Teams throttles incoming webhooks, so a webhook can opt in to coalescing with
+a "coalesce_window_ms" credential. Messages for that webhook that arrive
+within the window, from any task or execution, are posted as one MessageCard
+with a section per message. The first message of a window waits it out and
+makes the call; every message gets the delivery status of the card it was
+sent in, or a timeout if its task's deadline passes before the call returns.
+"""
+
+import json
+import os
+import threading
+from typing import List, Dict, Any, Optional
+from app.utils.http_client import http_client
+from app.utils.task_context import get_task_context
+
+# Messages merged into one card at most
+TEAMS_COALESCE_MAX_MESSAGES = int(os.getenv("TEAMS_COALESCE_MAX_MESSAGES", "10"))
+
+# Size limit of a merged card; Teams rejects payloads above about 28 KB
+TEAMS_COALESCE_MAX_BYTES = int(os.getenv("TEAMS_COALESCE_MAX_BYTES", "24000"))
+
+
+class CardDelivery:
+    """HTTP outcome of the card a message was sent in"""
+
+    def __init__(self, status_code: int, text: str, messages: int):
+        self.status_code = status_code
+        self.text = text
+        # Number of messages in the card
+        self.messages = messages
+
+
+class _Window:
+    """Messages collected for one webhook call"""
+
+    def __init__(self):
+        self.cards: List[Dict[str, Any]] = []
+        self.size = 0
+        self.delivery: Optional[CardDelivery] = None
+        self.error: Optional[Exception] = None
+        self.error_kind: Optional[str] = None
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+
+def merge_cards(cards: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """One MessageCard holding every card as a titled section followed by its own sections"""
+    if len(cards) == 1:
+        return cards[0]
+
+    sections = []
+    for card in cards:
+        header = {"activityTitle": card.get("title") or card.get("summary") or "Message"}
+        if card.get("text"):
+            header["text"] = card["text"]
+        sections.append(header)
+        sections.extend(card.get("sections", []))
+
+    return {
+        "@type": "MessageCard",
+        "@context": "https://schema.org/extensions",
+        "summary": f"{len(cards)} notifications",
+        "themeColor": cards[0].get("themeColor", "0078D4"),
+        "title": f"📢 {len(cards)} notifications",
+        "sections": sections
+    }
+
+
+class WebhookCoalescer:
+    """Merge messages sent to the same webhook within a time window"""
+
+    def __init__(
+        self,
+        max_messages: int = TEAMS_COALESCE_MAX_MESSAGES,
+        max_bytes: int = TEAMS_COALESCE_MAX_BYTES
+    ):
+        self.max_messages = max(1, max_messages)
+        self.max_bytes = max_bytes
+        self._open: Dict[str, _Window] = {}
+        self._lock = threading.Lock()
+
+    def send(self, webhook_url: str, card: Dict[str, Any], window_seconds: float) -> CardDelivery:
+        """Send card as part of the webhook's current window; returns the delivery of its card"""
+        size = len(json.dumps(card))
+        with self._lock:
+            window = self._open.get(webhook_url)
+            if window is not None and window.size + size > self.max_bytes:
+                # Would not fit: send what is collected and start a new window
+                del self._open[webhook_url]
+                window.full.set()
+                window = None
+            leader = window is None
+            if leader:
+                window = self._open[webhook_url] = _Window()
+            window.cards.append(card)
+            window.size += size
+            if len(window.cards) >= self.max_messages:
+                del self._open[webhook_url]
+                window.full.set()
+
+        context = get_task_context()
+        if leader:
+            remaining = context.remaining() if context else None
+            if remaining is not None:
+                # Leave the call itself time before the task deadline
+                window_seconds = min(window_seconds, max(0.0, remaining / 2))
+            window.full.wait(window_seconds)
+            with self._lock:
+                if self._open.get(webhook_url) is window:
+                    del self._open[webhook_url]
+            self._post(webhook_url, window)
+        elif not window.done.wait(context.remaining() if context else None):
+            # The leader is still posting (or stuck); don't outlive this task's deadline
+            context.error_kind = "timeout"
+            raise TimeoutError("Timed out waiting for the coalesced Teams card to be sent")
+
+        if context and not leader and (window.error or window.delivery.status_code != 200):
+            # Only the leader's context saw the HTTP response
+            context.error_kind = window.error_kind
+        if window.error:
+            raise window.error
+        return window.delivery
+
+    @staticmethod
+    def _post(webhook_url: str, window: _Window):
+        try:
+            response = http_client.post(webhook_url, json=merge_cards(window.cards))
+            window.delivery = CardDelivery(response.status_code, response.text, len(window.cards))
+        except Exception as e:
+            window.error = e
+        finally:
+            if window.delivery is None and window.error is None:
+                # Interrupted, e.g. by SystemExit; the other senders must not wait forever
+                window.error = RuntimeError("Coalesced Teams card was not sent")
+            context = get_task_context()
+            window.error_kind = context.error_kind if context else None
+            window.done.set()
+
+
+# Global instance
+webhook_coalescer = WebhookCoalescer()
+
+
+def post_card(credentials: Dict[str, Any], card: Dict[str, Any]) -> CardDelivery:
+    """Post a MessageCard to the webhook of credentials, coalesced if the webhook opts in"""
+    webhook_url = credentials.get("webhook_url")
+    window_ms = float(credentials.get("coalesce_window_ms") or 0)
+    if window_ms > 0:
+        return webhook_coalescer.send(webhook_url, card, window_ms / 1000)
+
+    response = http_client.post(webhook_url, json=card)
+    return CardDelivery(response.status_code, response.text, 1)
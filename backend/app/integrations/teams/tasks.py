@@ -1,13 +1,20 @@
 """
 Microsoft Teams Integration
 Supports sending messages and notifications to Teams channels via webhook
+
+A webhook whose credentials set "coalesce_window_ms" gets the messages sent to
+it within that window as one card (see coalescing.py).
 """
 
 import requests
+from app.utils.http_client import http_client
 from typing import Dict, Any
 from datetime import datetime
+from app.utils.task_cache import cacheable
+from app.integrations.teams.coalescing import post_card
 
 
+@cacheable(ttl_seconds=60)
 def test_connection(credentials: Dict[str, Any], params: Dict[str, Any] = None) -> Dict[str, Any]:
     """
     Test Microsoft Teams webhook connection
@@ -43,10 +50,9 @@ def test_connection(credentials: Dict[str, Any], params: Dict[str, Any] = None)
             "text": "Your Microsoft Teams integration is working correctly!"
         }
         
-        response = requests.post(
+        response = http_client.post(
             webhook_url,
-            json=test_payload,
-            timeout=10
+            json=test_payload
         )
         
         if response.status_code == 200:
@@ -88,7 +94,6 @@ def send_simple_message(credentials: Dict[str, Any], params: Dict[str, Any]) ->
     }
     """
     try:
-        webhook_url = credentials.get("webhook_url")
         text = params.get("text")
         
         if not text:
@@ -103,17 +108,13 @@ def send_simple_message(credentials: Dict[str, Any], params: Dict[str, Any]) ->
             "text": text
         }
         
-        response = requests.post(
-            webhook_url,
-            json=payload,
-            timeout=10
-        )
+        response = post_card(credentials, payload)
         
         if response.status_code == 200:
             return {
                 "success": True,
                 "message": "Message sent successfully to Teams!",
-                "data": {"text": text}
+                "data": {"text": text, "coalesced_messages": response.messages}
             }
         else:
             return {
@@ -140,7 +141,6 @@ def send_card_message(credentials: Dict[str, Any], params: Dict[str, Any]) -> Di
     }
     """
     try:
-        webhook_url = credentials.get("webhook_url")
         title = params.get("title")
         text = params.get("text")
         color = params.get("color", "0078D4")  # Default Teams blue
@@ -160,17 +160,13 @@ def send_card_message(credentials: Dict[str, Any], params: Dict[str, Any]) -> Di
             "text": text
         }
         
-        response = requests.post(
-            webhook_url,
-            json=payload,
-            timeout=10
-        )
+        response = post_card(credentials, payload)
         
         if response.status_code == 200:
             return {
                 "success": True,
                 "message": "Card message sent successfully!",
-                "data": {"title": title, "text": text}
+                "data": {"title": title, "text": text, "coalesced_messages": response.messages}
             }
         else:
             return {
@@ -198,7 +194,6 @@ def send_notification(credentials: Dict[str, Any], params: Dict[str, Any]) -> Di
     }
     """
     try:
-        webhook_url = credentials.get("webhook_url")
         title = params.get("title", "Notification")
         message = params.get("message")
         status = params.get("status", "info").lower()
@@ -247,17 +242,13 @@ def send_notification(credentials: Dict[str, Any], params: Dict[str, Any]) -> Di
                 "text": subtitle
             }]
         
-        response = requests.post(
-            webhook_url,
-            json=payload,
-            timeout=10
-        )
+        response = post_card(credentials, payload)
         
         if response.status_code == 200:
             return {
                 "success": True,
                 "message": f"Notification sent successfully! (Status: {status})",
-                "data": {"title": title, "status": status}
+                "data": {"title": title, "status": status, "coalesced_messages": response.messages}
             }
         else:
             return {
@@ -294,7 +285,6 @@ def send_rich_card(credentials: Dict[str, Any], params: Dict[str, Any]) -> Dict[
     }
     """
     try:
-        webhook_url = credentials.get("webhook_url")
         title = params.get("title", "Notification")
         summary = params.get("summary", title)
         sections = params.get("sections", [])
@@ -326,17 +316,13 @@ def send_rich_card(credentials: Dict[str, Any], params: Dict[str, Any]) -> Dict[
             
             payload["sections"] = formatted_sections
         
-        response = requests.post(
-            webhook_url,
-            json=payload,
-            timeout=10
-        )
+        response = post_card(credentials, payload)
         
         if response.status_code == 200:
             return {
                 "success": True,
                 "message": "Rich card sent successfully!",
-                "data": {"title": title, "sections_count": len(sections)}
+                "data": {"title": title, "sections_count": len(sections), "coalesced_messages": response.messages}
             }
         else:
             return {
@@ -364,7 +350,6 @@ def send_workflow_status(credentials: Dict[str, Any], params: Dict[str, Any]) ->
     }
     """
     try:
-        webhook_url = credentials.get("webhook_url")
         workflow_name = params.get("workflow_name", "Workflow")
         status = params.get("status", "running").lower()
         execution_time = params.get("execution_time")
@@ -429,17 +414,13 @@ def send_workflow_status(credentials: Dict[str, Any], params: Dict[str, Any]) ->
             "value": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         })
         
-        response = requests.post(
-            webhook_url,
-            json=payload,
-            timeout=10
-        )
+        response = post_card(credentials, payload)
         
         if response.status_code == 200:
             return {
                 "success": True,
                 "message": f"Workflow status notification sent! (Status: {status})",
-                "data": {"workflow": workflow_name, "status": status}
+                "data": {"workflow": workflow_name, "status": status, "coalesced_messages": response.messages}
             }
         else:
             return {
@@ -467,7 +448,6 @@ def send_alert(credentials: Dict[str, Any], params: Dict[str, Any]) -> Dict[str,
     }
     """
     try:
-        webhook_url = credentials.get("webhook_url")
         title = params.get("title", "Alert")
         message = params.get("message")
         severity = params.get("severity", "medium").lower()
@@ -505,17 +485,13 @@ def send_alert(credentials: Dict[str, Any], params: Dict[str, Any]) -> Dict[str,
             }]
         }
         
-        response = requests.post(
-            webhook_url,
-            json=payload,
-            timeout=10
-        )
+        response = post_card(credentials, payload)
         
         if response.status_code == 200:
             return {
                 "success": True,
                 "message": f"Alert sent successfully! (Severity: {severity})",
-                "data": {"title": title, "severity": severity}
+                "data": {"title": title, "severity": severity, "coalesced_messages": response.messages}
             }
         else:
             return {
@@ -1,7 +1,15 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import init_db
+from app.database import init_db, SessionLocal
 from app.api import api_router
+from app.services import background_runner
+from app.services.workflow_service import WorkflowService
+from app.services.task_registry import task_registry
+from app.services.log_writer import log_writer
+from app.services.scheduler import workflow_scheduler, SCHEDULER_ENABLED
+from app.services.trigger_spool import trigger_spool
+from app.utils.http_client import http_client
+from app.utils.process_pool import process_pool
 
 app = FastAPI(
     title="Workflow Automation Platform",
@@ -29,6 +37,43 @@ def startup_event():
         print("Database initialized successfully")
     except Exception as e:
         print(f"Error initializing database: {e}")
+    
+    # Idempotency keys past IDEMPOTENCY_KEY_TTL_HOURS no longer deduplicate anything
+    db = SessionLocal()
+    try:
+        purged = WorkflowService.purge_idempotency_keys(db)
+        if purged:
+            print(f"Deleted {purged} expired idempotency keys")
+    except Exception as e:
+        print(f"Error deleting expired idempotency keys: {e}")
+    finally:
+        db.close()
+    
+    # Resolve integration task functions once instead of on every node run
+    task_count = task_registry.discover()
+    print(f"Registered {task_count} integration tasks")
+    
+    # Fork the process pool now if any task runs there by default
+    if process_pool.enabled and task_registry.has_process_tasks():
+        process_pool.start()
+    
+    # Starts the executions of triggers accepted through /ingest, including
+    # any left in the spool by a previous run
+    trigger_spool.start()
+    
+    # Fires cron schedules while this process holds the scheduler lease
+    if SCHEDULER_ENABLED:
+        workflow_scheduler.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """Let background executions finish before the process exits"""
+    workflow_scheduler.stop()
+    trigger_spool.stop()
+    background_runner.shutdown(wait=True)
+    log_writer.shutdown()
+    process_pool.shutdown()
+    http_client.close()
 
 @app.get("/")
 def root():
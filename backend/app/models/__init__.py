@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -44,17 +44,141 @@ class Workflow(Base):
     
     # Relationships
     execution_logs = relationship("ExecutionLog", back_populates="workflow", cascade="all, delete-orphan")
+    idempotency_keys = relationship("ExecutionIdempotencyKey", back_populates="workflow", cascade="all, delete-orphan")
+    execution_slots = relationship("ExecutionSlot", back_populates="workflow", cascade="all, delete-orphan")
+    schedules = relationship("WorkflowSchedule", back_populates="workflow", cascade="all, delete-orphan")
 
 class ExecutionLog(Base):
     __tablename__ = "execution_logs"
     
     id = Column(Integer, primary_key=True, index=True)
     workflow_id = Column(Integer, ForeignKey("workflows.id"), nullable=False)
-    status = Column(String(50), nullable=False)  # pending, running, success, failed
+    status = Column(String(50), nullable=False)  # pending, running, success, failed, cancelled
     started_at = Column(DateTime, default=datetime.utcnow)
     completed_at = Column(DateTime, nullable=True)
-    execution_data = Column(Text, nullable=True)  # JSON string of execution details
+    execution_data = Column(Text, nullable=True)  # JSON string of trigger metadata and node counts
     error_message = Column(Text, nullable=True)
     
+    __table_args__ = (
+        # Execution history, per workflow or per status, newest first
+        Index("ix_execution_logs_workflow_started_at", "workflow_id", "started_at"),
+        Index("ix_execution_logs_status_started_at", "status", "started_at"),
+    )
+    
+    # Relationships
+    workflow = relationship("Workflow", back_populates="execution_logs")
+    node_results = relationship("ExecutionNodeResult", back_populates="execution_log", cascade="all, delete-orphan", order_by="ExecutionNodeResult.id")
+    queue_job = relationship("ExecutionJob", back_populates="execution_log", uselist=False, cascade="all, delete-orphan")
+
+class ExecutionNodeResult(Base):
+    __tablename__ = "execution_node_results"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    execution_id = Column(Integer, ForeignKey("execution_logs.id"), nullable=False)
+    node_id = Column(String(200), nullable=False)
+    item_index = Column(Integer, nullable=True)  # Set on the per-item rows of map nodes
+    task = Column(String(200), nullable=True)
+    integration_id = Column(Integer, nullable=True)
+    attempt = Column(Integer, nullable=False, default=1)
+    status = Column(String(20), nullable=False)  # success, failed, timed_out, cancelled
+    success = Column(Boolean, nullable=False, default=False)
+    message = Column(Text, nullable=True)
+    error_kind = Column(String(50), nullable=True)
+    data = Column(Text, nullable=True)  # JSON string, truncated to NODE_RESULT_MAX_DATA_BYTES
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    execution_time_seconds = Column(Float, nullable=True)
+    rate_limit_wait_seconds = Column(Float, nullable=True)
+    cache_hit = Column(Boolean, nullable=True)  # Set for cacheable tasks
+    reused_from_execution_id = Column(Integer, nullable=True)  # Copied by a resume from this execution
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_execution_node_results_execution_node", "execution_id", "node_id"),
+    )
+    
+    # Relationships
+    execution_log = relationship("ExecutionLog", back_populates="node_results")
+
+class ExecutionJob(Base):
+    __tablename__ = "execution_queue"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    execution_id = Column(Integer, ForeignKey("execution_logs.id"), nullable=False, unique=True)
+    workflow_id = Column(Integer, nullable=False, index=True)
+    status = Column(String(20), nullable=False, default="queued", index=True)  # queued, claimed, done, failed
+    priority = Column(Integer, nullable=False, default=1)  # Index into fair_share.PRIORITY_CLASSES, 0 is most urgent
+    attempts = Column(Integer, nullable=False, default=0)
+    worker_id = Column(String(200), nullable=True)
+    available_at = Column(DateTime, default=datetime.utcnow)
+    lease_expires_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_execution_queue_status_workflow_priority", "status", "workflow_id", "priority"),
+    )
+    
+    # Relationships
+    execution_log = relationship("ExecutionLog", back_populates="queue_job")
+
+class ExecutionIdempotencyKey(Base):
+    __tablename__ = "execution_idempotency_keys"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    workflow_id = Column(Integer, ForeignKey("workflows.id"), nullable=False)
+    key = Column(String(255), nullable=False)
+    execution_id = Column(Integer, ForeignKey("execution_logs.id"), nullable=True)  # None while the first request creates it
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        UniqueConstraint("workflow_id", "key", name="ux_execution_idempotency_keys_workflow_key"),
+    )
+    
+    # Relationships
+    workflow = relationship("Workflow", back_populates="idempotency_keys")
+
+class ExecutionSlot(Base):
+    __tablename__ = "execution_slots"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    workflow_id = Column(Integer, ForeignKey("workflows.id"), nullable=False)
+    slot = Column(Integer, nullable=False)  # 0 .. max_concurrent_executions - 1
+    execution_id = Column(Integer, ForeignKey("execution_logs.id"), nullable=False, unique=True)
+    acquired_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        UniqueConstraint("workflow_id", "slot", name="ux_execution_slots_workflow_slot"),
+    )
+    
     # Relationships
-    workflow = relationship("Workflow", back_populates="execution_logs")
\ No newline at end of file
+    workflow = relationship("Workflow", back_populates="execution_slots")
+
+class WorkflowSchedule(Base):
+    __tablename__ = "workflow_schedules"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    workflow_id = Column(Integer, ForeignKey("workflows.id"), nullable=False, index=True)
+    name = Column(String(200), nullable=True)
+    cron_expression = Column(String(100), nullable=False)
+    timezone = Column(String(64), nullable=False, default="UTC")  # IANA name, e.g. Europe/Berlin
+    runtime_params = Column(Text, nullable=True)  # JSON string passed to every run
+    priority = Column(String(20), nullable=True)  # Priority class of fired runs, "scheduled" if not set
+    misfire_policy = Column(String(20), nullable=False, default="run_once")  # skip, run_once, catch_up
+    max_catch_up = Column(Integer, nullable=False, default=1)  # Most missed runs started by catch_up
+    is_active = Column(Boolean, default=True)
+    next_fire_at = Column(DateTime, nullable=True, index=True)  # UTC
+    last_fired_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationships
+    workflow = relationship("Workflow", back_populates="schedules")
+
+class SchedulerLease(Base):
+    __tablename__ = "scheduler_leases"
+    
+    name = Column(String(100), primary_key=True)
+    holder = Column(String(200), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
\ No newline at end of file
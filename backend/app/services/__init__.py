@@ -1,4 +1,22 @@
 from .integration_service import IntegrationService
-from .workflow_service import WorkflowService
+from .workflow_service import WorkflowService, ExecutionStateError
+from .execution_queue import ExecutionQueue
+from .admission import AdmissionControl, WorkflowBusyError
+from .background import background_runner, BackgroundRunner, dispatch_execution
+from .schedule_service import ScheduleService
+from .scheduler import workflow_scheduler, WorkflowScheduler
 
-__all__ = ["IntegrationService", "WorkflowService"]
+__all__ = [
+    "IntegrationService",
+    "WorkflowService",
+    "ExecutionStateError",
+    "ExecutionQueue",
+    "AdmissionControl",
+    "WorkflowBusyError",
+    "background_runner",
+    "BackgroundRunner",
+    "dispatch_execution",
+    "ScheduleService",
+    "workflow_scheduler",
+    "WorkflowScheduler"
+]
\ No newline at end of file
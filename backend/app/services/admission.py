@@ -0,0 +1,285 @@
+"""
+Per-workflow admission control
+
+A workflow can limit how many of its executions run at the same time and how
+many may wait for a free slot:
+
+    "settings": {
+        "max_concurrent_executions": 2,
+        "max_queue_depth": 50,
+        "overflow_policy": "queue"      # or "reject", "drop_oldest"
+    }
+
+When a trigger finds the workflow full, the overflow policy decides: "queue"
+lets it wait until max_queue_depth executions are waiting and rejects it
+after that, "reject" never lets it wait, and "drop_oldest" cancels the
+oldest waiting execution to make room. Rejections raise WorkflowBusyError,
+answered with HTTP 429.
+
+Running executions of a limited workflow hold a row in execution_slots. The
+unique index on (workflow_id, slot) enforces the limit across API processes
+and queue workers. A slot whose execution is no longer running is stale and
+is taken over. Admission locks the workflow's row until the new execution
+is committed, so concurrent triggers cannot overfill the queue.
+"""
+
+import math
+import os
+import threading
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+from sqlalchemy import update, func, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models import Workflow, ExecutionLog, ExecutionSlot
+from app.services.execution_plan import plan_cache
+from app.services.execution_events import event_bus
+
+OVERFLOW_POLICIES = ("queue", "reject", "drop_oldest")
+
+# Seconds between slot checks of executions waiting in a workflow's queue
+ADMISSION_POLL_SECONDS = float(os.getenv("ADMISSION_POLL_SECONDS", "0.5"))
+
+
+class WorkflowBusyError(ValueError):
+    """The workflow is at its concurrency and queue limits"""
+
+    def __init__(self, message: str, occupancy: Dict[str, Any]):
+        super().__init__(message)
+        self.occupancy = occupancy
+
+
+class AdmissionLimits:
+    """Concurrency settings of one workflow"""
+
+    def __init__(self, max_concurrent: int, max_queue_depth: Optional[int] = None, overflow_policy: str = "queue"):
+        self.max_concurrent = max_concurrent
+        self.max_queue_depth = max_queue_depth
+        self.overflow_policy = overflow_policy
+
+    @property
+    def queue_capacity(self) -> float:
+        """Executions allowed to wait for a slot"""
+        if self.overflow_policy == "reject":
+            return 0
+        return math.inf if self.max_queue_depth is None else self.max_queue_depth
+
+    @staticmethod
+    def from_settings(settings: Optional[Dict[str, Any]]) -> Optional["AdmissionLimits"]:
+        """Limits of a workflow, or None if it does not limit concurrency"""
+        settings = settings or {}
+        if settings.get("max_concurrent_executions") is None:
+            return None
+        return AdmissionLimits(
+            int(settings["max_concurrent_executions"]),
+            settings.get("max_queue_depth"),
+            settings.get("overflow_policy") or "queue"
+        )
+
+
+def validate_settings(settings: Dict[str, Any]) -> List[str]:
+    """Problems with the admission settings of a workflow"""
+    errors = []
+    for name, minimum in (("max_concurrent_executions", 1), ("max_queue_depth", 0)):
+        value = settings.get(name)
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value < minimum):
+            errors.append(f"settings.{name} must be an integer of at least {minimum}")
+    if settings.get("overflow_policy", "queue") not in OVERFLOW_POLICIES:
+        errors.append(f"settings.overflow_policy must be one of {', '.join(OVERFLOW_POLICIES)}")
+    return errors
+
+
+class AdmissionControl:
+    """Enforce the concurrency limits of workflows"""
+
+    # Notified whenever this process releases a slot
+    _released = threading.Condition()
+
+    @staticmethod
+    def limits(workflow: Optional[Workflow]) -> Optional[AdmissionLimits]:
+        if workflow is None:
+            return None
+        return AdmissionLimits.from_settings(plan_cache.get(workflow).settings)
+
+    @staticmethod
+    def limits_for(db: Session, workflow_id: int) -> Optional[AdmissionLimits]:
+        workflow = db.query(Workflow).filter(Workflow.id == workflow_id).first()
+        return AdmissionControl.limits(workflow)
+
+    @staticmethod
+    def occupancy(db: Session, workflow_id: int, limits: Optional[AdmissionLimits] = None) -> Dict[str, Any]:
+        """Running and waiting executions of a workflow, with its limits"""
+        counts = dict(
+            db.query(ExecutionLog.status, func.count(ExecutionLog.id))
+            .filter(ExecutionLog.workflow_id == workflow_id, ExecutionLog.status.in_(("pending", "running")))
+            .group_by(ExecutionLog.status)
+            .all()
+        )
+        return {
+            "workflow_id": workflow_id,
+            "running": counts.get("running", 0),
+            "queued": counts.get("pending", 0),
+            "max_concurrent_executions": limits.max_concurrent if limits else None,
+            "max_queue_depth": limits.max_queue_depth if limits else None,
+            "overflow_policy": limits.overflow_policy if limits else None
+        }
+
+    @staticmethod
+    def admit(db: Session, workflow: Workflow) -> Optional[AdmissionLimits]:
+        """
+        Decide whether a new execution of workflow may be created
+
+        Returns the workflow's limits (None if it has none). When it
+        returns limits, the workflow's row stays locked until the caller
+        commits the new execution. Raises WorkflowBusyError when the
+        overflow policy turns the trigger away.
+        """
+        limits = AdmissionControl.limits(workflow)
+        if limits is None:
+            return None
+
+        while True:
+            AdmissionControl._lock_workflow(db, workflow.id)
+            occupancy = AdmissionControl.occupancy(db, workflow.id, limits)
+            if occupancy["running"] + occupancy["queued"] < limits.max_concurrent + limits.queue_capacity:
+                return limits
+            # _drop_oldest commits, which releases the lock; count again under a new one
+            if limits.overflow_policy != "drop_oldest" or not AdmissionControl._drop_oldest(db, workflow.id):
+                break
+
+        db.rollback()
+        raise WorkflowBusyError(
+            f"Workflow {workflow.id} is at its limit of {limits.max_concurrent} running and "
+            f"{limits.max_queue_depth or 0} queued executions",
+            occupancy
+        )
+
+    @staticmethod
+    def _lock_workflow(db: Session, workflow_id: int):
+        """Lock a workflow's row until the current transaction ends"""
+        if db.get_bind().dialect.name == "sqlite":
+            # No row locks; a write takes the database's write lock instead.
+            # Plain SQL, so updated_at (and the cached plan) stay as they are
+            db.execute(text("UPDATE workflows SET id = id WHERE id = :id"), {"id": workflow_id})
+        else:
+            db.query(Workflow.id).filter(Workflow.id == workflow_id).with_for_update().first()
+
+    @staticmethod
+    def _drop_oldest(db: Session, workflow_id: int) -> bool:
+        """Cancel the oldest execution waiting for a slot; False if none is waiting"""
+        while True:
+            oldest = (
+                db.query(ExecutionLog.id)
+                .filter(ExecutionLog.workflow_id == workflow_id, ExecutionLog.status == "pending")
+                .order_by(ExecutionLog.id)
+                .first()
+            )
+            if oldest is None:
+                return False
+
+            completed_at = datetime.utcnow()
+            message = "Dropped from the queue to make room for a newer trigger (overflow_policy drop_oldest)"
+            result = db.execute(
+                update(ExecutionLog)
+                .where(ExecutionLog.id == oldest.id, ExecutionLog.status == "pending")
+                .values(status="cancelled", error_message=message, completed_at=completed_at)
+            )
+            db.commit()
+            if result.rowcount == 1:
+                event_bus.publish(oldest.id, "execution.finished", {
+                    "execution_id": oldest.id,
+                    "workflow_id": workflow_id,
+                    "status": "cancelled",
+                    "error_message": message,
+                    "completed_at": completed_at.isoformat()
+                }, final=True)
+                return True
+
+    @staticmethod
+    def try_start(db: Session, execution_log: ExecutionLog) -> bool:
+        """
+        Take a free slot and mark a pending execution as running
+
+        Always True for workflows without limits. False if every slot is
+        taken, or if the execution is no longer pending (for example dropped
+        from the queue); callers tell the two apart by its status.
+        """
+        limits = AdmissionControl.limits_for(db, execution_log.workflow_id)
+        if limits is None:
+            return True
+
+        execution_id = execution_log.id
+        workflow_id = execution_log.workflow_id
+        for reaped in (False, True):
+            taken = {
+                slot for (slot,) in
+                db.query(ExecutionSlot.slot).filter(ExecutionSlot.workflow_id == workflow_id).all()
+            }
+            for slot in range(limits.max_concurrent):
+                if slot in taken:
+                    continue
+                try:
+                    # A slot left from an earlier attempt of this execution is stale
+                    db.query(ExecutionSlot).filter(ExecutionSlot.execution_id == execution_id).delete(synchronize_session=False)
+                    db.add(ExecutionSlot(workflow_id=workflow_id, slot=slot, execution_id=execution_id, acquired_at=datetime.utcnow()))
+                    started = db.execute(
+                        update(ExecutionLog)
+                        .where(ExecutionLog.id == execution_id, ExecutionLog.status == "pending")
+                        .values(status="running", started_at=datetime.utcnow())
+                    ).rowcount
+                    if not started:
+                        db.rollback()
+                        return False
+                    db.commit()
+                    return True
+                except IntegrityError:
+                    # Another execution took this slot first
+                    db.rollback()
+
+            if reaped or not AdmissionControl._reap_stale(db, workflow_id):
+                break
+        # End the read transaction, so the next attempt sees slots freed meanwhile
+        # (REPEATABLE READ would keep showing this snapshot)
+        db.rollback()
+        return False
+
+    @staticmethod
+    def _reap_stale(db: Session, workflow_id: int) -> int:
+        """Free slots whose execution is no longer running; returns how many"""
+        stale = [
+            slot_id for (slot_id,) in
+            db.query(ExecutionSlot.id)
+            .join(ExecutionLog, ExecutionLog.id == ExecutionSlot.execution_id)
+            .filter(ExecutionSlot.workflow_id == workflow_id, ExecutionLog.status != "running")
+            .all()
+        ]
+        if stale:
+            db.query(ExecutionSlot).filter(ExecutionSlot.id.in_(stale)).delete(synchronize_session=False)
+            db.commit()
+        return len(stale)
+
+    @staticmethod
+    def wait_for_slot(db: Session, execution_log: ExecutionLog) -> bool:
+        """Block until the execution holds a slot; False if it stopped being pending"""
+        while not AdmissionControl.try_start(db, execution_log):
+            # Dropped from the queue or cancelled by another process meanwhile?
+            db.refresh(execution_log)
+            if execution_log.status != "pending":
+                return False
+            db.rollback()
+            AdmissionControl.wait_for_release(ADMISSION_POLL_SECONDS)
+        return True
+
+    @staticmethod
+    def release(db: Session, execution_id: int):
+        """Give up the slot of a finished execution and wake waiters in this process"""
+        db.query(ExecutionSlot).filter(ExecutionSlot.execution_id == execution_id).delete(synchronize_session=False)
+        db.commit()
+        with AdmissionControl._released:
+            AdmissionControl._released.notify_all()
+
+    @staticmethod
+    def wait_for_release(timeout: float):
+        """Sleep until a slot is released in this process or timeout passes"""
+        with AdmissionControl._released:
+            AdmissionControl._released.wait(timeout)
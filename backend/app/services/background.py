@@ -0,0 +1,169 @@
+"""
+Background execution of workflow runs
+
+Used by the asynchronous trigger mode: the API stores a pending ExecutionLog,
+answers immediately and the run happens either here, on a thread pool inside
+the API process (EXECUTION_BACKEND=thread, the default), or in standalone
+workers reading the durable queue (EXECUTION_BACKEND=queue, see app.worker).
+
+Pending executions are taken by the pool threads by priority class and
+weighted fair share across workflows (see fair_share), not in arrival order.
+Executions of workflows with concurrency limits that find every slot taken
+wait in a per-workflow line here without holding a pool thread, and are
+started by priority, then age, as slots are released.
+"""
+
+import os
+import heapq
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, Dict, List, Tuple
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models import ExecutionLog
+from app.services.workflow_service import WorkflowService
+from app.services.execution_queue import ExecutionQueue
+from app.services.admission import AdmissionControl, ADMISSION_POLL_SECONDS
+from app.services.fair_share import FairShareQueue, priority_rank
+
+# Where pending executions run: "thread" (in-process) or "queue" (app.worker)
+EXECUTION_BACKEND = os.getenv("EXECUTION_BACKEND", "thread").lower()
+
+# Number of workflow runs executed concurrently in the background
+EXECUTION_THREADS = int(os.getenv("WORKFLOW_EXECUTION_THREADS", "8"))
+
+
+class BackgroundRunner:
+    """Run pending executions on a bounded thread pool outside the request cycle"""
+
+    def __init__(self, max_workers: int = EXECUTION_THREADS):
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        # Pending runs as (execution_id, rank, weight, admitted), taken by fair share
+        self._queue = FairShareQueue()
+        # Executions waiting for a slot, per workflow, as heaps of (rank, execution_id, weight)
+        self._waiting: Dict[int, List[Tuple[int, int, float]]] = {}
+        self._admitter: Optional[threading.Thread] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="workflow-run"
+                )
+            return self._executor
+
+    def submit(self, execution_id: int, workflow_id: int = 0, priority: str = "api", weight: float = 1.0) -> Future:
+        """
+        Schedule a pending execution to run in the background
+
+        The returned future belongs to the pool task that runs the next
+        execution by fair share, which is not necessarily this one.
+        """
+        return self._dispatch((execution_id, priority_rank(priority), weight, False), workflow_id)
+
+    def _dispatch(self, item: Tuple[int, int, float, bool], workflow_id: int) -> Future:
+        self._queue.push(item, workflow_id, item[1], item[2])
+        return self._get_executor().submit(self._run_next)
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting runs, optionally waiting for in-flight ones"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            # Waiting executions stay pending in the database
+            self._waiting.clear()
+        if executor:
+            executor.shutdown(wait=wait)
+
+    def _run_next(self):
+        item = self._queue.pop()
+        if item is not None:
+            self._run(*item)
+
+    def _run(self, execution_id: int, rank: int = 1, weight: float = 1.0, admitted: bool = False):
+        db = SessionLocal()
+        try:
+            execution_log = WorkflowService.get_execution(db, execution_id)
+            if not execution_log:
+                return
+            if not admitted:
+                if execution_log.status != "pending" or not self._admit(db, execution_log, rank, weight):
+                    return
+            WorkflowService.run_execution(db, execution_log)
+        except Exception as e:
+            print(f"Background execution {execution_id} failed: {e}")
+        finally:
+            db.close()
+
+    def _admit(self, db: Session, execution_log: ExecutionLog, rank: int, weight: float) -> bool:
+        """Take a slot for the execution, or put it in its workflow's line"""
+        with self._lock:
+            line_exists = execution_log.workflow_id in self._waiting
+        if not line_exists and AdmissionControl.try_start(db, execution_log):
+            return True
+        if execution_log.status == "pending":
+            with self._lock:
+                heapq.heappush(self._waiting.setdefault(execution_log.workflow_id, []), (rank, execution_log.id, weight))
+                if self._admitter is None:
+                    self._admitter = threading.Thread(target=self._admit_waiting, name="workflow-admission", daemon=True)
+                    self._admitter.start()
+        return False
+
+    def _admit_waiting(self):
+        """Start waiting executions as slots free up, until none are left"""
+        while True:
+            with self._lock:
+                if not self._waiting:
+                    self._admitter = None
+                    return
+                lines = list(self._waiting.items())
+
+            db = SessionLocal()
+            try:
+                for workflow_id, line in lines:
+                    while True:
+                        with self._lock:
+                            if not line:
+                                break
+                            rank, execution_id, weight = line[0]
+                        execution_log = WorkflowService.get_execution(db, execution_id)
+                        started = False
+                        if execution_log and execution_log.status == "pending":
+                            if not AdmissionControl.try_start(db, execution_log):
+                                break
+                            started = True
+                        # Started, or no longer waiting (e.g. dropped from the queue)
+                        with self._lock:
+                            line.remove((rank, execution_id, weight))
+                            heapq.heapify(line)
+                        if started:
+                            self._dispatch((execution_id, rank, weight, True), workflow_id)
+                    with self._lock:
+                        if not line and self._waiting.get(workflow_id) is line:
+                            del self._waiting[workflow_id]
+            except Exception as e:
+                print(f"Background admission failed: {e}")
+            finally:
+                db.close()
+
+            AdmissionControl.wait_for_release(ADMISSION_POLL_SECONDS)
+
+
+# Global instance
+background_runner = BackgroundRunner()
+
+
+def dispatch_execution(db: Session, execution_log: ExecutionLog):
+    """Hand a pending execution to the configured execution backend"""
+    priority = WorkflowService.execution_priority(execution_log)
+    if EXECUTION_BACKEND == "queue":
+        ExecutionQueue.enqueue(db, execution_log, priority_rank(priority))
+    else:
+        background_runner.submit(
+            execution_log.id,
+            execution_log.workflow_id,
+            priority,
+            WorkflowService.execution_weight(execution_log)
+        )
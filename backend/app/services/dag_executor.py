@@ -0,0 +1,206 @@
+"""
+DAG scheduler for workflow execution
+
+Starts every node as soon as all of its predecessors have succeeded and runs
+independent branches concurrently on a shared, bounded worker pool.
+
+Nodes may set timeout_seconds and the workflow may set
+settings.deadline_seconds. When either is overrun the node is recorded as
+timed_out, nodes still in flight are recorded as cancelled, nothing else is
+started and run() returns immediately. Abandoned worker threads finish on
+their own; the HTTP layer cuts their remaining calls short.
+"""
+
+import heapq
+import os
+import threading
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import List, Dict, Any, Optional, Callable, Set
+from app.services.execution_plan import ExecutionPlan
+
+# Size of the process-wide pool shared by all running workflows
+WORKER_THREADS = int(os.getenv("WORKFLOW_WORKER_THREADS", "32"))
+
+# Default number of nodes a single workflow may run at the same time
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("WORKFLOW_MAX_CONCURRENCY", "8"))
+
+_node_executor: Optional[ThreadPoolExecutor] = None
+_node_executor_lock = threading.Lock()
+
+
+def get_node_executor() -> ThreadPoolExecutor:
+    """Get the shared worker pool used to run workflow nodes"""
+    global _node_executor
+    if _node_executor is None:
+        with _node_executor_lock:
+            if _node_executor is None:
+                _node_executor = ThreadPoolExecutor(
+                    max_workers=WORKER_THREADS,
+                    thread_name_prefix="workflow-node"
+                )
+    return _node_executor
+
+
+class DagExecutor:
+    """
+    Run workflow nodes in dependency order with bounded parallelism
+
+    The scheduler itself runs on the calling thread, which is the only thread
+    allowed to touch the database session. ``start_node`` is called there for
+    every node that becomes ready and must return a callable; only that
+    callable is sent to the worker pool. It is called with the node's
+    deadline (a time.monotonic() value, or None) and returns the detailed
+    node result.
+    """
+
+    def __init__(
+        self,
+        plan: ExecutionPlan,
+        max_concurrency: Optional[int] = None,
+        deadline_seconds: Optional[float] = None
+    ):
+        self.plan = plan
+        self.max_concurrency = max(1, int(max_concurrency or DEFAULT_MAX_CONCURRENCY))
+        self.deadline_seconds = float(deadline_seconds) if deadline_seconds else None
+        # Set when the run was cut short by a timeout rather than a failure
+        self.error_message: Optional[str] = None
+
+    def run(
+        self,
+        start_node: Callable[[Dict[str, Any]], Callable[[Optional[float]], Dict[str, Any]]],
+        interrupted_result: Callable[[Dict[str, Any], str, str, datetime], Dict[str, Any]],
+        on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+        completed: Optional[Set[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Execute the graph and return node results in execution order
+
+        Once a node fails no new nodes are started; nodes that are already
+        running are allowed to finish and are included in the results.
+        interrupted_result(node, status, message, started_at) builds the
+        result recorded for nodes that timed out or were cancelled.
+        on_result, if given, is called on this thread with every result as
+        soon as it is known, so it may use the database session.
+        Nodes in ``completed`` already succeeded in an earlier run: they are
+        not started and count as satisfied dependencies of their successors.
+        """
+        plan = self.plan
+        executor = get_node_executor()
+        workflow_deadline = time.monotonic() + self.deadline_seconds if self.deadline_seconds else None
+        deadlines: Dict[Future, Optional[float]] = {}
+        started_at: Dict[Future, datetime] = {}
+        completed = completed or set()
+        waiting = {
+            node_id: len(plan.predecessors[node_id] - completed)
+            for node_id in plan.order
+        }
+        # Ready nodes are started in plan order
+        ready = [
+            plan.position[node_id] for node_id in plan.order
+            if waiting[node_id] == 0 and node_id not in completed
+        ]
+        heapq.heapify(ready)
+        running: Dict[Future, str] = {}
+        results: Dict[str, Dict[str, Any]] = {}
+        failed = False
+
+        while ready or running:
+            if workflow_deadline is not None and time.monotonic() >= workflow_deadline and not failed:
+                failed = True
+                self.error_message = f"Workflow deadline of {self.deadline_seconds:g}s exceeded"
+
+            if not failed:
+                while ready and len(running) < self.max_concurrency:
+                    node_id = plan.order[heapq.heappop(ready)]
+                    node = plan.nodes_by_id[node_id]
+                    deadline = self._node_deadline(node, workflow_deadline)
+                    task = start_node(node)
+                    future = executor.submit(task, deadline)
+                    running[future] = node_id
+                    deadlines[future] = deadline
+                    started_at[future] = datetime.utcnow()
+
+            if not running:
+                break
+
+            pending_deadlines = [d for d in (deadlines[f] for f in running) if d is not None]
+            timeout = max(0.0, min(pending_deadlines) - time.monotonic()) if pending_deadlines else None
+            done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                interrupted = self._interrupt(running, deadlines, started_at, workflow_deadline, interrupted_result)
+                if interrupted:
+                    for node_id, result in interrupted:
+                        results[node_id] = result
+                        if on_result:
+                            on_result(result)
+                    failed = True
+                    break
+                continue
+
+            for future in done:
+                node_id = running.pop(future)
+                deadlines.pop(future, None)
+                result = future.result()
+                results[node_id] = result
+                if on_result:
+                    on_result(result)
+
+                if not result.get("success", False):
+                    failed = True
+                    continue
+
+                for successor in plan.successors[node_id]:
+                    waiting[successor] -= 1
+                    if waiting[successor] == 0:
+                        heapq.heappush(ready, plan.position[successor])
+
+        return [results[node_id] for node_id in plan.order if node_id in results]
+
+    def _node_deadline(self, node: Dict[str, Any], workflow_deadline: Optional[float]) -> Optional[float]:
+        """Earliest of the node's own timeout and the workflow deadline"""
+        deadline = workflow_deadline
+        timeout_seconds = node.get("timeout_seconds")
+        if timeout_seconds:
+            node_deadline = time.monotonic() + float(timeout_seconds)
+            deadline = node_deadline if deadline is None else min(deadline, node_deadline)
+        return deadline
+
+    def _interrupt(self, running, deadlines, started_at, workflow_deadline, interrupted_result):
+        """
+        Mark overrunning nodes as timed_out and the rest in flight as cancelled
+
+        Returns (node_id, result) pairs, empty if no deadline has actually
+        passed yet.
+        """
+        now = time.monotonic()
+        workflow_expired = workflow_deadline is not None and now >= workflow_deadline
+        expired = [f for f in running if deadlines[f] is not None and deadlines[f] <= now]
+        if not expired:
+            return []
+
+        interrupted = []
+        for future in expired:
+            node_id = running.pop(future)
+            node = self.plan.nodes_by_id[node_id]
+            if workflow_expired:
+                message = f"Workflow deadline of {self.deadline_seconds:g}s exceeded"
+            else:
+                message = f"Node timed out after {float(node['timeout_seconds']):g}s"
+            interrupted.append((node_id, interrupted_result(node, "timed_out", message, started_at[future])))
+
+        for future in list(running):
+            node_id = running.pop(future)
+            interrupted.append((node_id, interrupted_result(
+                self.plan.nodes_by_id[node_id],
+                "cancelled",
+                "Cancelled because another node timed out",
+                started_at[future]
+            )))
+            future.cancel()
+
+        if workflow_expired:
+            self.error_message = f"Workflow deadline of {self.deadline_seconds:g}s exceeded"
+        return interrupted
@@ -0,0 +1,126 @@
+"""
+In-process pub/sub of execution progress events
+
+run_execution publishes execution.started, node.started, node.finished,
+node.failed and execution.finished events here as they happen; the SSE
+endpoint GET /api/executions/{id}/events streams them to clients.
+
+Every execution keeps a bounded buffer of its events with increasing ids, so
+a client that reconnects with Last-Event-ID gets what it missed. Buffers of
+finished executions are dropped EXECUTION_EVENTS_RETENTION seconds later.
+Subscribers are asyncio events woken from the publishing thread, so an idle
+stream holds no thread.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from typing import List, Dict, Any, Optional, Tuple
+
+# Events kept per execution for Last-Event-ID replay
+EXECUTION_EVENTS_BUFFER = int(os.getenv("EXECUTION_EVENTS_BUFFER", "1000"))
+
+# Seconds the events of a finished execution stay available
+EXECUTION_EVENTS_RETENTION = float(os.getenv("EXECUTION_EVENTS_RETENTION", "300"))
+
+
+class ExecutionEvent:
+    """One progress event of an execution"""
+
+    __slots__ = ("id", "type", "data")
+
+    def __init__(self, event_id: int, event_type: str, data: Dict[str, Any]):
+        self.id = event_id
+        self.type = event_type
+        self.data = data
+
+
+class _Channel:
+    """Event buffer and subscribers of one execution"""
+
+    def __init__(self, maxlen: int):
+        self.events: "deque[ExecutionEvent]" = deque(maxlen=maxlen)
+        self.next_id = 1
+        self.finished_at: Optional[float] = None
+        self.subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+
+
+class ExecutionEventBus:
+    """Fan out execution events from run threads to streaming clients"""
+
+    def __init__(self, buffer_size: int = EXECUTION_EVENTS_BUFFER, retention_seconds: float = EXECUTION_EVENTS_RETENTION):
+        self.buffer_size = buffer_size
+        self.retention_seconds = retention_seconds
+        self._channels: Dict[int, _Channel] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, execution_id: int, event_type: str, data: Dict[str, Any], final: bool = False) -> int:
+        """Record an event and wake the subscribers; returns the event id"""
+        with self._lock:
+            self._purge()
+            channel = self._channels.get(execution_id)
+            if channel is None:
+                channel = self._channels[execution_id] = _Channel(self.buffer_size)
+            event = ExecutionEvent(channel.next_id, event_type, data)
+            channel.next_id += 1
+            channel.events.append(event)
+            if final:
+                channel.finished_at = time.monotonic()
+            subscribers = list(channel.subscribers)
+
+        for loop, waiter in subscribers:
+            try:
+                loop.call_soon_threadsafe(waiter.set)
+            except RuntimeError:
+                # The subscriber's event loop is closed
+                pass
+        return event.id
+
+    def known(self, execution_id: int) -> bool:
+        """Whether the execution has published events in this process"""
+        with self._lock:
+            channel = self._channels.get(execution_id)
+            return channel is not None and channel.next_id > 1
+
+    def events_after(self, execution_id: int, last_id: int = 0) -> Tuple[List[ExecutionEvent], bool]:
+        """Buffered events with an id above last_id, and whether the execution finished"""
+        with self._lock:
+            channel = self._channels.get(execution_id)
+            if channel is None:
+                return [], False
+            return [e for e in channel.events if e.id > last_id], channel.finished_at is not None
+
+    def subscribe(self, execution_id: int) -> asyncio.Event:
+        """Register an asyncio event, set whenever the execution publishes"""
+        waiter = asyncio.Event()
+        with self._lock:
+            channel = self._channels.get(execution_id)
+            if channel is None:
+                channel = self._channels[execution_id] = _Channel(self.buffer_size)
+            channel.subscribers.append((asyncio.get_running_loop(), waiter))
+        return waiter
+
+    def unsubscribe(self, execution_id: int, waiter: asyncio.Event):
+        with self._lock:
+            channel = self._channels.get(execution_id)
+            if channel is not None:
+                channel.subscribers = [(loop, w) for loop, w in channel.subscribers if w is not waiter]
+                if not channel.subscribers and channel.next_id == 1:
+                    # Only existed for this subscriber
+                    del self._channels[execution_id]
+
+    def _purge(self):
+        """Drop channels of executions that finished longer ago than the retention"""
+        cutoff = time.monotonic() - self.retention_seconds
+        expired = [
+            execution_id for execution_id, channel in self._channels.items()
+            if channel.finished_at is not None and channel.finished_at < cutoff and not channel.subscribers
+        ]
+        for execution_id in expired:
+            del self._channels[execution_id]
+
+
+# Global instance
+event_bus = ExecutionEventBus()
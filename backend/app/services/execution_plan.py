@@ -0,0 +1,121 @@
+"""
+Compiled workflow execution plans
+
+Parsing workflow_data and sorting the graph happens once per workflow
+version; executions reuse the cached plan until the workflow changes.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+# Number of compiled plans kept in memory
+PLAN_CACHE_SIZE = int(os.getenv("WORKFLOW_PLAN_CACHE_SIZE", "256"))
+
+
+class ExecutionPlan:
+    """Parsed, indexed and topologically sorted form of a workflow definition"""
+
+    def __init__(self, workflow_data: Dict[str, Any]):
+        self.workflow_data = workflow_data
+        self.settings: Dict[str, Any] = workflow_data.get("settings", {}) or {}
+        self.nodes: List[Dict[str, Any]] = workflow_data.get("nodes", [])
+        self.connections: List[Dict[str, Any]] = workflow_data.get("connections", [])
+
+        # Nodes indexed by id; the first definition wins for duplicate ids
+        self.nodes_by_id: Dict[str, Dict[str, Any]] = {}
+        for node in self.nodes:
+            self.nodes_by_id.setdefault(node["id"], node)
+
+        # Adjacency lists, ignoring connections to unknown nodes and duplicates
+        self.successors: Dict[str, List[str]] = {node_id: [] for node_id in self.nodes_by_id}
+        self.predecessors: Dict[str, Set[str]] = {node_id: set() for node_id in self.nodes_by_id}
+        for conn in self.connections:
+            from_node = conn.get("from")
+            to_node = conn.get("to")
+            if from_node not in self.nodes_by_id or to_node not in self.nodes_by_id:
+                continue
+            if from_node in self.predecessors[to_node]:
+                continue
+            self.successors[from_node].append(to_node)
+            self.predecessors[to_node].add(from_node)
+
+        self.order, self.cycle_nodes = self._topological_sort()
+        self.position: Dict[str, int] = {node_id: index for index, node_id in enumerate(self.order)}
+
+    def _topological_sort(self) -> Tuple[List[str], List[str]]:
+        """Kahn's algorithm; returns the order and any nodes left in a cycle"""
+        in_degree = {node_id: len(preds) for node_id, preds in self.predecessors.items()}
+        queue = deque(node_id for node_id in self.nodes_by_id if in_degree[node_id] == 0)
+        order = []
+
+        while queue:
+            node_id = queue.popleft()
+            order.append(node_id)
+            for neighbor in self.successors[node_id]:
+                in_degree[neighbor] -= 1
+                if in_degree[neighbor] == 0:
+                    queue.append(neighbor)
+
+        ordered = set(order)
+        cycle_nodes = [node_id for node_id in self.nodes_by_id if node_id not in ordered]
+        return order, cycle_nodes
+
+    @property
+    def has_cycle(self) -> bool:
+        return bool(self.cycle_nodes)
+
+    def validate(self):
+        """Raise ValueError if the plan cannot be executed"""
+        if self.has_cycle:
+            raise ValueError(f"Workflow contains a cycle between nodes: {', '.join(map(str, self.cycle_nodes))}")
+
+    @classmethod
+    def from_json(cls, workflow_data: str) -> "ExecutionPlan":
+        return cls(json.loads(workflow_data))
+
+
+class PlanCache:
+    """Thread-safe LRU of compiled plans keyed by (workflow_id, updated_at)"""
+
+    def __init__(self, maxsize: int = PLAN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._plans: "OrderedDict[Tuple[int, Optional[datetime]], ExecutionPlan]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, workflow) -> ExecutionPlan:
+        """Get the compiled plan for a Workflow row, compiling it on a miss"""
+        key = (workflow.id, workflow.updated_at)
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                return plan
+
+        plan = ExecutionPlan.from_json(workflow.workflow_data)
+
+        with self._lock:
+            # Drop plans compiled for older versions of the same workflow
+            for stale_key in [k for k in self._plans if k[0] == workflow.id]:
+                del self._plans[stale_key]
+            self._plans[key] = plan
+            while len(self._plans) > self.maxsize:
+                self._plans.popitem(last=False)
+        return plan
+
+    def invalidate(self, workflow_id: int):
+        """Forget every cached plan for a workflow"""
+        with self._lock:
+            for key in [k for k in self._plans if k[0] == workflow_id]:
+                del self._plans[key]
+
+    def clear(self):
+        with self._lock:
+            self._plans.clear()
+
+
+# Global instance
+plan_cache = PlanCache()
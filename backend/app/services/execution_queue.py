@@ -0,0 +1,277 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import update, func
+from typing import List, Optional, Collection
+from datetime import datetime, timedelta
+import os
+from app.models import Workflow, ExecutionJob, ExecutionLog
+from app.services.execution_plan import plan_cache
+from app.services.fair_share import PRIORITY_CLASSES, share_weight, workflow_weight
+
+# How long a claimed job stays owned by a worker without a heartbeat
+LEASE_SECONDS = int(os.getenv("EXECUTION_LEASE_SECONDS", "60"))
+
+# Number of times a job is handed out before it is given up on
+MAX_ATTEMPTS = int(os.getenv("EXECUTION_MAX_ATTEMPTS", "3"))
+
+# Dialects that support SELECT ... FOR UPDATE SKIP LOCKED
+SKIP_LOCKED_DIALECTS = {"mysql", "mariadb", "postgresql"}
+
+class ExecutionQueue:
+    """Durable execution queue shared by the API and standalone workers"""
+
+    @staticmethod
+    def enqueue(db: Session, execution_log: ExecutionLog, priority: int = 1) -> ExecutionJob:
+        """Queue a pending execution for the next free worker; priority is a fair_share rank"""
+        job = ExecutionJob(
+            execution_id=execution_log.id,
+            workflow_id=execution_log.workflow_id,
+            status="queued",
+            priority=priority,
+            available_at=datetime.utcnow()
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    @staticmethod
+    def claim(
+        db: Session,
+        worker_id: str,
+        lease_seconds: int = LEASE_SECONDS,
+        exclude_workflow_ids: Collection[int] = ()
+    ) -> Optional[ExecutionJob]:
+        """
+        Claim the next available job for a worker, by weighted fair share
+
+        MariaDB/MySQL lock the row with FOR UPDATE SKIP LOCKED so concurrent
+        workers never wait on each other. SQLite has no row locks, so the
+        claim there is a conditional UPDATE that only one writer can win.
+        Jobs of exclude_workflow_ids (workflows known to be at their
+        concurrency limit) are left for later.
+        """
+        now = datetime.utcnow()
+        lease_expires_at = now + timedelta(seconds=lease_seconds)
+        available = [ExecutionJob.status == "queued", ExecutionJob.available_at <= now]
+        if exclude_workflow_ids:
+            available.append(ExecutionJob.workflow_id.notin_(list(exclude_workflow_ids)))
+
+        candidates = ExecutionQueue._fair_share_candidates(db, available)
+        if not candidates:
+            db.rollback()
+            return None
+
+        if db.bind.dialect.name in SKIP_LOCKED_DIALECTS:
+            locked = {
+                job.id: job for job in
+                db.query(ExecutionJob)
+                .filter(ExecutionJob.id.in_(candidates), *available)
+                .with_for_update(skip_locked=True)
+                .all()
+            }
+            job = next((locked[job_id] for job_id in candidates if job_id in locked), None)
+            if not job:
+                db.rollback()
+                return None
+
+            job.status = "claimed"
+            job.worker_id = worker_id
+            job.attempts += 1
+            job.heartbeat_at = now
+            job.lease_expires_at = lease_expires_at
+            db.commit()
+            db.refresh(job)
+            return job
+
+        for job_id in candidates:
+            result = db.execute(
+                update(ExecutionJob)
+                .where(ExecutionJob.id == job_id, ExecutionJob.status == "queued")
+                .values(
+                    status="claimed",
+                    worker_id=worker_id,
+                    attempts=ExecutionJob.attempts + 1,
+                    heartbeat_at=now,
+                    lease_expires_at=lease_expires_at,
+                    updated_at=now
+                )
+            )
+            db.commit()
+            if result.rowcount == 1:
+                return db.query(ExecutionJob).filter(ExecutionJob.id == job_id).first()
+
+        return None
+
+    @staticmethod
+    def _fair_share_candidates(db: Session, available: list, limit: int = 10) -> List[int]:
+        """
+        Ids of the oldest available job of each (workflow, priority), best first
+
+        A candidate's score is the number of its workflow's jobs already
+        claimed, plus one, divided by its share weight (class weight times
+        the workflow's fair_share_weight); the lowest score goes first.
+        """
+        heads = (
+            db.query(ExecutionJob.workflow_id, ExecutionJob.priority, func.min(ExecutionJob.id))
+            .filter(*available)
+            .group_by(ExecutionJob.workflow_id, ExecutionJob.priority)
+            .all()
+        )
+        if not heads:
+            return []
+
+        workflow_ids = {workflow_id for workflow_id, _, _ in heads}
+        running = dict(
+            db.query(ExecutionJob.workflow_id, func.count(ExecutionJob.id))
+            .filter(ExecutionJob.status == "claimed", ExecutionJob.workflow_id.in_(workflow_ids))
+            .group_by(ExecutionJob.workflow_id)
+            .all()
+        )
+        weights = {
+            workflow.id: workflow_weight(plan_cache.get(workflow).settings)
+            for workflow in db.query(Workflow).filter(Workflow.id.in_(workflow_ids)).all()
+        }
+
+        ranked = sorted(heads, key=lambda head: (
+            (running.get(head[0], 0) + 1) / share_weight(min(head[1], len(PRIORITY_CLASSES) - 1), weights.get(head[0])),
+            head[1],
+            head[2]
+        ))
+        return [job_id for _, _, job_id in ranked[:limit]]
+
+    @staticmethod
+    def heartbeat(db: Session, job_ids: List[int], worker_id: str, lease_seconds: int = LEASE_SECONDS) -> List[int]:
+        """
+        Renew the lease on jobs held by a worker
+
+        Returns the ids whose lease was renewed; anything missing was
+        reclaimed by the reaper and must not be completed by this worker.
+        """
+        if not job_ids:
+            return []
+
+        now = datetime.utcnow()
+        db.execute(
+            update(ExecutionJob)
+            .where(
+                ExecutionJob.id.in_(job_ids),
+                ExecutionJob.worker_id == worker_id,
+                ExecutionJob.status == "claimed"
+            )
+            .values(
+                heartbeat_at=now,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                updated_at=now
+            )
+        )
+        db.commit()
+
+        renewed = (
+            db.query(ExecutionJob.id)
+            .filter(
+                ExecutionJob.id.in_(job_ids),
+                ExecutionJob.worker_id == worker_id,
+                ExecutionJob.status == "claimed"
+            )
+            .all()
+        )
+        return [job_id for (job_id,) in renewed]
+
+    @staticmethod
+    def complete(db: Session, job_id: int, worker_id: str, status: str = "done") -> bool:
+        """Mark a claimed job as finished; returns False if the lease was lost"""
+        result = db.execute(
+            update(ExecutionJob)
+            .where(
+                ExecutionJob.id == job_id,
+                ExecutionJob.worker_id == worker_id,
+                ExecutionJob.status == "claimed"
+            )
+            .values(status=status, lease_expires_at=None, updated_at=datetime.utcnow())
+        )
+        db.commit()
+        return result.rowcount == 1
+
+    @staticmethod
+    def defer(db: Session, job_id: int, worker_id: str, delay_seconds: float) -> bool:
+        """
+        Put a claimed job back on the queue without running it
+
+        Used when its workflow has no free slot; the claim does not count as
+        an attempt. Returns False if the lease was lost.
+        """
+        now = datetime.utcnow()
+        result = db.execute(
+            update(ExecutionJob)
+            .where(
+                ExecutionJob.id == job_id,
+                ExecutionJob.worker_id == worker_id,
+                ExecutionJob.status == "claimed"
+            )
+            .values(
+                status="queued",
+                worker_id=None,
+                attempts=ExecutionJob.attempts - 1,
+                lease_expires_at=None,
+                available_at=now + timedelta(seconds=delay_seconds),
+                updated_at=now
+            )
+        )
+        db.commit()
+        return result.rowcount == 1
+
+    @staticmethod
+    def requeue_expired(db: Session, max_attempts: int = MAX_ATTEMPTS) -> int:
+        """
+        Put jobs whose worker stopped heartbeating back on the queue
+
+        Jobs that already used up their attempts are failed instead, together
+        with their execution log. Returns the number of jobs handled.
+        """
+        now = datetime.utcnow()
+        expired = (
+            db.query(ExecutionJob)
+            .filter(ExecutionJob.status == "claimed", ExecutionJob.lease_expires_at < now)
+            .all()
+        )
+
+        handled = 0
+        for job in expired:
+            give_up = job.attempts >= max_attempts
+            worker_id, attempts = job.worker_id, job.attempts
+            # Conditional update so two reapers never handle the same job
+            result = db.execute(
+                update(ExecutionJob)
+                .where(
+                    ExecutionJob.id == job.id,
+                    ExecutionJob.status == "claimed",
+                    ExecutionJob.lease_expires_at < now
+                )
+                .values(
+                    status="failed" if give_up else "queued",
+                    worker_id=None,
+                    lease_expires_at=None,
+                    available_at=now,
+                    updated_at=now
+                )
+            )
+            if result.rowcount != 1:
+                db.rollback()
+                continue
+
+            execution_log = db.query(ExecutionLog).filter(ExecutionLog.id == job.execution_id).first()
+            if execution_log and give_up and execution_log.status in ("pending", "running"):
+                execution_log.status = "failed"
+                execution_log.error_message = f"Worker {worker_id} stopped responding after {attempts} attempt(s)"
+                execution_log.completed_at = now
+            elif execution_log and execution_log.status == "running":
+                execution_log.status = "pending"
+            db.commit()
+            handled += 1
+
+        return handled
+
+    @staticmethod
+    def get_queue_depth(db: Session) -> int:
+        """Number of jobs waiting for a worker"""
+        return db.query(ExecutionJob).filter(ExecutionJob.status == "queued").count()
@@ -1,9 +1,11 @@
-from sqlalchemy.orm import Session
-from typing import List, Dict, Any, Optional
+from sqlalchemy.orm import Session, joinedload
+from typing import List, Dict, Any, Optional, Tuple
 import json
-import importlib
 from app.models import IntegrationType, Integration
 from app.utils.encryption import encryption_service
+from app.utils.credential_cache import credential_cache
+from app.utils.task_cache import task_cache
+from app.services.task_registry import task_registry
 
 class IntegrationService:
     """Service for managing integration types and integrations"""
@@ -58,24 +60,22 @@ class IntegrationService:
             }
         
         try:
-            # Dynamically import the integration module
-            module_name = integration_type.name.lower()
-            module = importlib.import_module(f"app.integrations.{module_name}")
+            if not task_registry.has_integration(integration_type.name):
+                return {
+                    "success": False,
+                    "message": f"Integration module not found for {integration_type.name}"
+                }
             
             # Call test_connection function
-            if hasattr(module, "test_connection"):
-                result = module.test_connection(credentials)
+            test_connection = task_registry.get(integration_type.name, "test_connection")
+            if test_connection:
+                result = test_connection.func(credentials)
                 return result
             else:
                 return {
                     "success": False,
                     "message": f"test_connection not implemented for {integration_type.name}"
                 }
-        except ImportError:
-            return {
-                "success": False,
-                "message": f"Integration module not found for {integration_type.name}"
-            }
         except Exception as e:
             return {
                 "success": False,
@@ -118,16 +118,76 @@ class IntegrationService:
         """Get integration by ID"""
         return db.query(Integration).filter(Integration.id == integration_id).first()
     
+    @staticmethod
+    def resolve_integration(db: Session, integration_id: int) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Get the integration type name and decrypted credentials
+        
+        Served from the credential cache when the integration's updated_at
+        matches the cached entry, so updates made by other processes are seen
+        right away; a hit costs one small query, a miss one more query and a
+        decryption. Returns None if the integration is missing.
+        """
+        row = db.query(Integration.updated_at).filter(Integration.id == integration_id).first()
+        if not row:
+            return None
+        cached = credential_cache.get(integration_id, row.updated_at)
+        if cached:
+            return cached
+        
+        integration = (
+            db.query(Integration)
+            .options(joinedload(Integration.integration_type))
+            .filter(Integration.id == integration_id)
+            # A long-lived session may hold the row as it was before the update
+            .populate_existing()
+            .first()
+        )
+        if not integration:
+            return None
+        
+        # Decrypt credentials
+        decrypted_json = encryption_service.decrypt(integration.credentials)
+        credentials = json.loads(decrypted_json)
+        type_name = integration.integration_type.name
+        
+        credential_cache.put(integration.id, integration.updated_at, type_name, credentials)
+        return type_name, dict(credentials)
+    
     @staticmethod
     def get_integration_credentials(db: Session, integration_id: int) -> Dict[str, Any]:
         """Get decrypted credentials for an integration"""
+        resolved = IntegrationService.resolve_integration(db, integration_id)
+        if not resolved:
+            raise ValueError("Integration not found")
+        
+        return resolved[1]
+    
+    @staticmethod
+    def update_integration(
+        db: Session,
+        integration_id: int,
+        name: Optional[str] = None,
+        credentials: Optional[Dict[str, Any]] = None,
+        is_active: Optional[bool] = None
+    ) -> Optional[Integration]:
+        """Update an integration, re-encrypting credentials if they changed"""
         integration = IntegrationService.get_integration(db, integration_id)
         if not integration:
-            raise ValueError("Integration not found")
+            return None
         
-        # Decrypt credentials
-        decrypted_json = encryption_service.decrypt(integration.credentials)
-        return json.loads(decrypted_json)
+        if name is not None:
+            integration.name = name
+        if credentials is not None:
+            integration.credentials = encryption_service.encrypt(json.dumps(credentials))
+        if is_active is not None:
+            integration.is_active = is_active
+        
+        db.commit()
+        db.refresh(integration)
+        credential_cache.invalidate(integration_id)
+        task_cache.invalidate_integration(integration_id)
+        return integration
     
     @staticmethod
     def delete_integration(db: Session, integration_id: int) -> bool:
@@ -138,4 +198,6 @@ class IntegrationService:
         
         db.delete(integration)
         db.commit()
+        credential_cache.invalidate(integration_id)
+        task_cache.invalidate_integration(integration_id)
         return True
\ No newline at end of file
@@ -0,0 +1,237 @@
+"""
+Group-commit writer for execution logs
+
+With EXECUTION_LOG_WRITER=batched, execution log inserts, status updates and
+node result rows are not committed one by one by the request or run that
+produced them. They are queued for a single writer thread that applies
+everything gathered within LOG_WRITER_FLUSH_MS (or LOG_WRITER_BATCH_SIZE
+records) in one transaction, using multi-row statements, and commits once.
+
+Durability: writes whose caller waits - creating an execution, which is
+acknowledged to the client with its id, and the final status of a run - only
+return after the transaction holding them has committed. Intermediate writes
+(running status, node results, progress counters) are fire-and-forget; a
+crash can lose the last few milliseconds of them, which the queue's lease
+recovery already has to tolerate for runs that were in flight. If a group
+fails to commit, its writes are retried one by one, so a bad write only
+fails its own caller.
+
+The default, EXECUTION_LOG_WRITER=direct, keeps committing on the caller's
+session.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Dict, Any, Optional, Tuple
+from sqlalchemy import insert, update, bindparam
+from app.database import engine
+from app.models import ExecutionLog, ExecutionNodeResult
+
+# "direct" commits on the caller's session, "batched" uses the group-commit writer
+EXECUTION_LOG_WRITER = os.getenv("EXECUTION_LOG_WRITER", "direct").lower()
+
+# Longest a write waits for others to share its commit
+LOG_WRITER_FLUSH_MS = float(os.getenv("LOG_WRITER_FLUSH_MS", "20"))
+
+# Records that trigger a flush before the interval is up
+LOG_WRITER_BATCH_SIZE = int(os.getenv("LOG_WRITER_BATCH_SIZE", "500"))
+
+
+class _Write:
+    """One queued write and, if the caller waits for it, its future"""
+
+    __slots__ = ("kind", "payload", "future")
+
+    def __init__(self, kind: str, payload: Any, future: Optional[Future] = None):
+        self.kind = kind  # create_log, update_log, node_results, flush
+        self.payload = payload
+        self.future = future
+
+    @property
+    def size(self) -> int:
+        return len(self.payload) if self.kind == "node_results" else 1
+
+
+class ExecutionLogWriter:
+    """Buffer execution log writes and commit them in groups from one thread"""
+
+    def __init__(self, flush_ms: float = LOG_WRITER_FLUSH_MS, batch_size: int = LOG_WRITER_BATCH_SIZE):
+        self.flush_interval = max(0.0, flush_ms) / 1000
+        self.batch_size = max(1, batch_size)
+        self._queue: "queue.Queue[Optional[_Write]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._connection = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return EXECUTION_LOG_WRITER == "batched"
+
+    def create_execution(self, values: Dict[str, Any]) -> int:
+        """Insert an execution log and return its id once it is committed"""
+        return self._submit(_Write("create_log", values, Future())).future.result()
+
+    def update_execution(self, execution_id: int, values: Dict[str, Any], wait: bool = False):
+        """Update columns of an execution log, optionally waiting for the commit"""
+        write = _Write("update_log", (execution_id, values), Future() if wait else None)
+        self._submit(write)
+        if wait:
+            write.future.result()
+
+    def add_node_results(self, rows: List[Dict[str, Any]]):
+        """Queue node result rows for insertion"""
+        if rows:
+            self._submit(_Write("node_results", rows))
+
+    def flush(self):
+        """Wait until everything queued so far is committed"""
+        self._submit(_Write("flush", None, Future())).future.result()
+
+    def shutdown(self):
+        """Commit what is queued and stop the writer thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread:
+            self._queue.put(None)
+            thread.join()
+
+    def _submit(self, write: _Write) -> _Write:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="execution-log-writer", daemon=True)
+                self._thread.start()
+            self._queue.put(write)
+        return write
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            size = first.size
+            flush_at = time.monotonic() + self.flush_interval
+            # Gather whatever else arrives before the flush interval is up
+            while size < self.batch_size:
+                timeout = flush_at - time.monotonic()
+                try:
+                    write = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if write is None:
+                    stopping = True
+                    break
+                batch.append(write)
+                size += write.size
+            self._commit(batch)
+
+        # Stopped: commit anything queued behind the sentinel
+        leftover = []
+        while True:
+            try:
+                write = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if write is not None:
+                leftover.append(write)
+        if leftover:
+            self._commit(leftover)
+        self._close_connection()
+
+    def _commit(self, batch: List[_Write]):
+        try:
+            created = self._write_reconnecting(batch)
+        except Exception as e:
+            if len(batch) == 1:
+                self._fail(batch[0], e)
+                return
+            # Apply each write in its own transaction, so one bad write does
+            # not fail or roll back the others
+            print(f"Execution log writer failed to commit {len(batch)} writes together, retrying one by one: {e}")
+            for write in batch:
+                self._commit([write])
+            return
+
+        for write in batch:
+            if write.future:
+                write.future.set_result(created.get(id(write)))
+
+    def _write_reconnecting(self, batch: List[_Write]) -> Dict[int, int]:
+        """_write, replacing a dropped connection once before giving up"""
+        for retry in (False, True):
+            try:
+                return self._write(batch)
+            except Exception:
+                self._close_connection()
+                if retry:
+                    raise
+
+    @staticmethod
+    def _fail(write: _Write, error: Exception):
+        print(f"Execution log writer failed to commit a {write.kind} write: {error}")
+        if write.future:
+            write.future.set_exception(error)
+
+    def _write(self, batch: List[_Write]) -> Dict[int, int]:
+        """Apply a batch in one transaction; returns new execution ids by write"""
+        if self._connection is None:
+            # Held for the writer's lifetime so it never queues behind callers for the pool
+            self._connection = engine.connect()
+        created: Dict[int, int] = {}
+        with self._connection.begin():
+            for write in batch:
+                if write.kind == "create_log":
+                    result = self._connection.execute(insert(ExecutionLog.__table__).values(**write.payload))
+                    created[id(write)] = result.inserted_primary_key[0]
+
+            rows = [row for write in batch if write.kind == "node_results" for row in write.payload]
+            if rows:
+                self._connection.execute(insert(ExecutionNodeResult.__table__), rows)
+
+            for statement, params in self._update_statements(batch):
+                self._connection.execute(statement, params)
+        return created
+
+    def _close_connection(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+    @staticmethod
+    def _update_statements(batch: List[_Write]):
+        """
+        Merge updates of the same execution and group them by column set
+
+        Later values win, so repeated progress updates within one batch cost
+        a single row update; each column set becomes one executemany.
+        """
+        merged: Dict[int, Dict[str, Any]] = {}
+        for write in batch:
+            if write.kind == "update_log":
+                execution_id, values = write.payload
+                merged.setdefault(execution_id, {}).update(values)
+
+        groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        for execution_id, values in merged.items():
+            columns = tuple(sorted(values))
+            groups.setdefault(columns, []).append(
+                {"_id": execution_id, **{f"_{column}": value for column, value in values.items()}}
+            )
+
+        table = ExecutionLog.__table__
+        for columns, params in groups.items():
+            statement = update(table).where(table.c.id == bindparam("_id")).values(
+                {column: bindparam(f"_{column}") for column in columns}
+            )
+            yield statement, params
+
+
+# Global instance
+log_writer = ExecutionLogWriter()
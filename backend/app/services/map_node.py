@@ -0,0 +1,171 @@
+"""
+Fan-out "map" nodes
+
+A map node runs one registered task once per item of a list:
+
+    {
+        "id": "create_issues",
+        "type": "map",
+        "integration_id": 3,
+        "task": "create_issue",
+        "items": "issues",          # runtime_params key holding the list (or a literal list)
+        "item_param": "item",       # param name for non-dict items; dict items are merged into params
+        "params": {"project_key": "OPS"},
+        "concurrency": 10,
+        "on_error": "fail_fast"     # or "collect" to run every item and report all errors
+    }
+
+The node occupies one slot of the DAG scheduler; its items run on a separate
+shared pool so they can never starve (or deadlock) the node pool. Item results
+are handed to a store callback in small batches while the map is running.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import List, Dict, Any, Optional, Callable
+
+# Size of the process-wide pool shared by the items of all map nodes
+MAP_WORKER_THREADS = int(os.getenv("MAP_WORKER_THREADS", "32"))
+
+# Items of one map node run at the same time unless the node sets concurrency
+MAP_DEFAULT_CONCURRENCY = int(os.getenv("MAP_DEFAULT_CONCURRENCY", "10"))
+
+# Item results are stored once this many are pending or this many seconds passed
+MAP_FLUSH_ITEMS = int(os.getenv("MAP_FLUSH_ITEMS", "20"))
+MAP_FLUSH_SECONDS = float(os.getenv("MAP_FLUSH_SECONDS", "0.5"))
+
+# Item errors listed in the map node's result data
+MAP_MAX_REPORTED_ERRORS = 50
+
+ON_ERROR_MODES = ("fail_fast", "collect")
+
+_map_executor: Optional[ThreadPoolExecutor] = None
+_map_executor_lock = threading.Lock()
+
+
+def get_map_executor() -> ThreadPoolExecutor:
+    """Get the shared worker pool used to run map items"""
+    global _map_executor
+    if _map_executor is None:
+        with _map_executor_lock:
+            if _map_executor is None:
+                _map_executor = ThreadPoolExecutor(
+                    max_workers=MAP_WORKER_THREADS,
+                    thread_name_prefix="workflow-map"
+                )
+    return _map_executor
+
+
+def resolve_items(node: Dict[str, Any], runtime_params: Optional[Dict[str, Any]]) -> List[Any]:
+    """The item list of a map node; raises ValueError if it is missing"""
+    items = node.get("items")
+    if isinstance(items, str):
+        if not runtime_params or items not in runtime_params:
+            raise ValueError(f"runtime_params has no '{items}' list for map node {node.get('id')}")
+        items = runtime_params[items]
+    if not isinstance(items, list):
+        raise ValueError(f"Items of map node {node.get('id')} must be a list")
+    return items
+
+
+def item_params(node: Dict[str, Any], params: Dict[str, Any], item: Any) -> Dict[str, Any]:
+    """Params for one item: dict items are merged, others go under item_param"""
+    if isinstance(item, dict):
+        return {**params, **item}
+    return {**params, node.get("item_param") or "item": item}
+
+
+def validate_map_node(node: Dict[str, Any]) -> List[str]:
+    """Problems with the map-specific settings of a node"""
+    errors = []
+    node_id = node.get("id")
+    if not isinstance(node.get("items"), (str, list)):
+        errors.append(f"Node {node_id}: map items must be a runtime_params key or a list")
+    concurrency = node.get("concurrency")
+    if concurrency is not None and (not isinstance(concurrency, int) or isinstance(concurrency, bool) or concurrency < 1):
+        errors.append(f"Node {node_id}: concurrency must be a positive integer")
+    if node.get("on_error", "fail_fast") not in ON_ERROR_MODES:
+        errors.append(f"Node {node_id}: on_error must be one of {', '.join(ON_ERROR_MODES)}")
+    return errors
+
+
+def run_map(
+    items: List[Any],
+    call_item: Callable[[int, Any], Dict[str, Any]],
+    store: Callable[[List[Dict[str, Any]]], None],
+    concurrency: Optional[int] = None,
+    fail_fast: bool = True,
+    deadline: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Run call_item(index, item) for every item with bounded concurrency
+
+    Returns the node result: successful only if every item succeeded. With
+    fail_fast no new items are started after the first failure, and items
+    never started are counted as skipped.
+    """
+    executor = get_map_executor()
+    limit = max(1, int(concurrency or MAP_DEFAULT_CONCURRENCY))
+    running: Dict[Future, int] = {}
+    pending: List[Dict[str, Any]] = []
+    last_flush = time.monotonic()
+    succeeded = 0
+    errors: List[Dict[str, Any]] = []
+    next_index = 0
+    stopped = None
+
+    while next_index < len(items) or running:
+        if stopped is None:
+            if deadline is not None and time.monotonic() >= deadline:
+                stopped = "deadline"
+            elif fail_fast and errors:
+                stopped = "failure"
+        while stopped is None and next_index < len(items) and len(running) < limit:
+            running[executor.submit(call_item, next_index, items[next_index])] = next_index
+            next_index += 1
+        if not running:
+            break
+
+        done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+        for future in done:
+            index = running.pop(future)
+            result = future.result()
+            pending.append(result)
+            if result.get("success", False):
+                succeeded += 1
+            else:
+                errors.append({"index": index, "message": result.get("message", "")})
+
+        if len(pending) >= MAP_FLUSH_ITEMS or time.monotonic() - last_flush >= MAP_FLUSH_SECONDS:
+            store(pending)
+            pending = []
+            last_flush = time.monotonic()
+
+    if pending:
+        store(pending)
+
+    skipped = len(items) - succeeded - len(errors)
+    if not errors and not skipped:
+        message = f"All {len(items)} items succeeded"
+    elif stopped == "deadline":
+        message = f"Deadline reached after {succeeded + len(errors)} of {len(items)} items ({len(errors)} failed)"
+    else:
+        message = f"{len(errors)} of {len(items)} items failed"
+        if skipped:
+            message += f", {skipped} skipped"
+        if errors:
+            message += f" (first error at item {errors[0]['index']}: {errors[0]['message']})"
+
+    return {
+        "success": not errors and not skipped,
+        "message": message,
+        "data": {
+            "total": len(items),
+            "succeeded": succeeded,
+            "failed": len(errors),
+            "skipped": skipped,
+            "errors": sorted(errors, key=lambda e: e["index"])[:MAP_MAX_REPORTED_ERRORS]
+        }
+    }
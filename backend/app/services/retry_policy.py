@@ -0,0 +1,88 @@
+"""
+Node-level retry policies
+
+Declared per node in workflow_data, with an optional workflow-wide default
+under settings.retry:
+
+    {
+        "id": "notify",
+        "type": "integration",
+        ...
+        "retry": {
+            "max_attempts": 4,
+            "backoff_base": 1.0,
+            "backoff_cap": 30,
+            "jitter": true,
+            "retry_on": ["timeout", "connection", "rate_limit", "server_error"]
+        }
+    }
+
+Failures are classified by the HTTP layer (see TaskContext.error_kind):
+timeout, connection, rate_limit, server_error, client_error, or exception
+when the task raised. "any" in retry_on retries every failure.
+"""
+
+import random
+from typing import List, Dict, Any, Optional
+
+DEFAULT_RETRY_ON = ["timeout", "connection", "rate_limit", "server_error"]
+
+# Values of TaskContext.error_kind that retry_on can name, besides "any"
+ERROR_KINDS = ("timeout", "connection", "rate_limit", "server_error", "client_error", "exception")
+
+
+class RetryPolicy:
+    """How often and how patiently a failed node is attempted again"""
+
+    def __init__(
+        self,
+        max_attempts: int = 1,
+        backoff_base: float = 1.0,
+        backoff_cap: float = 30.0,
+        jitter: bool = True,
+        retry_on: Optional[List[str]] = None
+    ):
+        self.max_attempts = max(1, int(max_attempts))
+        self.backoff_base = max(0.0, float(backoff_base))
+        self.backoff_cap = max(0.0, float(backoff_cap))
+        if not isinstance(jitter, bool):
+            raise ValueError("jitter must be true or false")
+        self.jitter = jitter
+        if retry_on is None:
+            retry_on = DEFAULT_RETRY_ON
+        if not isinstance(retry_on, list):
+            raise ValueError("retry_on must be a list of error kinds")
+        unknown = [kind for kind in retry_on if kind != "any" and kind not in ERROR_KINDS]
+        if unknown:
+            raise ValueError(f"unknown error kinds in retry_on: {', '.join(map(str, unknown))}; "
+                             f"use any or {', '.join(ERROR_KINDS)}")
+        self.retry_on = set(retry_on)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_attempts > 1
+
+    def should_retry(self, attempt: int, error_kind: Optional[str]) -> bool:
+        """Whether a failed attempt (1-based) should be followed by another"""
+        if attempt >= self.max_attempts:
+            return False
+        return "any" in self.retry_on or (error_kind is not None and error_kind in self.retry_on)
+
+    def delay(self, attempt: int) -> float:
+        """Exponential backoff after the given attempt, with full jitter"""
+        delay = min(self.backoff_cap, self.backoff_base * (2 ** (attempt - 1)))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    @classmethod
+    def for_node(cls, node: Dict[str, Any], settings: Optional[Dict[str, Any]] = None) -> "RetryPolicy":
+        """Build the policy for a node, falling back to the workflow default"""
+        config = {**((settings or {}).get("retry") or {}), **(node.get("retry") or {})}
+        return cls(
+            max_attempts=config.get("max_attempts", 1),
+            backoff_base=config.get("backoff_base", 1.0),
+            backoff_cap=config.get("backoff_cap", 30.0),
+            jitter=config.get("jitter", True),
+            retry_on=config.get("retry_on")
+        )
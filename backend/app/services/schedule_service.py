@@ -0,0 +1,152 @@
+from sqlalchemy.orm import Session
+from typing import List, Optional, Dict, Any
+from datetime import datetime
+import json
+import os
+from app.models import Workflow, WorkflowSchedule
+from app.services.fair_share import resolve_priority
+from app.utils.cron import CronExpression, get_timezone
+
+# What to do with fire times missed while no scheduler was running:
+# skip them, start one run for all of them, or start one run per missed time
+MISFIRE_POLICIES = ("skip", "run_once", "catch_up")
+
+# Upper bound for a schedule's max_catch_up
+MAX_CATCH_UP_LIMIT = int(os.getenv("SCHEDULE_MAX_CATCH_UP_LIMIT", "100"))
+
+class ScheduleService:
+    """Cron schedules that trigger workflows without an external caller"""
+
+    @staticmethod
+    def validate(
+        cron_expression: str,
+        timezone: str,
+        misfire_policy: str,
+        max_catch_up: int,
+        priority: Optional[str]
+    ) -> CronExpression:
+        """Raise ValueError for invalid schedule settings; returns the parsed expression"""
+        cron = CronExpression(cron_expression)
+        tz = get_timezone(timezone)
+        # Rejects expressions that can never fire, e.g. "0 0 30 2 *"
+        cron.next_after(datetime.utcnow(), tz)
+        if misfire_policy not in MISFIRE_POLICIES:
+            raise ValueError(f"misfire_policy must be one of {', '.join(MISFIRE_POLICIES)}")
+        if not 1 <= max_catch_up <= MAX_CATCH_UP_LIMIT:
+            raise ValueError(f"max_catch_up must be between 1 and {MAX_CATCH_UP_LIMIT}")
+        resolve_priority(priority, "scheduled")
+        return cron
+
+    @staticmethod
+    def next_fire_time(schedule: WorkflowSchedule, after: Optional[datetime] = None) -> datetime:
+        """Next fire time of a schedule after `after` (default now), naive UTC"""
+        cron = CronExpression(schedule.cron_expression)
+        return cron.next_after(after or datetime.utcnow(), get_timezone(schedule.timezone))
+
+    @staticmethod
+    def create_schedule(
+        db: Session,
+        workflow_id: int,
+        cron_expression: str,
+        timezone: str = "UTC",
+        runtime_params: Optional[Dict[str, Any]] = None,
+        name: Optional[str] = None,
+        priority: Optional[str] = None,
+        misfire_policy: str = "run_once",
+        max_catch_up: int = 1,
+        is_active: bool = True
+    ) -> WorkflowSchedule:
+        """Create a schedule; its first fire time is the next match from now"""
+        if not db.query(Workflow).filter(Workflow.id == workflow_id).first():
+            raise ValueError("Workflow not found")
+        ScheduleService.validate(cron_expression, timezone, misfire_policy, max_catch_up, priority)
+
+        schedule = WorkflowSchedule(
+            workflow_id=workflow_id,
+            name=name,
+            cron_expression=cron_expression.strip(),
+            timezone=timezone,
+            runtime_params=json.dumps(runtime_params or {}),
+            priority=priority,
+            misfire_policy=misfire_policy,
+            max_catch_up=max_catch_up,
+            is_active=is_active
+        )
+        schedule.next_fire_at = ScheduleService.next_fire_time(schedule)
+        db.add(schedule)
+        db.commit()
+        db.refresh(schedule)
+        return schedule
+
+    @staticmethod
+    def get_schedules(db: Session, workflow_id: Optional[int] = None) -> List[WorkflowSchedule]:
+        """Get all schedules, optionally of one workflow"""
+        query = db.query(WorkflowSchedule)
+        if workflow_id is not None:
+            query = query.filter(WorkflowSchedule.workflow_id == workflow_id)
+        return query.order_by(WorkflowSchedule.id).all()
+
+    @staticmethod
+    def get_schedule(db: Session, schedule_id: int) -> Optional[WorkflowSchedule]:
+        """Get schedule by ID"""
+        return db.query(WorkflowSchedule).filter(WorkflowSchedule.id == schedule_id).first()
+
+    @staticmethod
+    def update_schedule(db: Session, schedule_id: int, **changes: Any) -> Optional[WorkflowSchedule]:
+        """
+        Update a schedule; None values are left unchanged
+
+        Changing the expression or timezone, or re-enabling the schedule,
+        moves its next fire time to the next match from now, so runs missed
+        while it was disabled are not caught up.
+        """
+        schedule = ScheduleService.get_schedule(db, schedule_id)
+        if not schedule:
+            return None
+
+        changes = {key: value for key, value in changes.items() if value is not None}
+        reschedule = (
+            changes.get("cron_expression", schedule.cron_expression) != schedule.cron_expression
+            or changes.get("timezone", schedule.timezone) != schedule.timezone
+            or (changes.get("is_active") and not schedule.is_active)
+        )
+        ScheduleService.validate(
+            changes.get("cron_expression", schedule.cron_expression),
+            changes.get("timezone", schedule.timezone),
+            changes.get("misfire_policy", schedule.misfire_policy),
+            changes.get("max_catch_up", schedule.max_catch_up),
+            changes.get("priority", schedule.priority)
+        )
+
+        for key, value in changes.items():
+            if key == "runtime_params":
+                value = json.dumps(value)
+            elif key == "cron_expression":
+                value = value.strip()
+            setattr(schedule, key, value)
+        if reschedule or schedule.next_fire_at is None:
+            schedule.next_fire_at = ScheduleService.next_fire_time(schedule)
+
+        db.commit()
+        db.refresh(schedule)
+        return schedule
+
+    @staticmethod
+    def delete_schedule(db: Session, schedule_id: int) -> bool:
+        """Delete schedule"""
+        schedule = ScheduleService.get_schedule(db, schedule_id)
+        if not schedule:
+            return False
+        db.delete(schedule)
+        db.commit()
+        return True
+
+    @staticmethod
+    def preview(schedule: WorkflowSchedule, count: int = 5) -> List[datetime]:
+        """The next `count` fire times from now"""
+        times = []
+        moment = datetime.utcnow()
+        for _ in range(count):
+            moment = ScheduleService.next_fire_time(schedule, moment)
+            times.append(moment)
+        return times
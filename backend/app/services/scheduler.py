@@ -0,0 +1,326 @@
+"""
+Built-in cron scheduler
+
+Every API process runs a scheduler thread, but only the one holding the
+"scheduler" lease in scheduler_leases fires schedules. The lease is a row
+taken over with a conditional UPDATE once it expires, so another process
+becomes leader within SCHEDULER_LEASE_SECONDS when the leader dies.
+
+The leader keeps the active schedules in a min-heap of next fire times and
+sleeps until the earliest one. Due schedules start their runs directly
+through WorkflowService.create_execution and dispatch_execution, as
+trigger_source "scheduled". Each run is deduplicated by an idempotency key
+of the schedule and fire time, so a fire time is never run twice, even by
+two leaders around a failover.
+
+Fire times missed while no leader was running (or while the leader was
+behind by more than SCHEDULER_MISFIRE_GRACE_SECONDS) follow the schedule's
+misfire_policy: "skip" drops them, "run_once" starts one run for the
+latest, and "catch_up" starts one run for each of the latest max_catch_up.
+
+The leader also deletes expired idempotency keys every
+IDEMPOTENCY_KEY_PURGE_SECONDS.
+"""
+
+import heapq
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from sqlalchemy import update, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models import WorkflowSchedule, SchedulerLease
+from app.services.workflow_service import WorkflowService
+from app.services.admission import WorkflowBusyError
+from app.services.background import dispatch_execution
+from app.services.schedule_service import ScheduleService
+from app.utils.cron import CronExpression, get_timezone
+
+# Whether API processes take part in leader election and fire schedules
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+
+# How long the leader holds the lease without renewing it (renewed every third of it)
+SCHEDULER_LEASE_SECONDS = float(os.getenv("SCHEDULER_LEASE_SECONDS", "30"))
+
+# How often the leader reloads schedules, to see changes made by other processes
+SCHEDULER_RELOAD_SECONDS = float(os.getenv("SCHEDULER_RELOAD_SECONDS", "30"))
+
+# How late a fire time may be handled and still count as on time
+SCHEDULER_MISFIRE_GRACE_SECONDS = float(os.getenv("SCHEDULER_MISFIRE_GRACE_SECONDS", "60"))
+
+# How often the leader deletes expired idempotency keys
+IDEMPOTENCY_KEY_PURGE_SECONDS = float(os.getenv("IDEMPOTENCY_KEY_PURGE_SECONDS", "3600"))
+
+# Most missed fire times looked at for one schedule
+MAX_MISSED_SCAN = 10000
+
+
+class LeaderLease:
+    """A named lease row held by at most one process at a time"""
+
+    def __init__(self, name: str, holder: str, lease_seconds: float = SCHEDULER_LEASE_SECONDS):
+        self.name = name
+        self.holder = holder
+        self.lease_seconds = lease_seconds
+        # time.monotonic() until which the lease is known to be ours
+        self._held_until = 0.0
+
+    @property
+    def held(self) -> bool:
+        return time.monotonic() < self._held_until
+
+    def acquire(self, db: Session) -> bool:
+        """Take or renew the lease; True if this holder has it"""
+        started = time.monotonic()
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+        result = db.execute(
+            update(SchedulerLease)
+            .where(
+                SchedulerLease.name == self.name,
+                or_(SchedulerLease.holder == self.holder, SchedulerLease.expires_at < now)
+            )
+            .values(holder=self.holder, expires_at=expires_at)
+        )
+        db.commit()
+        acquired = result.rowcount == 1
+
+        if not acquired and not db.query(SchedulerLease).filter(SchedulerLease.name == self.name).first():
+            db.add(SchedulerLease(name=self.name, holder=self.holder, expires_at=expires_at))
+            try:
+                db.commit()
+                acquired = True
+            except IntegrityError:
+                # Another process created it first
+                db.rollback()
+
+        self._held_until = started + self.lease_seconds if acquired else 0.0
+        return acquired
+
+    def release(self, db: Session):
+        """Give the lease up so another process can take it right away"""
+        self._held_until = 0.0
+        db.execute(
+            update(SchedulerLease)
+            .where(SchedulerLease.name == self.name, SchedulerLease.holder == self.holder)
+            .values(expires_at=datetime.utcnow() - timedelta(seconds=1))
+        )
+        db.commit()
+
+
+class WorkflowScheduler:
+    """Fire due workflow schedules while holding the scheduler lease"""
+
+    def __init__(self, lease_seconds: float = SCHEDULER_LEASE_SECONDS):
+        holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease = LeaderLease("scheduler", holder, lease_seconds)
+        # (next_fire_at, schedule_id), earliest first
+        self._heap: List[Tuple[datetime, int]] = []
+        self._wakeup = threading.Condition()
+        self._reload_requested = True
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._renew_at = 0.0
+        self._reload_at = 0.0
+        self._purge_at = 0.0
+
+    @property
+    def is_leader(self) -> bool:
+        return self.lease.held
+
+    def start(self):
+        """Start the scheduler thread"""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._loop, name="workflow-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the scheduler thread and give up the lease"""
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stopping.set()
+        self.notify()
+        thread.join()
+        if self.lease.held:
+            db = SessionLocal()
+            try:
+                self.lease.release(db)
+            except Exception as e:
+                print(f"Error releasing scheduler lease: {e}")
+            finally:
+                db.close()
+
+    def notify(self):
+        """Reload schedules now, e.g. after one was created or changed"""
+        with self._wakeup:
+            self._reload_requested = True
+            self._wakeup.notify_all()
+
+    def _loop(self):
+        while not self._stopping.is_set():
+            db = SessionLocal()
+            try:
+                self.tick(db)
+            except Exception as e:
+                print(f"Scheduler error: {e}")
+                db.rollback()
+            finally:
+                db.close()
+
+            with self._wakeup:
+                if not self._reload_requested and not self._stopping.is_set():
+                    self._wakeup.wait(self._sleep_seconds())
+
+    def _sleep_seconds(self) -> float:
+        """Time until the lease renewal, the next reload or the next fire time"""
+        now = time.monotonic()
+        deadline = self._renew_at
+        if self.is_leader:
+            deadline = min(deadline, self._reload_at)
+            if self._heap:
+                until_fire = (self._heap[0][0] - datetime.utcnow()).total_seconds()
+                deadline = min(deadline, now + until_fire)
+        return min(max(deadline - now, 0.01), self.lease.lease_seconds / 3)
+
+    def tick(self, db: Session) -> int:
+        """Renew the lease, fire due schedules and purge expired keys when due; returns the number of runs started"""
+        now = time.monotonic()
+        if now >= self._renew_at:
+            was_leader = self.is_leader
+            try:
+                leader = self.lease.acquire(db)
+            finally:
+                self._renew_at = now + self.lease.lease_seconds / 3
+            if leader and not was_leader:
+                print(f"Scheduler {self.lease.holder} is now the leader")
+                self._reload_requested = True
+            elif was_leader and not leader:
+                print(f"Scheduler {self.lease.holder} lost the leader lease")
+
+        if not self.is_leader:
+            self._heap = []
+            return 0
+
+        if self._reload_requested or now >= self._reload_at:
+            self._reload(db)
+        started = self._fire_due(db)
+        if now >= self._purge_at:
+            self._purge_at = now + IDEMPOTENCY_KEY_PURGE_SECONDS
+            purged = WorkflowService.purge_idempotency_keys(db)
+            if purged:
+                print(f"Deleted {purged} expired idempotency keys")
+        return started
+
+    def _reload(self, db: Session):
+        with self._wakeup:
+            self._reload_requested = False
+        rows = (
+            db.query(WorkflowSchedule.next_fire_at, WorkflowSchedule.id)
+            .filter(WorkflowSchedule.is_active.is_(True), WorkflowSchedule.next_fire_at.isnot(None))
+            .all()
+        )
+        self._heap = [(fire_at, schedule_id) for fire_at, schedule_id in rows]
+        heapq.heapify(self._heap)
+        self._reload_at = time.monotonic() + SCHEDULER_RELOAD_SECONDS
+
+    def _fire_due(self, db: Session) -> int:
+        started = 0
+        while self._heap and self._heap[0][0] <= datetime.utcnow() and self.is_leader:
+            fire_at, schedule_id = heapq.heappop(self._heap)
+            db.expire_all()
+            schedule = ScheduleService.get_schedule(db, schedule_id)
+            if not schedule or not schedule.is_active or schedule.next_fire_at is None:
+                continue
+            if schedule.next_fire_at != fire_at:
+                # Changed since the heap was loaded
+                heapq.heappush(self._heap, (schedule.next_fire_at, schedule_id))
+                continue
+
+            started += self._fire(db, schedule)
+            if schedule.next_fire_at is not None:
+                heapq.heappush(self._heap, (schedule.next_fire_at, schedule_id))
+        return started
+
+    def _fire(self, db: Session, schedule: WorkflowSchedule) -> int:
+        """Start the runs of a due schedule and move it to its next fire time"""
+        now = datetime.utcnow()
+        cron = CronExpression(schedule.cron_expression)
+        tz = get_timezone(schedule.timezone)
+
+        # The latest missed fire times, oldest first
+        due = deque(maxlen=max(schedule.max_catch_up or 1, 1))
+        fire_at, missed = schedule.next_fire_at, 0
+        while fire_at <= now and missed < MAX_MISSED_SCAN:
+            due.append(fire_at)
+            missed += 1
+            fire_at = cron.next_after(fire_at, tz)
+        if fire_at <= now:
+            fire_at = cron.next_after(now, tz)
+
+        on_time = missed == 1 and (now - due[0]).total_seconds() <= SCHEDULER_MISFIRE_GRACE_SECONDS
+        if on_time:
+            runs = list(due)
+        elif schedule.misfire_policy == "skip":
+            runs = []
+        elif schedule.misfire_policy == "catch_up":
+            runs = list(due)
+        else:
+            runs = [due[-1]]
+        if not on_time:
+            print(f"Schedule {schedule.id} missed {missed} fire time(s), {schedule.misfire_policy}: starting {len(runs)} run(s)")
+
+        started = sum(self._start_run(db, schedule, scheduled_for) for scheduled_for in runs)
+
+        # Only move on from the fire time that was handled
+        previous = schedule.next_fire_at
+        values = {"next_fire_at": fire_at}
+        if runs:
+            values["last_fired_at"] = now
+        result = db.execute(
+            update(WorkflowSchedule)
+            .where(WorkflowSchedule.id == schedule.id, WorkflowSchedule.next_fire_at == previous)
+            .values(**values)
+        )
+        db.commit()
+        if result.rowcount == 1:
+            schedule.next_fire_at = fire_at
+        else:
+            db.refresh(schedule)
+        return started
+
+    @staticmethod
+    def _start_run(db: Session, schedule: WorkflowSchedule, scheduled_for: datetime) -> bool:
+        """Create and dispatch the run of one fire time; False if none was started"""
+        try:
+            execution_log, created = WorkflowService.create_idempotent_execution(
+                db,
+                schedule.workflow_id,
+                f"schedule:{schedule.id}:{scheduled_for.isoformat()}",
+                runtime_params=json.loads(schedule.runtime_params or "{}"),
+                trigger_source="scheduled",
+                trigger_metadata={"schedule_id": schedule.id, "scheduled_for": scheduled_for.isoformat()},
+                priority=schedule.priority
+            )
+            if created:
+                dispatch_execution(db, execution_log)
+            return created
+        except WorkflowBusyError as e:
+            print(f"Schedule {schedule.id}: run for {scheduled_for.isoformat()} not started: {e}")
+        except Exception as e:
+            db.rollback()
+            print(f"Schedule {schedule.id}: error starting run for {scheduled_for.isoformat()}: {e}")
+        return False
+
+
+# Global instance
+workflow_scheduler = WorkflowScheduler()
@@ -0,0 +1,158 @@
+"""
+Registry of integration task functions
+
+Built once at startup by scanning the app.integrations packages (and any
+installed third-party integrations exposed through the
+"workflow_automation.integrations" entry point group), so dispatching a node
+is a dict lookup instead of an import and getattr on every run.
+"""
+
+import importlib
+import inspect
+import pkgutil
+import threading
+from importlib import metadata
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+# Entry point group third-party packages use to contribute integrations
+ENTRY_POINT_GROUP = "workflow_automation.integrations"
+
+
+class TaskSpec:
+    """A resolved integration task and its signature metadata"""
+
+    def __init__(self, integration: str, name: str, func: Callable):
+        self.integration = integration
+        self.name = name
+        self.func = func
+        self.module = func.__module__
+
+        signature = inspect.signature(func)
+        self.parameters: List[str] = list(signature.parameters)
+        positional = [
+            p for p in signature.parameters.values()
+            if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)
+        ]
+        self.accepts_params = len(positional) >= 2 or any(
+            p.kind == p.VAR_POSITIONAL for p in signature.parameters.values()
+        )
+        self.description = (inspect.getdoc(func) or "").split("\n")[0]
+        # Seconds results may be served from the task cache (see app.utils.task_cache)
+        self.cache_ttl: Optional[float] = getattr(func, "cache_ttl", None)
+        # Function taking a list of params, for merging calls (see app.utils.task_batching)
+        self.batch_func: Optional[Callable] = getattr(func, "batch_func", None)
+        self.max_batch_size: int = getattr(func, "max_batch_size", 1)
+        # Run in the task process pool instead of an engine thread (see app.utils.process_pool)
+        self.run_in_process: bool = getattr(func, "run_in_process", False)
+
+    def __call__(self, credentials: Dict[str, Any], params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        if self.accepts_params:
+            return self.func(credentials, params or {})
+        return self.func(credentials)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "integration": self.integration,
+            "name": self.name,
+            "module": self.module,
+            "parameters": self.parameters,
+            "description": self.description,
+            "cache_ttl": self.cache_ttl,
+            "batchable": self.batch_func is not None,
+            "run_in_process": self.run_in_process
+        }
+
+
+class TaskRegistry:
+    """Maps (integration type name, task name) to a TaskSpec"""
+
+    def __init__(self):
+        self._tasks: Dict[Tuple[str, str], TaskSpec] = {}
+        self._integrations: Dict[str, List[str]] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def discover(self, package: str = "app.integrations", entry_points: bool = True) -> int:
+        """Scan integration packages and register their tasks; returns the task count"""
+        with self._lock:
+            tasks: Dict[Tuple[str, str], TaskSpec] = {}
+            integrations: Dict[str, List[str]] = {}
+
+            root = importlib.import_module(package)
+            for module_info in pkgutil.iter_modules(root.__path__):
+                if not module_info.ispkg:
+                    continue
+                try:
+                    module = importlib.import_module(f"{package}.{module_info.name}")
+                except Exception as e:
+                    print(f"Skipping integration '{module_info.name}': {e}")
+                    continue
+                self._register_module(tasks, integrations, module_info.name, module)
+
+            if entry_points:
+                for entry_point in self._entry_points():
+                    try:
+                        module = entry_point.load()
+                    except Exception as e:
+                        print(f"Skipping integration entry point '{entry_point.name}': {e}")
+                        continue
+                    self._register_module(tasks, integrations, entry_point.name, module)
+
+            self._tasks = tasks
+            self._integrations = integrations
+            self._loaded = True
+            return len(tasks)
+
+    @staticmethod
+    def _entry_points():
+        try:
+            return metadata.entry_points(group=ENTRY_POINT_GROUP)
+        except Exception:
+            return []
+
+    @staticmethod
+    def _register_module(tasks, integrations, name: str, module):
+        integration = name.lower()
+        exported = getattr(module, "__all__", None)
+        if exported is None:
+            exported = [
+                attr for attr, value in vars(module).items()
+                if not attr.startswith("_") and inspect.isfunction(value)
+            ]
+
+        names = integrations.setdefault(integration, [])
+        for task_name in exported:
+            func = getattr(module, task_name, None)
+            if not callable(func):
+                continue
+            tasks[(integration, task_name)] = TaskSpec(integration, task_name, func)
+            if task_name not in names:
+                names.append(task_name)
+
+    def ensure_loaded(self):
+        if not self._loaded:
+            self.discover()
+
+    def get(self, integration: str, task_name: str) -> Optional[TaskSpec]:
+        """Look up a task, or None if the integration does not provide it"""
+        self.ensure_loaded()
+        return self._tasks.get((integration.lower(), task_name))
+
+    def has_integration(self, integration: str) -> bool:
+        self.ensure_loaded()
+        return integration.lower() in self._integrations
+
+    def has_process_tasks(self) -> bool:
+        """Whether any task runs in the task process pool by default"""
+        self.ensure_loaded()
+        return any(spec.run_in_process for spec in self._tasks.values())
+
+    def tasks_for(self, integration: str) -> List[TaskSpec]:
+        """All tasks registered for an integration type"""
+        self.ensure_loaded()
+        key = integration.lower()
+        return [self._tasks[(key, name)] for name in self._integrations.get(key, [])]
+
+
+# Global instance
+task_registry = TaskRegistry()
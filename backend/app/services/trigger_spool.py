@@ -0,0 +1,305 @@
+"""
+Write-ahead spool for webhook triggers
+
+POST /api/workflows/{id}/ingest does not touch the database. The trigger is
+appended as one line to a local append-only segment file and fsync'd, and
+the sender gets a 202 with the trigger id once it is on disk. Appends that
+arrive while an fsync is in progress share the next one.
+
+A drainer thread turns spooled triggers into executions: it seals the
+current segment, creates an execution for every record (deduplicated by
+the trigger id, or the sender's Idempotency-Key) and dispatches it like an
+async trigger, then deletes the segment. If the database is unavailable,
+or a workflow is at its concurrency limits, the segment stays and is
+retried, so a DB hiccup or a burst of webhooks delays runs instead of
+dropping them. Records that can never run (unknown workflow, invalid
+payload) go to dead_letter.jsonl.
+
+Each line is "<crc32 hex> <json>"; a line torn by a crash was never
+acknowledged and is skipped. Segments are locked with flock by the process
+writing or draining them, so API processes sharing TRIGGER_SPOOL_DIR drain
+each other's segments only after the writer is gone.
+"""
+
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime
+from typing import Dict, Any, Optional, List
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.services.workflow_service import WorkflowService, ExecutionStateError
+from app.services.admission import WorkflowBusyError
+from app.services.background import dispatch_execution
+
+# Directory of the spool segments, local to the host
+TRIGGER_SPOOL_DIR = os.getenv("TRIGGER_SPOOL_DIR", "trigger_spool")
+
+# Size after which a new segment file is started
+TRIGGER_SPOOL_SEGMENT_BYTES = int(os.getenv("TRIGGER_SPOOL_SEGMENT_BYTES", str(16 * 1024 * 1024)))
+
+# Largest accepted trigger, in bytes of JSON
+TRIGGER_SPOOL_MAX_RECORD_BYTES = int(os.getenv("TRIGGER_SPOOL_MAX_RECORD_BYTES", str(1024 * 1024)))
+
+# Interval between drain passes
+TRIGGER_SPOOL_DRAIN_MS = float(os.getenv("TRIGGER_SPOOL_DRAIN_MS", "100"))
+
+# Pause after a drain pass failed, e.g. because the database is down
+TRIGGER_SPOOL_RETRY_SECONDS = float(os.getenv("TRIGGER_SPOOL_RETRY_SECONDS", "2"))
+
+SEGMENT_SUFFIX = ".spool"
+DEAD_LETTER_FILE = "dead_letter.jsonl"
+
+
+class TriggerSpool:
+    """fsync'd append-only trigger log with a drainer that starts the executions"""
+
+    def __init__(self, directory: str = TRIGGER_SPOOL_DIR, segment_bytes: int = TRIGGER_SPOOL_SEGMENT_BYTES):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self._fd: Optional[int] = None
+        self._size = 0
+        # Records written to and fsync'd in the open segment's lifetime
+        self._written = 0
+        self._synced = 0
+        # Lock order: _sync_lock, then _write_lock
+        self._write_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._drainer: Optional[threading.Thread] = None
+
+    def append(self, workflow_id: int, request: Dict[str, Any], idempotency_key: Optional[str] = None) -> str:
+        """Spool a trigger and return its id once it is durable on disk"""
+        trigger_id = uuid.uuid4().hex
+        line = self._encode({
+            "id": trigger_id,
+            "workflow_id": workflow_id,
+            "received_at": datetime.utcnow().isoformat(),
+            "idempotency_key": idempotency_key,
+            "request": request
+        })
+
+        if self._size >= self.segment_bytes:
+            self.seal()
+        with self._write_lock:
+            if self._fd is None:
+                self._open_segment()
+            # One write on an O_APPEND file, so lines never interleave
+            if os.write(self._fd, line) != len(line):
+                raise OSError("Short write to trigger spool")
+            self._size += len(line)
+            self._written += 1
+            sequence = self._written
+        self._sync(sequence)
+        return trigger_id
+
+    @staticmethod
+    def _encode(record: Dict[str, Any]) -> bytes:
+        body = json.dumps(record, separators=(",", ":"), default=str).encode()
+        if len(body) > TRIGGER_SPOOL_MAX_RECORD_BYTES:
+            raise ValueError(f"Trigger payload exceeds {TRIGGER_SPOOL_MAX_RECORD_BYTES} bytes")
+        return b"%08x %s\n" % (zlib.crc32(body), body)
+
+    def _sync(self, sequence: int):
+        """fsync up to `sequence`; writes that queue up meanwhile share the next fsync"""
+        with self._sync_lock:
+            if self._synced >= sequence:
+                return
+            with self._write_lock:
+                fd, written = self._fd, self._written
+            os.fsync(fd)
+            self._synced = written
+
+    def _create_segment(self) -> int:
+        """Create and lock a new segment file; returns its descriptor"""
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{time.time_ns():020d}-{os.getpid()}-{uuid.uuid4().hex[:8]}{SEGMENT_SUFFIX}"
+        fd = os.open(os.path.join(self.directory, name), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        # Held until the segment is sealed, so no drainer reads it while it grows
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        self._fsync_directory()
+        return fd
+
+    def _open_segment(self):
+        self._fd, self._size, self._written, self._synced = self._create_segment(), 0, 0, 0
+
+    def _fsync_directory(self):
+        """Make a new or removed segment's directory entry durable"""
+        dir_fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    def seal(self):
+        """Close the open segment so it can be drained"""
+        with self._sync_lock, self._write_lock:
+            if self._fd is None or self._size == 0:
+                return
+            os.fsync(self._fd)
+            os.close(self._fd)
+            self._fd = None
+            self._synced = self._written
+
+    def drain(self) -> int:
+        """Start executions for every sealed segment; returns the number of triggers handled"""
+        with self._drain_lock:
+            self.seal()
+            handled = 0
+            busy = None
+            for path in sorted(glob.glob(os.path.join(self.directory, f"*{SEGMENT_SUFFIX}"))):
+                try:
+                    handled += self._drain_segment(path)
+                except WorkflowBusyError as e:
+                    # Later segments may be for other workflows
+                    busy = e
+            if busy is not None:
+                raise busy
+            return handled
+
+    def _drain_segment(self, path: str) -> int:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            return 0
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Still being written by a live process, or drained by another one
+                return 0
+            if os.fstat(fd).st_nlink == 0:
+                # Drained and removed while we waited for it
+                return 0
+
+            with os.fdopen(os.dup(fd), "rb") as segment:
+                records = self._read_records(path, segment.read())
+
+            db = SessionLocal()
+            busy: List[Dict[str, Any]] = []
+            error = None
+            try:
+                for record in records:
+                    try:
+                        self._start(db, record)
+                    except WorkflowBusyError as e:
+                        busy.append(record)
+                        error = e
+            finally:
+                db.close()
+            if busy:
+                # Retried from a segment of their own, so the records handled
+                # here are not started or dead-lettered again
+                self._write_segment(busy)
+
+            # Every record has its execution; a crash before this line re-drains
+            # the segment and the idempotency keys skip the ones already started
+            os.unlink(path)
+            self._fsync_directory()
+            if error is not None:
+                raise error
+            return len(records)
+        finally:
+            os.close(fd)
+
+    def _write_segment(self, records: List[Dict[str, Any]]):
+        """Write records to a new sealed segment"""
+        fd = self._create_segment()
+        try:
+            data = b"".join(self._encode(record) for record in records)
+            if os.write(fd, data) != len(data):
+                raise OSError("Short write to trigger spool")
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _read_records(path: str, data: bytes) -> List[Dict[str, Any]]:
+        records = []
+        for number, line in enumerate(data.split(b"\n"), start=1):
+            if not line:
+                continue
+            checksum, _, body = line.partition(b" ")
+            try:
+                if int(checksum, 16) != zlib.crc32(body):
+                    raise ValueError("checksum mismatch")
+                records.append(json.loads(body))
+            except ValueError as e:
+                print(f"Skipping unreadable trigger in {os.path.basename(path)} line {number}: {e}")
+        return records
+
+    def _start(self, db: Session, record: Dict[str, Any]):
+        """
+        Create and dispatch the execution of a spooled trigger
+
+        Raises on errors worth retrying (database unavailable, the
+        idempotency key still held by another request, the workflow at its
+        concurrency limits) so the segment is kept; triggers that can never
+        run are dead-lettered.
+        """
+        request = record.get("request") or {}
+        trigger_metadata = dict(request.get("trigger_metadata") or {})
+        trigger_metadata.update({"trigger_id": record["id"], "received_at": record.get("received_at")})
+        try:
+            execution_log, created = WorkflowService.create_idempotent_execution(
+                db,
+                record["workflow_id"],
+                record.get("idempotency_key") or f"spool:{record['id']}",
+                runtime_params=request.get("runtime_params"),
+                trigger_source=request.get("trigger_source") or "webhook",
+                trigger_metadata=trigger_metadata,
+                priority=request.get("priority")
+            )
+            if created:
+                dispatch_execution(db, execution_log)
+        except (ExecutionStateError, WorkflowBusyError):
+            raise
+        except ValueError as e:
+            self._dead_letter(record, str(e))
+
+    def _dead_letter(self, record: Dict[str, Any], reason: str):
+        print(f"Trigger {record.get('id')} for workflow {record.get('workflow_id')} not started: {reason}")
+        line = json.dumps({"reason": reason, "failed_at": datetime.utcnow().isoformat(), "record": record}, default=str)
+        with open(os.path.join(self.directory, DEAD_LETTER_FILE), "a") as dead_letter:
+            dead_letter.write(line + "\n")
+            dead_letter.flush()
+            os.fsync(dead_letter.fileno())
+
+    def start(self):
+        """Start the drainer thread"""
+        if self._drainer is not None:
+            return
+        self._stopping.clear()
+        self._drainer = threading.Thread(target=self._drain_loop, name="trigger-spool-drainer", daemon=True)
+        self._drainer.start()
+
+    def stop(self):
+        """Stop the drainer after a last pass"""
+        drainer, self._drainer = self._drainer, None
+        if drainer is None:
+            return
+        self._stopping.set()
+        drainer.join()
+        try:
+            self.drain()
+        except Exception as e:
+            print(f"Trigger spool left undrained at shutdown: {e}")
+
+    def _drain_loop(self):
+        while not self._stopping.is_set():
+            try:
+                self.drain()
+                self._stopping.wait(TRIGGER_SPOOL_DRAIN_MS / 1000)
+            except Exception as e:
+                print(f"Trigger spool drain failed, retrying in {TRIGGER_SPOOL_RETRY_SECONDS}s: {e}")
+                self._stopping.wait(TRIGGER_SPOOL_RETRY_SECONDS)
+
+
+# Global instance
+trigger_spool = TriggerSpool()
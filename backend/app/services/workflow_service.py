@@ -1,10 +1,43 @@
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Tuple, Union
 import json
-import importlib
-from datetime import datetime
-from app.models import Workflow, ExecutionLog
+import os
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from app.database import SessionLocal
+from app.models import Workflow, ExecutionLog, ExecutionNodeResult, ExecutionIdempotencyKey, Integration
 from app.services.integration_service import IntegrationService
+from app.services.dag_executor import DagExecutor
+from app.services.execution_plan import ExecutionPlan, plan_cache
+from app.services.task_registry import task_registry, TaskSpec
+from app.utils.task_context import TaskContext, task_scope, get_task_context
+from app.utils.task_cache import task_cache
+from app.utils.task_batching import task_batcher
+from app.utils.process_pool import process_pool
+from app.services.retry_policy import RetryPolicy
+from app.services.log_writer import log_writer
+from app.services.execution_events import event_bus
+from app.services import map_node
+from app.services.fair_share import resolve_priority, workflow_weight
+from app.services.admission import AdmissionControl, AdmissionLimits, validate_settings as validate_admission_settings
+
+# Largest serialized node output stored per result row; bigger outputs are truncated
+NODE_RESULT_MAX_DATA_BYTES = int(os.getenv("NODE_RESULT_MAX_DATA_BYTES", "65536"))
+
+# Hours an idempotency key is remembered; after that it starts a new execution
+IDEMPOTENCY_KEY_TTL_HOURS = float(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+
+# Seconds a repeated key waits for the first request to finish creating its execution
+IDEMPOTENCY_CLAIM_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_CLAIM_WAIT_SECONDS", "5"))
+
+# Node types the engine can run; "map" runs its task once per item (see map_node)
+NODE_TYPES = ("integration", "map")
+
+
+class ExecutionStateError(ValueError):
+    """The execution exists but is not in a state that allows the operation"""
 
 class WorkflowService:
     """Service for managing workflows and execution"""
@@ -17,6 +50,8 @@ class WorkflowService:
         description: Optional[str] = None
     ) -> Workflow:
         """Create a new workflow"""
+        WorkflowService.check_workflow_data(db, workflow_data)
+        
         workflow = Workflow(
             name=name,
             description=description,
@@ -55,12 +90,127 @@ class WorkflowService:
         if description is not None:
             workflow.description = description
         if workflow_data is not None:
+            WorkflowService.check_workflow_data(db, workflow_data)
             workflow.workflow_data = json.dumps(workflow_data)
         
         db.commit()
         db.refresh(workflow)
+        plan_cache.invalidate(workflow_id)
         return workflow
     
+    @staticmethod
+    def validate_workflow_data(db: Session, workflow_data: Dict[str, Any]) -> List[str]:
+        """
+        Check a workflow definition against the task registry
+        
+        Returns a list of problems: unsupported node types, unknown
+        integrations, tasks the integration does not provide, invalid map
+        settings and cycles.
+        """
+        # ExecutionPlan assumes this shape, so check it before building one
+        errors = WorkflowService._validate_shape(workflow_data)
+        if errors:
+            return errors
+        plan = ExecutionPlan(workflow_data)
+        
+        integration_ids = {
+            node.get("integration_id") for node in plan.nodes
+            if node.get("type") in NODE_TYPES and node.get("integration_id")
+        }
+        integrations = {
+            integration.id: integration
+            for integration in db.query(Integration).filter(Integration.id.in_(integration_ids)).all()
+        } if integration_ids else {}
+        
+        for node in plan.nodes:
+            node_id = node.get("id")
+            node_type = node.get("type")
+            try:
+                RetryPolicy.for_node(node, plan.settings)
+            except (TypeError, ValueError, AttributeError) as e:
+                errors.append(f"Node {node_id}: invalid retry policy ({e})")
+            if not WorkflowService._is_positive_number(node.get("timeout_seconds")):
+                errors.append(f"Node {node_id}: timeout_seconds must be a positive number")
+            if node.get("run_in_process") not in (None, True, False):
+                errors.append(f"Node {node_id}: run_in_process must be true or false")
+            if node_type not in NODE_TYPES:
+                errors.append(f"Node {node_id}: unsupported node type '{node_type}'")
+                continue
+            if node_type == "map":
+                errors.extend(map_node.validate_map_node(node))
+            
+            integration_id = node.get("integration_id")
+            task_name = node.get("task")
+            if not all([integration_id, task_name]):
+                errors.append(f"Node {node_id}: missing integration_id or task name")
+                continue
+            
+            integration = integrations.get(integration_id)
+            if not integration:
+                errors.append(f"Node {node_id}: integration {integration_id} not found")
+                continue
+            
+            type_name = integration.integration_type.name
+            if not task_registry.get(type_name, task_name):
+                errors.append(f"Node {node_id}: task '{task_name}' not found in {type_name.lower()}")
+        
+        if not WorkflowService._is_positive_number(plan.settings.get("deadline_seconds")):
+            errors.append("settings.deadline_seconds must be a positive number")
+        errors.extend(validate_admission_settings(plan.settings))
+        if not WorkflowService._is_positive_number(plan.settings.get("fair_share_weight")):
+            errors.append("settings.fair_share_weight must be a positive number")
+        
+        if plan.has_cycle:
+            errors.append(f"Workflow contains a cycle between nodes: {', '.join(map(str, plan.cycle_nodes))}")
+        
+        return errors
+    
+    @staticmethod
+    def _validate_shape(workflow_data: Dict[str, Any]) -> List[str]:
+        """Problems with the structure of nodes, connections and settings"""
+        if not isinstance(workflow_data, dict):
+            return ["Workflow data must be an object"]
+        if not isinstance(workflow_data.get("settings") or {}, dict):
+            return ["settings must be an object"]
+        nodes = workflow_data.get("nodes", [])
+        connections = workflow_data.get("connections", [])
+        if not isinstance(nodes, list):
+            return ["nodes must be a list"]
+        if not isinstance(connections, list) or not all(isinstance(conn, dict) for conn in connections):
+            return ["connections must be a list of objects"]
+        
+        errors = []
+        seen_ids = set()
+        for index, node in enumerate(nodes):
+            if not isinstance(node, dict):
+                errors.append(f"Node at position {index}: must be an object")
+                continue
+            node_id = node.get("id")
+            if not isinstance(node_id, (str, int)) or isinstance(node_id, bool) or node_id == "":
+                errors.append(f"Node at position {index}: missing or invalid id")
+                node_id = f"at position {index}"
+            elif node_id in seen_ids:
+                errors.append(f"Node {node_id}: duplicate id")
+            else:
+                seen_ids.add(node_id)
+            if not node.get("type"):
+                errors.append(f"Node {node_id}: missing type")
+        return errors
+    
+    @staticmethod
+    def _is_positive_number(value: Any) -> bool:
+        """True for None (not set) or a number greater than zero"""
+        if value is None:
+            return True
+        return isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0
+    
+    @staticmethod
+    def check_workflow_data(db: Session, workflow_data: Dict[str, Any]):
+        """Raise ValueError if the workflow definition does not validate"""
+        errors = WorkflowService.validate_workflow_data(db, workflow_data)
+        if errors:
+            raise ValueError("Invalid workflow: " + "; ".join(errors))
+    
     @staticmethod
     def delete_workflow(db: Session, workflow_id: int) -> bool:
         """Delete a workflow"""
@@ -70,6 +220,7 @@ class WorkflowService:
         
         db.delete(workflow)
         db.commit()
+        plan_cache.invalidate(workflow_id)
         return True
     
     @staticmethod
@@ -90,157 +241,812 @@ class WorkflowService:
             trigger_source: Source of the trigger (manual, api, webhook, scheduled)
             trigger_metadata: Additional metadata about the trigger
         """
+        execution_log = WorkflowService.create_execution(
+            db,
+            workflow_id,
+            runtime_params=runtime_params,
+            trigger_source=trigger_source,
+            trigger_metadata=trigger_metadata,
+            status="running"
+        )
+        return WorkflowService.run_when_admitted(db, execution_log)
+    
+    @staticmethod
+    def create_execution(
+        db: Session,
+        workflow_id: int,
+        runtime_params: Optional[Dict[str, Any]] = None,
+        trigger_source: str = "manual",
+        trigger_metadata: Optional[Dict[str, Any]] = None,
+        status: str = "pending",
+        resumed_from: Optional[int] = None,
+        priority: Optional[str] = None
+    ) -> ExecutionLog:
+        """
+        Create the execution log for a run without executing any nodes
+        
+        The trigger info is stored in execution_data so the run can be
+        picked up later by run_execution, possibly from another session.
+        resumed_from links a resume to the failed execution it continues.
+        priority is the run's priority class (see fair_share); by default it
+        follows trigger_source. Workflows with concurrency limits always start pending, and raise
+        WorkflowBusyError when the overflow policy rejects the trigger.
+        """
         workflow = WorkflowService.get_workflow(db, workflow_id)
         if not workflow:
             raise ValueError("Workflow not found")
+        limits = AdmissionControl.admit(db, workflow)
+        if limits:
+            # Becomes running once it holds one of the workflow's slots
+            status = "pending"
         
         # Create execution log with trigger info
         execution_metadata = {
             "trigger_source": trigger_source,
+            "priority": resolve_priority(priority, trigger_source),
             "trigger_metadata": trigger_metadata or {},
             "runtime_params": runtime_params or {}
         }
+        if resumed_from is not None:
+            execution_metadata["resumed_from"] = resumed_from
         
-        execution_log = ExecutionLog(
-            workflow_id=workflow_id,
-            status="running",
-            started_at=datetime.utcnow()
-        )
+        values = {
+            "workflow_id": workflow_id,
+            "status": status,
+            "started_at": datetime.utcnow(),
+            "execution_data": json.dumps({"metadata": execution_metadata})
+        }
+        # Limited workflows insert in the transaction that holds admission's lock
+        if log_writer.enabled and not limits:
+            # Release the session's connection, then share a commit with other
+            # triggers; returns once the insert is durable
+            db.commit()
+            execution_id = log_writer.create_execution(values)
+            return WorkflowService.get_execution(db, execution_id)
+        
+        execution_log = ExecutionLog(**values)
         db.add(execution_log)
         db.commit()
+        db.refresh(execution_log)
+        return execution_log
+    
+    @staticmethod
+    def create_idempotent_execution(
+        db: Session,
+        workflow_id: int,
+        idempotency_key: str,
+        status: str = "pending",
+        **kwargs: Any
+    ) -> Tuple[ExecutionLog, bool]:
+        """
+        create_execution, deduplicated by an idempotency key
+        
+        Returns the execution and whether this call created it. A key already
+        used for the workflow within IDEMPOTENCY_KEY_TTL_HOURS returns the
+        execution it created instead of creating another.
+        """
+        if not WorkflowService.get_workflow(db, workflow_id):
+            raise ValueError("Workflow not found")
+        
+        claim = WorkflowService._claim_idempotency_key(db, workflow_id, idempotency_key)
+        if isinstance(claim, ExecutionLog):
+            return claim, False
         
         try:
-            # Parse workflow data
-            workflow_data = json.loads(workflow.workflow_data)
-            nodes = workflow_data.get("nodes", [])
-            connections = workflow_data.get("connections", [])
+            execution_log = WorkflowService.create_execution(db, workflow_id, status=status, **kwargs)
+        except Exception:
+            # Free the key so a redelivery can try again
+            db.rollback()
+            db.query(ExecutionIdempotencyKey).filter(ExecutionIdempotencyKey.id == claim).delete(synchronize_session=False)
+            db.commit()
+            raise
+        
+        db.query(ExecutionIdempotencyKey).filter(ExecutionIdempotencyKey.id == claim).update(
+            {"execution_id": execution_log.id}, synchronize_session=False
+        )
+        db.commit()
+        return execution_log, True
+    
+    @staticmethod
+    def _claim_idempotency_key(db: Session, workflow_id: int, key: str) -> Union[int, ExecutionLog]:
+        """
+        Reserve key for a new execution
+        
+        Returns the id of the reserved key row, or the execution of an earlier
+        request with the same key. The unique index on (workflow_id, key)
+        decides between concurrent requests.
+        """
+        wait_until = time.monotonic() + IDEMPOTENCY_CLAIM_WAIT_SECONDS
+        while True:
+            existing = db.query(ExecutionIdempotencyKey).filter(
+                ExecutionIdempotencyKey.workflow_id == workflow_id,
+                ExecutionIdempotencyKey.key == key
+            ).first()
+            if existing is None:
+                row = ExecutionIdempotencyKey(workflow_id=workflow_id, key=key, created_at=datetime.utcnow())
+                db.add(row)
+                try:
+                    db.commit()
+                    return row.id
+                except IntegrityError:
+                    # Another request inserted it first
+                    db.rollback()
+                    continue
             
-            # Build execution order based on connections
-            execution_order = WorkflowService._build_execution_order(nodes, connections)
+            if existing.created_at < datetime.utcnow() - timedelta(hours=IDEMPOTENCY_KEY_TTL_HOURS):
+                # Expired: take the key over unless another request just did
+                taken = db.query(ExecutionIdempotencyKey).filter(
+                    ExecutionIdempotencyKey.id == existing.id,
+                    ExecutionIdempotencyKey.created_at == existing.created_at
+                ).update({"execution_id": None, "created_at": datetime.utcnow()}, synchronize_session=False)
+                db.commit()
+                if taken:
+                    return existing.id
+                continue
             
-            # Execute nodes in order with detailed tracking
-            node_results = []
-            for node_id in execution_order:
-                node = next((n for n in nodes if n["id"] == node_id), None)
-                if not node:
-                    continue
-                
-                # Merge runtime params with node params
-                node_params = node.get("params", {})
-                if runtime_params:
-                    node_params = {**node_params, **runtime_params}
-                
-                # Execute node with enhanced tracking
-                node_start = datetime.utcnow()
-                node_result = WorkflowService._execute_node(db, node, node_params)
-                node_end = datetime.utcnow()
-                execution_time = (node_end - node_start).total_seconds()
-                
-                # Build detailed node result
-                detailed_result = {
-                    "node_id": node_id,
-                    "task": node.get("task", "unknown"),
-                    "integration_id": node.get("integration_id"),
-                    "success": node_result.get("success", False),
-                    "message": node_result.get("message", ""),
-                    "data": node_result.get("data", {}),
-                    "execution_time_seconds": execution_time,
-                    "timestamp": node_start.isoformat()
-                }
-                
-                node_results.append(detailed_result)
-                
-                # Stop execution if node failed
-                if not node_result.get("success", False):
-                    execution_log.status = "failed"
-                    execution_log.error_message = f"Node {node_id} ({node.get('task')}) failed: {node_result.get('message', 'Unknown error')}"
-                    break
-            else:
-                # All nodes executed successfully
-                execution_log.status = "success"
+            if existing.execution_id is not None:
+                return WorkflowService.get_execution(db, existing.execution_id)
             
-            # Save detailed execution data
-            execution_data = {
-                "node_results": node_results,
+            if time.monotonic() >= wait_until:
+                raise ExecutionStateError("A request with this idempotency key is still being accepted")
+            db.rollback()
+            time.sleep(0.05)
+    
+    @staticmethod
+    def purge_idempotency_keys(db: Session) -> int:
+        """Delete idempotency keys older than IDEMPOTENCY_KEY_TTL_HOURS; returns how many"""
+        cutoff = datetime.utcnow() - timedelta(hours=IDEMPOTENCY_KEY_TTL_HOURS)
+        # A key taken over meanwhile has a newer created_at and is kept
+        deleted = db.query(ExecutionIdempotencyKey).filter(
+            ExecutionIdempotencyKey.created_at < cutoff
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+    
+    @staticmethod
+    def execution_priority(execution_log: ExecutionLog) -> str:
+        """Priority class stored with an execution"""
+        metadata = (json.loads(execution_log.execution_data) if execution_log.execution_data else {}).get("metadata", {})
+        return resolve_priority(metadata.get("priority"), metadata.get("trigger_source"))
+    
+    @staticmethod
+    def execution_weight(execution_log: ExecutionLog) -> float:
+        """fair_share_weight of the execution's workflow"""
+        workflow = execution_log.workflow
+        return workflow_weight(plan_cache.get(workflow).settings) if workflow else 1.0
+    
+    @staticmethod
+    def get_execution(db: Session, execution_id: int) -> Optional[ExecutionLog]:
+        """Get execution log by ID"""
+        return db.query(ExecutionLog).filter(ExecutionLog.id == execution_id).first()
+    
+    @staticmethod
+    def create_resume_execution(db: Session, execution_id: int, status: str = "pending") -> ExecutionLog:
+        """
+        Create an execution that continues a failed one
+        
+        When it runs, nodes that succeeded in the original are not run again;
+        their stored results are copied over and only the failed nodes and
+        everything downstream of them are executed.
+        """
+        original = WorkflowService.get_execution(db, execution_id)
+        if not original:
+            raise ValueError("Execution not found")
+        if original.status != "failed":
+            raise ExecutionStateError(f"Only failed executions can be resumed (status is {original.status})")
+        
+        metadata = (json.loads(original.execution_data) if original.execution_data else {}).get("metadata", {})
+        return WorkflowService.create_execution(
+            db,
+            original.workflow_id,
+            runtime_params=metadata.get("runtime_params") or None,
+            trigger_source="resume",
+            trigger_metadata={
+                "original_trigger_source": metadata.get("trigger_source"),
+                "original_trigger_metadata": metadata.get("trigger_metadata") or {}
+            },
+            status=status,
+            resumed_from=original.id,
+            priority=metadata.get("priority")
+        )
+    
+    @staticmethod
+    def resume_execution(db: Session, execution_id: int) -> ExecutionLog:
+        """Resume a failed execution and wait for it to finish"""
+        execution_log = WorkflowService.create_resume_execution(db, execution_id, status="running")
+        return WorkflowService.run_when_admitted(db, execution_log)
+    
+    @staticmethod
+    def run_when_admitted(db: Session, execution_log: ExecutionLog) -> ExecutionLog:
+        """Run an execution in this thread, first waiting for a slot if its workflow is limited"""
+        if execution_log.status == "pending" and not AdmissionControl.wait_for_slot(db, execution_log):
+            # Dropped from the queue while waiting
+            return execution_log
+        return WorkflowService.run_execution(db, execution_log)
+    
+    @staticmethod
+    def run_execution(db: Session, execution_log: ExecutionLog) -> ExecutionLog:
+        """Run the nodes of a previously created execution and record the results"""
+        stored_data = json.loads(execution_log.execution_data) if execution_log.execution_data else {}
+        execution_metadata = stored_data.get("metadata", {})
+        runtime_params = execution_metadata.get("runtime_params") or None
+        
+        if stored_data.get("nodes_executed"):
+            # Rows left by a worker that died mid-run; the execution starts over
+            db.query(ExecutionNodeResult).filter(
+                ExecutionNodeResult.execution_id == execution_log.id
+            ).delete(synchronize_session=False)
+            db.commit()
+        
+        if execution_log.status != "running":
+            WorkflowService._update_execution(db, execution_log, {
+                "status": "running",
+                "started_at": datetime.utcnow()
+            })
+        event_bus.publish(execution_log.id, "execution.started", {
+            "execution_id": execution_log.id,
+            "workflow_id": execution_log.workflow_id,
+            "status": "running"
+        })
+        
+        try:
+            workflow = WorkflowService.get_workflow(db, execution_log.workflow_id)
+            if not workflow:
+                raise ValueError("Workflow not found")
+            
+            # Compiled plan: parsed nodes, adjacency lists and execution order
+            plan = plan_cache.get(workflow)
+            plan.validate()
+            
+            # Summary kept on the log; node results are stored as rows as they finish
+            summary = {
                 "metadata": execution_metadata,
-                "nodes_total": len(nodes),
-                "nodes_executed": len(node_results),
-                "nodes_successful": len([r for r in node_results if r["success"]])
+                "nodes_total": len(plan.nodes),
+                "nodes_executed": 0,
+                "nodes_successful": 0
             }
             
-            execution_log.completed_at = datetime.utcnow()
-            execution_log.execution_data = json.dumps(execution_data)
-            db.commit()
-            db.refresh(execution_log)
+            # Resuming: carry over what already succeeded instead of running it again
+            completed = set()
+            if execution_metadata.get("resumed_from"):
+                for result in WorkflowService._reusable_results(db, execution_metadata["resumed_from"], plan):
+                    WorkflowService._save_node_result(db, execution_log, summary, result)
+                    completed.add(result["node_id"])
+                summary["nodes_reused"] = len(completed)
+            
+            # Run independent branches in parallel, respecting dependencies
+            dag = DagExecutor(
+                plan,
+                max_concurrency=plan.settings.get("max_concurrency"),
+                deadline_seconds=plan.settings.get("deadline_seconds")
+            )
+            node_results = dag.run(
+                lambda node: WorkflowService._start_node(db, node, runtime_params, plan.settings, execution_log.id),
+                WorkflowService._interrupted_result,
+                lambda result: WorkflowService._save_node_result(db, execution_log, summary, result),
+                completed
+            )
+            
+            final = {"status": "success", "error_message": None}
+            failed_result = next((r for r in node_results if not r["success"]), None)
+            if failed_result:
+                final["status"] = "failed"
+                final["error_message"] = f"Node {failed_result['node_id']} ({failed_result['task']}) failed: {failed_result['message'] or 'Unknown error'}"
+            elif dag.error_message:
+                final["status"] = "failed"
+                final["error_message"] = dag.error_message
+            
+            final["completed_at"] = datetime.utcnow()
+            final["execution_data"] = json.dumps(summary)
+            WorkflowService._update_execution(db, execution_log, final, wait=True)
+            if AdmissionLimits.from_settings(plan.settings):
+                AdmissionControl.release(db, execution_log.id)
+            WorkflowService._publish_finished(execution_log, summary)
             return execution_log
             
         except Exception as e:
-            execution_log.status = "failed"
-            execution_log.error_message = f"Workflow execution error: {str(e)}"
-            execution_log.completed_at = datetime.utcnow()
+            db.rollback()
             
-            # Save error details
+            # Save error details; results of finished nodes are already stored
             execution_data = {
-                "node_results": node_results if 'node_results' in locals() else [],
-                "metadata": execution_metadata,
+                **(summary if 'summary' in locals() else {"metadata": execution_metadata}),
                 "error": str(e)
             }
-            execution_log.execution_data = json.dumps(execution_data)
-            
+            WorkflowService._update_execution(db, execution_log, {
+                "status": "failed",
+                "error_message": f"Workflow execution error: {str(e)}",
+                "completed_at": datetime.utcnow(),
+                "execution_data": json.dumps(execution_data)
+            }, wait=True)
+            AdmissionControl.release(db, execution_log.id)
+            WorkflowService._publish_finished(execution_log, execution_data)
+            return execution_log
+    
+    @staticmethod
+    def _publish_finished(execution_log: ExecutionLog, summary: Dict[str, Any]):
+        """Publish the final status of a run to event stream subscribers"""
+        event_bus.publish(execution_log.id, "execution.finished", {
+            "execution_id": execution_log.id,
+            "workflow_id": execution_log.workflow_id,
+            "status": execution_log.status,
+            "error_message": execution_log.error_message,
+            "completed_at": execution_log.completed_at.isoformat() if execution_log.completed_at else None,
+            "nodes_total": summary.get("nodes_total"),
+            "nodes_executed": summary.get("nodes_executed"),
+            "nodes_successful": summary.get("nodes_successful")
+        }, final=True)
+    
+    @staticmethod
+    def _reusable_results(db: Session, execution_id: int, plan: ExecutionPlan) -> List[Dict[str, Any]]:
+        """Successful results of an earlier execution for nodes still in the plan"""
+        original = WorkflowService.get_execution(db, execution_id)
+        if not original:
+            raise ValueError(f"Execution {execution_id} to resume from not found")
+        
+        reusable = []
+        for result in WorkflowService.get_node_results(db, [original])[original.id]:
+            if not result.get("success") or result.get("node_id") not in plan.nodes_by_id:
+                continue
+            result = {k: v for k, v in result.items() if k not in ("attempts", "items")}
+            result.setdefault("status", "success")
+            # Keep pointing at the run that actually executed the node
+            result["reused_from_execution_id"] = result.get("reused_from_execution_id") or original.id
+            reusable.append(result)
+        return reusable
+    
+    @staticmethod
+    def _update_execution(db: Session, execution_log: ExecutionLog, values: Dict[str, Any], wait: bool = False):
+        """
+        Write columns of an execution log
+        
+        Commits on the session, or hands the update to the group-commit
+        writer when it is enabled. With wait=True the update is durable and
+        execution_log reflects it when this returns.
+        """
+        if not log_writer.enabled:
+            for column, value in values.items():
+                setattr(execution_log, column, value)
             db.commit()
+            if wait:
+                db.refresh(execution_log)
+            return
+        
+        if wait:
+            # Release the session's connection while waiting; ending its read
+            # transaction also lets the refresh see the writer's commit
+            db.commit()
+        log_writer.update_execution(execution_log.id, values, wait=wait)
+        if wait:
             db.refresh(execution_log)
-            return execution_log
     
     @staticmethod
-    def _build_execution_order(nodes: List[Dict], connections: List[Dict]) -> List[str]:
-        """Build execution order based on node connections (topological sort)"""
-        # Simple implementation: execute in the order they appear
-        # For production, implement proper topological sort
-        node_ids = [node["id"] for node in nodes]
+    def _save_node_result(
+        db: Session,
+        execution_log: ExecutionLog,
+        summary: Dict[str, Any],
+        result: Dict[str, Any]
+    ):
+        """
+        Store a finished node as one row per attempt and update the summary
         
-        if not connections:
-            return node_ids
+        Called on the scheduler thread as soon as the node finishes, so
+        progress is visible while the workflow is still running.
+        """
+        rows = WorkflowService._node_result_rows(execution_log.id, result)
         
-        # Build adjacency list
-        graph = {node_id: [] for node_id in node_ids}
-        in_degree = {node_id: 0 for node_id in node_ids}
+        summary["nodes_executed"] += 1
+        if result["success"]:
+            summary["nodes_successful"] += 1
         
-        for conn in connections:
-            from_node = conn.get("from")
-            to_node = conn.get("to")
-            if from_node in graph and to_node in graph:
-                graph[from_node].append(to_node)
-                in_degree[to_node] += 1
+        if log_writer.enabled:
+            log_writer.add_node_results(rows)
+            log_writer.update_execution(execution_log.id, {"execution_data": json.dumps(summary)})
+        else:
+            db.add_all([ExecutionNodeResult(**row) for row in rows])
+            execution_log.execution_data = json.dumps(summary)
+            db.commit()
         
-        # Topological sort using Kahn's algorithm
-        queue = [node_id for node_id in node_ids if in_degree[node_id] == 0]
-        execution_order = []
+        event_bus.publish(
+            execution_log.id,
+            "node.finished" if result["success"] else "node.failed",
+            {"execution_id": execution_log.id, **{k: v for k, v in result.items() if k != "data"}}
+        )
+    
+    @staticmethod
+    def _node_result_rows(execution_id: int, result: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """execution_node_results rows for a result: one per attempt, the last one final"""
+        started_at = datetime.fromisoformat(result["timestamp"])
+        attempts = result.get("attempts") or [{
+            "attempt": 1,
+            "started_at": result["timestamp"],
+            "execution_time_seconds": result.get("execution_time_seconds")
+        }]
+        
+        rows = []
+        for index, attempt in enumerate(attempts):
+            final = index == len(attempts) - 1
+            rows.append({
+                "execution_id": execution_id,
+                "node_id": result["node_id"],
+                "item_index": result.get("item_index"),
+                "task": result.get("task"),
+                "integration_id": result.get("integration_id"),
+                "attempt": attempt.get("attempt", index + 1),
+                "status": result["status"] if final else "failed",
+                "success": result["success"] if final else False,
+                "message": result.get("message") if final else attempt.get("message"),
+                "error_kind": attempt.get("error_kind"),
+                "data": WorkflowService._serialize_node_data(result.get("data")) if final else None,
+                "started_at": datetime.fromisoformat(attempt["started_at"]) if attempt.get("started_at") else started_at,
+                "completed_at": datetime.utcnow() if final else None,
+                "execution_time_seconds": attempt.get("execution_time_seconds"),
+                "rate_limit_wait_seconds": result.get("rate_limit_wait_seconds") if final else None,
+                "cache_hit": result.get("cache_hit") if final else None,
+                "reused_from_execution_id": result.get("reused_from_execution_id") if final else None,
+                "created_at": datetime.utcnow()
+            })
+        return rows
+    
+    @staticmethod
+    def _serialize_node_data(data: Any) -> Optional[str]:
+        """JSON for a node's output, replaced by a truncated preview when too large"""
+        if data is None:
+            return None
+        serialized = json.dumps(data, default=str)
+        if len(serialized) <= NODE_RESULT_MAX_DATA_BYTES:
+            return serialized
+        return json.dumps({
+            "truncated": True,
+            "size_bytes": len(serialized),
+            "preview": serialized[:NODE_RESULT_MAX_DATA_BYTES]
+        })
+    
+    @staticmethod
+    def get_node_results(db: Session, execution_logs: List[ExecutionLog]) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Node results of several executions, keyed by execution id
+        
+        Loaded with one query and listed in the workflow's topological
+        order. Retried nodes come back as a single result
+        with their earlier attempts under "attempts", map nodes with their
+        per-item results under "items". Executions recorded
+        before results were stored as rows fall back to execution_data.
+        """
+        results: Dict[int, List[Dict[str, Any]]] = {log.id: [] for log in execution_logs}
+        if not results:
+            return results
+        
+        rows = db.query(ExecutionNodeResult).filter(
+            ExecutionNodeResult.execution_id.in_(list(results))
+        ).order_by(ExecutionNodeResult.id).all()
         
-        while queue:
-            node_id = queue.pop(0)
-            execution_order.append(node_id)
+        pending_attempts: Dict[Tuple[int, str], List[Dict[str, Any]]] = {}
+        map_items: Dict[Tuple[int, str], List[Dict[str, Any]]] = {}
+        for row in rows:
+            if row.item_index is not None:
+                # Item of a map node, listed under the node's own result
+                if row.completed_at is not None:
+                    map_items.setdefault((row.execution_id, row.node_id), []).append(
+                        {"item_index": row.item_index, **WorkflowService.node_result_dict(row)}
+                    )
+                continue
+            attempts = pending_attempts.setdefault((row.execution_id, row.node_id), [])
+            attempts.append(WorkflowService._attempt_dict(row))
+            if row.completed_at is None:
+                # Earlier attempt of a retried node; the final row follows
+                continue
+            result = WorkflowService.node_result_dict(row)
+            if len(attempts) > 1 or row.attempt > 1:
+                result["attempts"] = attempts
+            if (row.execution_id, row.node_id) in map_items:
+                result["items"] = sorted(map_items[(row.execution_id, row.node_id)], key=lambda i: i["item_index"])
+            del pending_attempts[(row.execution_id, row.node_id)]
+            results[row.execution_id].append(result)
+        
+        for log in execution_logs:
+            if results[log.id] and log.workflow:
+                # Rows are in completion order, which parallel nodes make arbitrary;
+                # list them in the workflow's node order like sequential runs did
+                position = plan_cache.get(log.workflow).position
+                results[log.id].sort(key=lambda result: position.get(result["node_id"], len(position)))
+            if not results[log.id] and log.execution_data:
+                legacy = json.loads(log.execution_data).get("node_results")
+                if legacy:
+                    results[log.id] = legacy
+        return results
+    
+    @staticmethod
+    def get_node_result(db: Session, execution_id: int, node_id: str) -> Optional[ExecutionNodeResult]:
+        """Latest stored result row of one node"""
+        return db.query(ExecutionNodeResult).filter(
+            ExecutionNodeResult.execution_id == execution_id,
+            ExecutionNodeResult.node_id == node_id,
+            ExecutionNodeResult.item_index.is_(None)
+        ).order_by(ExecutionNodeResult.id.desc()).first()
+    
+    @staticmethod
+    def get_finished_node_rows(db: Session, execution_id: int, after_id: int = 0) -> List[ExecutionNodeResult]:
+        """Final result rows of an execution's nodes with an id above after_id"""
+        return db.query(ExecutionNodeResult).filter(
+            ExecutionNodeResult.execution_id == execution_id,
+            ExecutionNodeResult.id > after_id,
+            ExecutionNodeResult.completed_at.isnot(None),
+            ExecutionNodeResult.item_index.is_(None)
+        ).order_by(ExecutionNodeResult.id).all()
+    
+    @staticmethod
+    def node_result_dict(row: ExecutionNodeResult) -> Dict[str, Any]:
+        """Node result row in the shape the engine produces"""
+        result = {
+            "node_id": row.node_id,
+            "task": row.task,
+            "integration_id": row.integration_id,
+            "success": row.success,
+            "status": row.status,
+            "message": row.message or "",
+            "data": json.loads(row.data) if row.data else {},
+            "execution_time_seconds": row.execution_time_seconds,
+            "timestamp": row.started_at.isoformat() if row.started_at else None
+        }
+        if row.rate_limit_wait_seconds:
+            result["rate_limit_wait_seconds"] = row.rate_limit_wait_seconds
+        if row.cache_hit is not None:
+            result["cache_hit"] = row.cache_hit
+        if row.reused_from_execution_id:
+            result["reused_from_execution_id"] = row.reused_from_execution_id
+        return result
+    
+    @staticmethod
+    def _attempt_dict(row: ExecutionNodeResult) -> Dict[str, Any]:
+        return {
+            "attempt": row.attempt,
+            "started_at": row.started_at.isoformat() if row.started_at else None,
+            "execution_time_seconds": row.execution_time_seconds,
+            "success": row.success,
+            "message": row.message or "",
+            "error_kind": row.error_kind
+        }
+    
+    @staticmethod
+    def _start_node(
+        db: Session,
+        node: Dict[str, Any],
+        runtime_params: Optional[Dict[str, Any]] = None,
+        settings: Optional[Dict[str, Any]] = None,
+        execution_id: Optional[int] = None
+    ) -> Callable[[], Dict[str, Any]]:
+        """
+        Prepare a node for execution on a worker thread
+        
+        Database lookups happen here, on the scheduler thread that owns the
+        session. The returned callable only runs the task and builds the
+        detailed node result.
+        """
+        # Merge runtime params with node params
+        node_params = node.get("params", {})
+        if runtime_params:
+            node_params = {**node_params, **runtime_params}
+        
+        resolved = WorkflowService._resolve_node(db, node)
+        retry_policy = RetryPolicy.for_node(node, settings)
+        # Merge concurrent calls of batchable tasks into batch requests
+        batch = bool(node.get("batch", (settings or {}).get("batch_tasks", False)))
+        # Run CPU-heavy tasks in the process pool; the node overrides the task's default
+        in_process = not isinstance(resolved, dict) and bool(node.get("run_in_process", resolved[0].run_in_process))
+        if execution_id is not None:
+            event_bus.publish(execution_id, "node.started", {
+                "execution_id": execution_id,
+                "node_id": node["id"],
+                "task": node.get("task", "unknown"),
+                "integration_id": node.get("integration_id")
+            })
+        
+        if node.get("type") == "map" and not isinstance(resolved, dict):
+            return WorkflowService._start_map_node(node, resolved, node_params, runtime_params, retry_policy, execution_id, batch, in_process)
+        
+        def run(deadline: Optional[float] = None) -> Dict[str, Any]:
+            # Execute node with enhanced tracking
+            node_start = datetime.utcnow()
+            if isinstance(resolved, dict):
+                outcome = {"result": resolved, "attempts": [], "rate_limit_wait": 0.0, "cache_hit": None}
+            else:
+                task, credentials = resolved
+                outcome = WorkflowService._run_task(task, credentials, node_params, node.get("integration_id"), retry_policy, deadline, batch, in_process)
+            return WorkflowService._detailed_result(node, outcome, node_start, retry_policy)
+        
+        return run
+    
+    @staticmethod
+    def _run_task(
+        task: TaskSpec,
+        credentials: Dict[str, Any],
+        params: Dict[str, Any],
+        integration_id: Optional[int],
+        retry_policy: RetryPolicy,
+        deadline: Optional[float] = None,
+        batch: bool = False,
+        in_process: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Call a task with caching, batching, retries and, for run_in_process
+        tasks, in the task process pool
+        
+        Returns the task result together with the attempts made, the time
+        spent waiting on rate limits and whether it came from the cache.
+        """
+        attempts = []
+        rate_limit_wait = 0.0
+        cache_hit = None
+        node_result = None
+        cache_key = None
+        if task.cache_ttl:
+            cache_key = task_cache.key(integration_id, task.name, params)
+            node_result = task_cache.get(cache_key)
+            cache_hit = node_result is not None
+        attempt = 0
+        while not cache_hit:
+            attempt += 1
+            attempt_start = datetime.utcnow()
+            # Lets the HTTP layer rate-limit per integration and classify failures
+            context = TaskContext(integration_id, task.integration, deadline)
+            with task_scope(context):
+                if batch and task.batch_func:
+                    node_result = task_batcher.call(task, credentials, params, integration_id)
+                elif in_process and process_pool.enabled:
+                    node_result = process_pool.call(task, credentials, params, integration_id)
+                else:
+                    node_result = WorkflowService._call_task(task, credentials, params)
+            rate_limit_wait += context.rate_limit_wait
             
-            for neighbor in graph[node_id]:
-                in_degree[neighbor] -= 1
-                if in_degree[neighbor] == 0:
-                    queue.append(neighbor)
+            success = node_result.get("success", False)
+            error_kind = None if success else context.error_kind
+            attempts.append({
+                "attempt": attempt,
+                "started_at": attempt_start.isoformat(),
+                "execution_time_seconds": (datetime.utcnow() - attempt_start).total_seconds(),
+                "success": success,
+                "message": node_result.get("message", ""),
+                "error_kind": error_kind
+            })
+            
+            if success or not retry_policy.should_retry(attempt, error_kind):
+                break
+            delay = retry_policy.delay(attempt)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                # No time left for another attempt
+                break
+            attempts[-1]["retry_delay_seconds"] = round(delay, 3)
+            time.sleep(delay)
+        
+        if cache_key and not cache_hit and node_result.get("success", False):
+            task_cache.put(cache_key, integration_id, node_result, task.cache_ttl)
+        return {"result": node_result, "attempts": attempts, "rate_limit_wait": rate_limit_wait, "cache_hit": cache_hit}
+    
+    @staticmethod
+    def _detailed_result(
+        node: Dict[str, Any],
+        outcome: Dict[str, Any],
+        started_at: datetime,
+        retry_policy: RetryPolicy
+    ) -> Dict[str, Any]:
+        """Build the node result recorded for a finished task call"""
+        node_result = outcome["result"]
+        detailed_result = {
+            "node_id": node["id"],
+            "task": node.get("task", "unknown"),
+            "integration_id": node.get("integration_id"),
+            "success": node_result.get("success", False),
+            "status": "success" if node_result.get("success", False) else "failed",
+            "message": node_result.get("message", ""),
+            "data": node_result.get("data", {}),
+            "execution_time_seconds": (datetime.utcnow() - started_at).total_seconds(),
+            "timestamp": started_at.isoformat()
+        }
+        if outcome["rate_limit_wait"]:
+            detailed_result["rate_limit_wait_seconds"] = round(outcome["rate_limit_wait"], 3)
+        if outcome["cache_hit"] is not None:
+            detailed_result["cache_hit"] = outcome["cache_hit"]
+        if retry_policy.enabled and outcome["attempts"]:
+            detailed_result["attempts"] = outcome["attempts"]
+        return detailed_result
+    
+    @staticmethod
+    def _start_map_node(
+        node: Dict[str, Any],
+        resolved: Tuple[TaskSpec, Dict[str, Any]],
+        node_params: Dict[str, Any],
+        runtime_params: Optional[Dict[str, Any]],
+        retry_policy: RetryPolicy,
+        execution_id: Optional[int],
+        batch: bool = False,
+        in_process: bool = False
+    ) -> Callable[[], Dict[str, Any]]:
+        """Prepare a map node: the returned callable runs the task once per item"""
+        task, credentials = resolved
+        if isinstance(node.get("items"), str):
+            # The item list itself is not a parameter of every item
+            node_params = {k: v for k, v in node_params.items() if k != node["items"]}
+        
+        def call_item(index: int, item: Any, deadline: Optional[float]) -> Dict[str, Any]:
+            item_start = datetime.utcnow()
+            params = map_node.item_params(node, node_params, item)
+            outcome = WorkflowService._run_task(task, credentials, params, node.get("integration_id"), retry_policy, deadline, batch, in_process)
+            return {**WorkflowService._detailed_result(node, outcome, item_start, retry_policy), "item_index": index}
+        
+        def run(deadline: Optional[float] = None) -> Dict[str, Any]:
+            node_start = datetime.utcnow()
+            try:
+                items = map_node.resolve_items(node, runtime_params)
+            except ValueError as e:
+                node_result = {"success": False, "message": str(e)}
+            else:
+                progress = {"completed": 0, "failed": 0, "total": len(items)}
+                
+                def store(results: List[Dict[str, Any]]):
+                    progress["completed"] += len(results)
+                    progress["failed"] += len([r for r in results if not r["success"]])
+                    if execution_id is not None:
+                        WorkflowService._store_map_items(execution_id, node["id"], results, progress)
+                
+                node_result = map_node.run_map(
+                    items,
+                    lambda index, item: call_item(index, item, deadline),
+                    store,
+                    concurrency=node.get("concurrency"),
+                    fail_fast=node.get("on_error", "fail_fast") == "fail_fast",
+                    deadline=deadline
+                )
+            outcome = {"result": node_result, "attempts": [], "rate_limit_wait": 0.0, "cache_hit": None}
+            return WorkflowService._detailed_result(node, outcome, node_start, retry_policy)
         
-        # If not all nodes are included, there's a cycle or disconnected nodes
-        if len(execution_order) != len(node_ids):
-            # Add remaining nodes
-            for node_id in node_ids:
-                if node_id not in execution_order:
-                    execution_order.append(node_id)
+        return run
+    
+    @staticmethod
+    def _store_map_items(execution_id: int, node_id: str, results: List[Dict[str, Any]], progress: Dict[str, int]):
+        """
+        Store a batch of map item results while the map is still running
         
-        return execution_order
+        Runs on a worker thread, so it uses its own session rather than the
+        scheduler's.
+        """
+        rows = [row for result in results for row in WorkflowService._node_result_rows(execution_id, result)]
+        if log_writer.enabled:
+            log_writer.add_node_results(rows)
+        else:
+            db = SessionLocal()
+            try:
+                db.execute(insert(ExecutionNodeResult.__table__), rows)
+                db.commit()
+            finally:
+                db.close()
+        event_bus.publish(execution_id, "node.progress", {"execution_id": execution_id, "node_id": node_id, **progress})
     
     @staticmethod
-    def _execute_node(db: Session, node: Dict[str, Any], params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """Execute a single workflow node"""
+    def _interrupted_result(node: Dict[str, Any], status: str, message: str, started_at: datetime) -> Dict[str, Any]:
+        """Result for a node the engine stopped waiting for (timed_out or cancelled)"""
+        return {
+            "node_id": node["id"],
+            "task": node.get("task", "unknown"),
+            "integration_id": node.get("integration_id"),
+            "success": False,
+            "status": status,
+            "message": message,
+            "data": {},
+            "execution_time_seconds": (datetime.utcnow() - started_at).total_seconds(),
+            "timestamp": started_at.isoformat()
+        }
+    
+    @staticmethod
+    def _resolve_node(db: Session, node: Dict[str, Any]) -> Union[Tuple[TaskSpec, Dict[str, Any]], Dict[str, Any]]:
+        """
+        Resolve the registered task and credentials for a node
+        
+        Returns a (task, credentials) tuple, or a failed result dict.
+        """
         try:
             node_type = node.get("type")
             
-            if node_type != "integration":
+            if node_type not in NODE_TYPES:
                 return {
                     "success": False,
                     "message": f"Unsupported node type: {node_type}"
@@ -248,8 +1054,6 @@ class WorkflowService:
             
             integration_id = node.get("integration_id")
             task_name = node.get("task")
-            # Use provided params or fall back to node params
-            task_params = params if params is not None else node.get("params", {})
             
             if not all([integration_id, task_name]):
                 return {
@@ -257,27 +1061,20 @@ class WorkflowService:
                     "message": "Missing integration_id or task name"
                 }
             
-            # Get integration and credentials
-            integration = IntegrationService.get_integration(db, integration_id)
-            if not integration:
+            # Get integration type and credentials (cached across nodes and runs)
+            resolved = IntegrationService.resolve_integration(db, integration_id)
+            if not resolved:
                 return {
                     "success": False,
                     "message": f"Integration {integration_id} not found"
                 }
             
-            credentials = IntegrationService.get_integration_credentials(db, integration_id)
-            
-            # Get integration type
-            integration_type = integration.integration_type
-            module_name = integration_type.name.lower()
+            type_name, credentials = resolved
+            module_name = type_name.lower()
             
-            # Dynamically import and execute task
-            module = importlib.import_module(f"app.integrations.{module_name}")
-            
-            if hasattr(module, task_name):
-                task_func = getattr(module, task_name)
-                result = task_func(credentials, task_params)
-                return result
+            task = task_registry.get(module_name, task_name)
+            if task:
+                return task, credentials
             else:
                 return {
                     "success": False,
@@ -291,9 +1088,43 @@ class WorkflowService:
             }
     
     @staticmethod
-    def get_execution_logs(db: Session, workflow_id: Optional[int] = None) -> List[ExecutionLog]:
-        """Get execution logs, optionally filtered by workflow_id"""
+    def _call_task(task: TaskSpec, credentials: Dict[str, Any], task_params: Dict[str, Any]) -> Dict[str, Any]:
+        """Call a task, turning unexpected exceptions into a failed result"""
+        try:
+            return task(credentials, task_params)
+        except Exception as e:
+            context = get_task_context()
+            if context:
+                context.error_kind = "exception"
+            return {
+                "success": False,
+                "message": f"Error executing node: {str(e)}"
+            }
+    
+    @staticmethod
+    def get_execution_logs(
+        db: Session,
+        workflow_id: Optional[int] = None,
+        status: Optional[str] = None,
+        limit: Optional[int] = None,
+        before: Optional[datetime] = None
+    ) -> List[ExecutionLog]:
+        """
+        Get execution logs, newest first, optionally filtered by workflow_id or status
+        
+        The filters match the (workflow_id, started_at) and (status,
+        started_at) indexes, so the database reads the newest rows straight
+        from the index instead of sorting the table. Pass the started_at of
+        the last row of a page as `before` to get the next one.
+        """
         query = db.query(ExecutionLog)
         if workflow_id:
             query = query.filter(ExecutionLog.workflow_id == workflow_id)
-        return query.order_by(ExecutionLog.started_at.desc()).all()
\ No newline at end of file
+        if status:
+            query = query.filter(ExecutionLog.status == status)
+        if before is not None:
+            query = query.filter(ExecutionLog.started_at < before)
+        query = query.order_by(ExecutionLog.started_at.desc())
+        if limit:
+            query = query.limit(limit)
+        return query.all()
\ No newline at end of file
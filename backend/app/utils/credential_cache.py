@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+
+# Maximum number of integrations whose decrypted credentials are kept
+CREDENTIAL_CACHE_SIZE = int(os.getenv("CREDENTIAL_CACHE_SIZE", "512"))
+
+# Seconds a cached entry is trusted before it is re-read from the database
+CREDENTIAL_CACHE_TTL = float(os.getenv("CREDENTIAL_CACHE_TTL", "300"))
+
+class CachedIntegration:
+    """Decrypted credentials and type name of one integration version"""
+
+    __slots__ = ("integration_id", "updated_at", "type_name", "credentials", "expires_at")
+
+    def __init__(self, integration_id: int, updated_at: Optional[datetime], type_name: str,
+                 credentials: Dict[str, Any], expires_at: float):
+        self.integration_id = integration_id
+        self.updated_at = updated_at
+        self.type_name = type_name
+        self.credentials = credentials
+        self.expires_at = expires_at
+
+class CredentialCache:
+    """
+    Bounded, TTL-based in-process cache of decrypted integration credentials
+
+    Entries are keyed by integration id and remember the integration's
+    updated_at; a lookup with a different updated_at is treated as a miss,
+    which is how updates made by other processes are noticed. Updates and
+    deletes in this process also invalidate entries explicitly, and the TTL
+    bounds how long an entry is kept.
+    """
+
+    def __init__(self, maxsize: int = CREDENTIAL_CACHE_SIZE, ttl_seconds: float = CREDENTIAL_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, CachedIntegration]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, integration_id: int, updated_at: Optional[datetime] = None) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Return (type_name, credentials) or None on a miss"""
+        if self.maxsize <= 0 or self.ttl_seconds <= 0:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(integration_id)
+            if entry is None:
+                return None
+            if entry.expires_at < time.monotonic() or (updated_at is not None and entry.updated_at != updated_at):
+                del self._entries[integration_id]
+                return None
+            self._entries.move_to_end(integration_id)
+            # Copy so a task cannot change the cached credentials
+            return entry.type_name, dict(entry.credentials)
+
+    def put(self, integration_id: int, updated_at: Optional[datetime], type_name: str, credentials: Dict[str, Any]):
+        if self.maxsize <= 0 or self.ttl_seconds <= 0:
+            return
+
+        entry = CachedIntegration(
+            integration_id,
+            updated_at,
+            type_name,
+            dict(credentials),
+            time.monotonic() + self.ttl_seconds
+        )
+        with self._lock:
+            self._entries[integration_id] = entry
+            self._entries.move_to_end(integration_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, integration_id: int):
+        with self._lock:
+            self._entries.pop(integration_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+# Global instance
+credential_cache = CredentialCache()
@@ -0,0 +1,133 @@
+"""
+Cron expressions for workflow schedules
+
+Standard five fields - minute, hour, day of month, month, day of week -
+with "*", lists ("1,15"), ranges ("1-5"), steps ("*/10", "8-18/2") and
+month/day names ("JAN", "MON-FRI"), plus the @yearly, @monthly, @weekly,
+@daily and @hourly shortcuts. As in Vixie cron, when both day fields are
+restricted a day matching either one matches.
+
+Times are matched on the wall clock of the schedule's timezone. A time
+skipped by a DST change fires at the first minute after the gap, and a
+time repeated by one fires once.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Optional, FrozenSet
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+MACROS = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *"
+}
+
+MONTH_NAMES = {name: i + 1 for i, name in enumerate(
+    ("JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC")
+)}
+DAY_NAMES = {name: i for i, name in enumerate(("SUN", "MON", "TUE", "WED", "THU", "FRI", "SAT"))}
+
+# How far ahead to look for a matching time (e.g. "0 0 30 2 *" never matches)
+MAX_SEARCH_YEARS = 5
+
+
+def get_timezone(name: Optional[str]) -> ZoneInfo:
+    """ZoneInfo for an IANA name; raises ValueError for an unknown one"""
+    try:
+        return ZoneInfo(name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone: {name}")
+
+
+def _parse_field(value: str, low: int, high: int, names: dict, label: str) -> FrozenSet[int]:
+    values = set()
+    for part in value.split(","):
+        part = part.strip().upper()
+        body, _, step = part.partition("/")
+        if step:
+            if not step.isdigit() or int(step) < 1:
+                raise ValueError(f"Invalid step in {label} field: {part}")
+
+        if body == "*":
+            start, end = low, high
+        else:
+            first, _, last = body.partition("-")
+            start = _parse_value(first, low, high, names, label)
+            end = _parse_value(last, low, high, names, label) if last else (high if step else start)
+            if end < start:
+                raise ValueError(f"Invalid range in {label} field: {part}")
+        values.update(range(start, end + 1, int(step) if step else 1))
+    return frozenset(values)
+
+
+def _parse_value(value: str, low: int, high: int, names: dict, label: str) -> int:
+    if value in names:
+        return names[value]
+    if not value.isdigit() or not low <= int(value) <= high:
+        raise ValueError(f"Invalid value in {label} field: {value or '(empty)'}")
+    return int(value)
+
+
+class CronExpression:
+    """A parsed cron expression; raises ValueError when invalid"""
+
+    def __init__(self, expression: str):
+        self.expression = (expression or "").strip()
+        fields = MACROS.get(self.expression.lower(), self.expression).split()
+        if len(fields) != 5:
+            raise ValueError("Cron expression must have 5 fields: minute hour day-of-month month day-of-week")
+
+        self.minutes = _parse_field(fields[0], 0, 59, {}, "minute")
+        self.hours = _parse_field(fields[1], 0, 23, {}, "hour")
+        self.days = _parse_field(fields[2], 1, 31, {}, "day-of-month")
+        self.months = _parse_field(fields[3], 1, 12, MONTH_NAMES, "month")
+        # 7 is also Sunday
+        self.weekdays = frozenset(d % 7 for d in _parse_field(fields[4], 0, 7, DAY_NAMES, "day-of-week"))
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.isoweekday() % 7) in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def _next_wall_time(self, after: datetime) -> datetime:
+        """First matching naive wall-clock minute strictly after `after`"""
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Not replace(year=...), which fails on Feb 29
+        limit = moment + timedelta(days=366 * MAX_SEARCH_YEARS)
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"Cron expression '{self.expression}' never matches")
+
+    def next_after(self, after: datetime, tz: Optional[ZoneInfo] = None) -> datetime:
+        """
+        Next fire time strictly after `after`, matched on tz's wall clock
+
+        `after` and the result are naive UTC, like every timestamp stored
+        by the application.
+        """
+        tz = tz or timezone.utc
+        current = after.replace(tzinfo=timezone.utc)
+        wall = current.astimezone(tz).replace(tzinfo=None)
+        while True:
+            wall = self._next_wall_time(wall)
+            # fold=0: the first of two repeated times; a skipped time lands after the gap
+            candidate = wall.replace(tzinfo=tz).astimezone(timezone.utc)
+            if candidate > current:
+                return candidate.replace(tzinfo=None)
@@ -0,0 +1,205 @@
+"""
+Shared HTTP connection pools for integration tasks
+
+Every task used to call requests.get/post directly, paying a new TCP+TLS
+handshake per node. Tasks now go through http_client, which keeps one
+keep-alive Session per host with a bounded connection pool and applies
+default connect/read timeouts. It is safe to use from the parallel executor
+threads: sessions are created under a lock and never keep cookies, so one
+integration's auth state can't leak into another's requests.
+
+Calls are also metered by the per-integration rate limiter: a call waits for
+quota before it is sent, and a 429 (or a 403 with no quota left) is retried
+after the provider's Retry-After instead of failing the node.
+
+When the engine gives a task a deadline, timeouts and rate-limit waits are
+clamped to the time left and calls made after it has passed raise
+DeadlineExceeded, a requests Timeout, so overrunning tasks stop promptly.
+"""
+
+import os
+import threading
+from http.cookiejar import CookiePolicy
+from typing import Dict, Any, Tuple
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from app.utils.rate_limiter import rate_limiter, RateLimitExceeded, RATE_LIMIT_MAX_WAIT
+from app.utils.task_context import get_task_context
+
+# Connection pools kept per session and connections kept per pool
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "32"))
+
+# Default timeouts in seconds when a task doesn't pass its own
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+
+# Times a throttled call is retried after waiting out Retry-After
+RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "3"))
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """The engine's deadline for the running task has passed"""
+
+
+class _RejectCookies(CookiePolicy):
+    """Sessions are shared between integrations, so they must not keep cookies"""
+
+    netscape = True
+    rfc2965 = False
+    hide_cookie2 = False
+
+    def set_ok(self, cookie, request):
+        return False
+
+    def return_ok(self, cookie, request):
+        return False
+
+    def domain_return_ok(self, domain, request):
+        return False
+
+    def path_return_ok(self, path, request):
+        return False
+
+
+class HttpClient:
+    """Keep-alive requests.Session per host with pooled connections"""
+
+    def __init__(
+        self,
+        pool_connections: int = HTTP_POOL_CONNECTIONS,
+        pool_maxsize: int = HTTP_POOL_MAXSIZE,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+        read_timeout: float = HTTP_READ_TIMEOUT
+    ):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self._sessions: Dict[Tuple[str, str], requests.Session] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _host_key(url: str) -> Tuple[str, str]:
+        parts = urlsplit(str(url))
+        return parts.scheme, parts.netloc.lower()
+
+    def session(self, url: str) -> requests.Session:
+        """Get the pooled session for the scheme and host of a URL"""
+        key = self._host_key(url)
+        session = self._sessions.get(key)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(key)
+                if session is None:
+                    session = self._create_session()
+                    self._sessions[key] = session
+        return session
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        session.cookies.set_policy(_RejectCookies())
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=False
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """Send a request on the pooled session, applying timeouts and rate limits"""
+        kwargs.setdefault("timeout", self.timeout)
+        session = self.session(url)
+
+        context = get_task_context()
+        bucket = rate_limiter.bucket(
+            context.integration_id if context else None,
+            self._host_key(url)[1],
+            context.integration_type if context else None
+        )
+
+        waited = rate_limiter.acquire(bucket, max_wait=self._max_wait(context, 0.0))
+        retries = 0
+        while True:
+            try:
+                response = session.request(method, url, **self._clamp_timeout(context, kwargs))
+            except requests.exceptions.Timeout:
+                if context:
+                    context.error_kind = "timeout"
+                raise
+            except requests.exceptions.ConnectionError:
+                if context:
+                    context.error_kind = "connection"
+                raise
+            if context:
+                context.record_response(response.status_code)
+
+            retry_wait = rate_limiter.observe(bucket, response)
+            if retry_wait is None or retries >= RATE_LIMIT_MAX_RETRIES:
+                break
+            if retry_wait > self._max_wait(context, waited):
+                break
+
+            # Throttled: wait for the quota to come back and send it again
+            retries += 1
+            try:
+                waited += rate_limiter.acquire(bucket, max_wait=self._max_wait(context, waited))
+            except RateLimitExceeded:
+                break
+
+        if context:
+            context.rate_limit_wait += waited
+        return response
+
+    @staticmethod
+    def _max_wait(context, waited: float) -> float:
+        """Rate-limit wait still allowed, bounded by the task deadline"""
+        max_wait = RATE_LIMIT_MAX_WAIT - waited
+        remaining = context.remaining() if context else None
+        if remaining is not None:
+            max_wait = min(max_wait, remaining)
+        return max(0.0, max_wait)
+
+    @staticmethod
+    def _clamp_timeout(context, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Shrink the request timeout to the time left before the task deadline"""
+        remaining = context.remaining() if context else None
+        if remaining is None:
+            return kwargs
+        if remaining <= 0:
+            context.error_kind = "timeout"
+            raise DeadlineExceeded("Task deadline exceeded")
+
+        timeout = kwargs.get("timeout")
+        if timeout is None:
+            timeout = (remaining, remaining)
+        elif isinstance(timeout, tuple):
+            timeout = tuple(min(t, remaining) if t is not None else remaining for t in timeout)
+        else:
+            timeout = min(timeout, remaining)
+        return {**kwargs, "timeout": timeout}
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("DELETE", url, **kwargs)
+
+    def close(self):
+        """Close every pooled connection"""
+        with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), {}
+        for session in sessions:
+            session.close()
+
+
+# Global instance
+http_client = HttpClient()
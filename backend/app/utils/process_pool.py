@@ -0,0 +1,306 @@
+"""
+Process pool for CPU-heavy or isolation-needing integration tasks
+
+Task functions normally run on the engine's threads inside the API (or
+worker) process, so a CPU-bound one holds the GIL for everyone. A task can
+opt in to running in a separate process instead:
+
+    @run_in_process
+    def render_report(credentials, params):
+        ...
+
+or a workflow node can set "run_in_process": true (or false, to override
+the task's default).
+
+Workers are forked from a forkserver that has the integration packages
+imported already, so a new worker is warm within milliseconds and does not
+inherit the API's threads or database connections. Each worker runs one
+task at a time. It is replaced after TASK_PROCESS_MAX_TASKS tasks or once
+its RSS passes TASK_PROCESS_MAX_RSS_MB, and killed if its task outlives the
+node's deadline. Credentials are sent to a worker once per integration and
+reused until they differ from the ones it has. Rate limits are kept per process, so tasks in the
+pool do not share quota with the threads of the parent process.
+"""
+
+import multiprocessing
+import os
+import pickle
+import pkgutil
+import resource
+import signal
+import threading
+import time
+from typing import Dict, Any, Optional, List, Callable
+from app.utils.task_context import TaskContext, get_task_context, task_scope
+
+# Number of worker processes; 0 runs process tasks on the calling thread instead
+TASK_PROCESS_POOL_SIZE = int(os.getenv("TASK_PROCESS_POOL_SIZE", str(min(4, os.cpu_count() or 1))))
+
+# Tasks a worker runs before it is replaced
+TASK_PROCESS_MAX_TASKS = int(os.getenv("TASK_PROCESS_MAX_TASKS", "500"))
+
+# Resident memory after which a worker is replaced
+TASK_PROCESS_MAX_RSS_MB = float(os.getenv("TASK_PROCESS_MAX_RSS_MB", "512"))
+
+
+def run_in_process(func: Callable) -> Callable:
+    """Mark a task to run in the task process pool by default"""
+    func.run_in_process = True
+    return func
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # Peak rather than current RSS, in KB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _resolve_task(integration: str, name: str, module: str):
+    from app.services.task_registry import task_registry, TaskSpec
+    spec = task_registry.get(integration, name)
+    if spec is None:
+        # Tasks registered outside discovery, by module path
+        import importlib
+        spec = TaskSpec(integration, name, getattr(importlib.import_module(module), name))
+    return spec
+
+
+def _worker_main(conn):
+    """Run tasks sent by the parent until it sends None or goes away"""
+    # Ctrl-C and SIGTERM are handled by the parent, which shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from app.services.task_registry import task_registry
+    task_registry.discover()
+    credentials_cache: Dict[Any, Dict[str, Any]] = {}
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            return
+        if message is None:
+            return
+
+        integration, name, module, integration_id, credentials, params, timeout = message
+        if credentials is None:
+            credentials = credentials_cache[integration_id]
+        else:
+            # Kept for the worker's lifetime, which TASK_PROCESS_MAX_TASKS bounds
+            credentials_cache[integration_id] = credentials
+        # Copy so a task cannot change the credentials later tasks get
+        credentials = dict(credentials)
+
+        context = TaskContext(integration_id, integration, time.monotonic() + timeout if timeout is not None else None)
+        with task_scope(context):
+            try:
+                result = _resolve_task(integration, name, module)(credentials, params)
+            except Exception as e:
+                context.error_kind = "exception"
+                result = {"success": False, "message": f"Error executing node: {str(e)}"}
+
+        try:
+            conn.send((result, context.error_kind, context.rate_limit_wait, _rss_mb()))
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            # Result that cannot be pickled
+            conn.send(({"success": False, "message": f"Task result cannot be returned from its process: {e}"},
+                       "exception", context.rate_limit_wait, _rss_mb()))
+
+
+class _Worker:
+    """One pool process and the parent's end of its pipe"""
+
+    def __init__(self, ctx):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn,), name="task-process", daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.tasks = 0
+        # Copy of the credentials last sent per integration id
+        self.sent_credentials: Dict[Any, Dict[str, Any]] = {}
+
+    def stop(self, kill: bool = False):
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except (OSError, ValueError):
+                pass
+        self.process.join(timeout=None if kill else 5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class TaskProcessPool:
+    """Fixed number of warm worker processes that run one task each at a time"""
+
+    def __init__(
+        self,
+        size: int = TASK_PROCESS_POOL_SIZE,
+        max_tasks: int = TASK_PROCESS_MAX_TASKS,
+        max_rss_mb: float = TASK_PROCESS_MAX_RSS_MB
+    ):
+        self.size = size
+        self.max_tasks = max_tasks
+        self.max_rss_mb = max_rss_mb
+        self._ctx = None
+        self._idle: List[_Worker] = []
+        self._workers = 0
+        self._available = threading.Condition()
+        self._closed = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def _get_context(self):
+        if self._ctx is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            ctx = multiprocessing.get_context(method)
+            if method == "forkserver":
+                # Imported once in the forkserver, so every worker starts warm
+                import app.integrations
+                ctx.set_forkserver_preload(["app.services.task_registry"] + [
+                    f"app.integrations.{module.name}" for module in pkgutil.iter_modules(app.integrations.__path__)
+                ])
+            self._ctx = ctx
+        return self._ctx
+
+    def start(self):
+        """Start every worker now instead of on first use"""
+        with self._available:
+            self._closed = False
+            while self._workers < self.size:
+                self._idle.append(_Worker(self._get_context()))
+                self._workers += 1
+
+    def _acquire(self, timeout: Optional[float] = None) -> Optional[_Worker]:
+        """A free worker, or None if none became free within timeout"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._available:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Task process pool is shut down")
+                if self._idle:
+                    return self._idle.pop()
+                if self._workers < self.size:
+                    self._workers += 1
+                    break
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._available.wait(remaining)
+        try:
+            return _Worker(self._get_context())
+        except Exception:
+            self._discard(None)
+            raise
+
+    def _release(self, worker: _Worker):
+        with self._available:
+            if not self._closed:
+                self._idle.append(worker)
+                self._available.notify()
+                return
+        self._discard(worker)
+
+    def _discard(self, worker: Optional[_Worker], kill: bool = False):
+        """Remove a worker from the pool; the next _acquire starts a fresh one"""
+        if worker is not None:
+            worker.stop(kill=kill)
+        with self._available:
+            self._workers -= 1
+            self._available.notify()
+
+    def call(self, task, credentials: Dict[str, Any], params: Dict[str, Any], integration_id: Optional[int]) -> Dict[str, Any]:
+        """
+        Run a task in a worker process and return its result
+
+        The current task context's deadline bounds the call; its error_kind
+        and rate_limit_wait are updated from the worker's.
+        """
+        context = get_task_context()
+        timeout = context.remaining() if context else None
+        if timeout is not None and timeout <= 0:
+            return self._failed(context, "timeout", "Node deadline passed before the task started")
+
+        try:
+            worker = self._acquire(timeout)
+        except (RuntimeError, OSError) as e:
+            return self._failed(context, "exception", f"Task process unavailable: {e}")
+        if worker is None:
+            return self._failed(context, "timeout", "Node deadline passed while waiting for a task process")
+
+        if timeout is not None:
+            # Measured again: waiting for a free worker used some of it
+            timeout = context.remaining()
+            if timeout <= 0:
+                self._release(worker)
+                return self._failed(context, "timeout", "Node deadline passed while waiting for a task process")
+
+        # The credential cache hands out a new copy per call, so compare by value
+        resend = worker.sent_credentials.get(integration_id) != credentials
+        message = (task.integration, task.name, task.module, integration_id, credentials if resend else None, params, timeout)
+        try:
+            worker.conn.send(message)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            # Nothing was written, the worker is still usable
+            self._release(worker)
+            return self._failed(context, "exception", f"Task params cannot be sent to its process: {e}")
+        except (OSError, ValueError) as e:
+            self._discard(worker, kill=True)
+            return self._failed(context, "exception", f"Task process unavailable: {e}")
+
+        try:
+            if timeout is not None:
+                # Measured again: sending the message used some of it
+                timeout = context.remaining()
+            if not worker.conn.poll(max(timeout, 0) if timeout is not None else None):
+                self._discard(worker, kill=True)
+                return self._failed(context, "timeout", "Task process killed at the node deadline")
+            result, error_kind, rate_limit_wait, rss_mb = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            self._discard(worker, kill=True)
+            return self._failed(context, "exception", f"Task process exited unexpectedly: {str(e) or 'no result'}")
+
+        if resend:
+            worker.sent_credentials[integration_id] = dict(credentials)
+        worker.tasks += 1
+        if worker.tasks >= self.max_tasks or rss_mb >= self.max_rss_mb:
+            self._discard(worker)
+        else:
+            self._release(worker)
+
+        if context:
+            context.error_kind = error_kind
+            context.rate_limit_wait += rate_limit_wait
+        return result
+
+    @staticmethod
+    def _failed(context: Optional[TaskContext], error_kind: str, message: str) -> Dict[str, Any]:
+        if context:
+            context.error_kind = error_kind
+        return {"success": False, "message": message}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._available:
+            return {"size": self.size, "workers": self._workers, "idle": len(self._idle)}
+
+    def shutdown(self):
+        """Stop idle workers; busy ones stop when their task returns"""
+        with self._available:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._workers -= len(idle)
+            self._available.notify_all()
+        for worker in idle:
+            worker.stop()
+
+
+# Global instance
+process_pool = TaskProcessPool()
@@ -0,0 +1,170 @@
+"""
+Token-bucket rate limiting for outgoing integration calls
+
+Buckets are keyed by integration id and host, so two GitHub integrations
+with different tokens get separate quotas while all nodes of one integration
+share theirs. Limits are configured per integration type and tightened on the
+fly from the provider's X-RateLimit-Remaining / X-RateLimit-Reset and
+Retry-After headers.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+# Default (requests per second, burst) per integration type
+DEFAULT_RATE_LIMITS: Dict[str, Dict[str, float]] = {
+    "github": {"rate": 1.3, "burst": 30},   # 5000 requests/hour per token
+    "jira": {"rate": 10, "burst": 20},
+    "teams": {"rate": 4, "burst": 4},       # incoming webhooks throttle above 4 req/s
+    "default": {"rate": 10, "burst": 20}
+}
+
+# JSON overrides, e.g. RATE_LIMITS='{"github": {"rate": 2, "burst": 50}}'
+RATE_LIMITS: Dict[str, Dict[str, float]] = {
+    **DEFAULT_RATE_LIMITS,
+    **json.loads(os.getenv("RATE_LIMITS", "{}"))
+}
+
+# Longest a single call waits for quota before giving up
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "60"))
+
+# Pause applied after a 429 that carries no Retry-After header
+RATE_LIMIT_DEFAULT_BACKOFF = float(os.getenv("RATE_LIMIT_DEFAULT_BACKOFF", "1"))
+
+
+class RateLimitExceeded(Exception):
+    """Raised when quota would not be available within the allowed wait"""
+
+    def __init__(self, wait_seconds: float):
+        self.wait_seconds = wait_seconds
+        super().__init__(f"Rate limit exceeded, quota available again in {wait_seconds:.1f}s")
+
+
+class TokenBucket:
+    """Classic token bucket that can also be blocked until a point in time"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = max(rate, 0.001)
+        self.capacity = max(burst, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait: float) -> float:
+        """
+        Take one token and return how long the caller must wait before using it
+
+        Nothing is taken if the wait would exceed max_wait; RateLimitExceeded
+        is raised instead.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            wait = max(0.0, self.blocked_until - now)
+            if self.tokens < 1:
+                wait = max(wait, (1 - self.tokens) / self.rate)
+            if wait > max_wait:
+                raise RateLimitExceeded(wait)
+
+            self.tokens -= 1
+            return wait
+
+    def block_for(self, seconds: float):
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def drain(self):
+        """Provider reported no remaining quota: spend what we think is left"""
+        with self._lock:
+            self.tokens = min(self.tokens, 0)
+
+
+class RateLimiter:
+    """Registry of token buckets keyed by (integration id, host)"""
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, float]]] = None, max_wait: float = RATE_LIMIT_MAX_WAIT):
+        self.limits = limits or RATE_LIMITS
+        self.max_wait = max_wait
+        self._buckets: Dict[Tuple[Optional[int], str], TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, integration_id: Optional[int], host: str, integration_type: Optional[str] = None) -> TokenBucket:
+        key = (integration_id, host)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    limit = self.limits.get(integration_type or "default", self.limits["default"])
+                    bucket = TokenBucket(float(limit["rate"]), float(limit["burst"]))
+                    self._buckets[key] = bucket
+        return bucket
+
+    def acquire(self, bucket: TokenBucket, max_wait: Optional[float] = None) -> float:
+        """Block until the bucket allows one more call; returns the seconds waited"""
+        wait = bucket.reserve(self.max_wait if max_wait is None else max_wait)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    @staticmethod
+    def retry_after(response) -> Optional[float]:
+        """
+        Seconds the provider asks us to wait, or None if it doesn't say
+
+        Understands Retry-After (seconds or HTTP date) and the
+        X-RateLimit-Remaining / X-RateLimit-Reset pair used by GitHub.
+        """
+        headers = response.headers
+        retry_after = headers.get("Retry-After")
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                try:
+                    retry_at = parsedate_to_datetime(retry_after)
+                    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+                except (TypeError, ValueError):
+                    pass
+
+        if headers.get("X-RateLimit-Remaining") == "0" and headers.get("X-RateLimit-Reset"):
+            try:
+                return max(0.0, float(headers["X-RateLimit-Reset"]) - time.time())
+            except ValueError:
+                pass
+        return None
+
+    def observe(self, bucket: TokenBucket, response) -> Optional[float]:
+        """
+        Feed a response back into the bucket
+
+        Returns the seconds to wait before retrying if the response was
+        rejected for rate limiting, otherwise None.
+        """
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        wait = self.retry_after(response)
+
+        if remaining == "0":
+            bucket.drain()
+            if wait:
+                bucket.block_for(wait)
+
+        throttled = response.status_code == 429 or (response.status_code == 403 and remaining == "0")
+        if not throttled:
+            return None
+
+        wait = RATE_LIMIT_DEFAULT_BACKOFF if wait is None else wait
+        bucket.block_for(wait)
+        return wait
+
+
+# Global instance
+rate_limiter = RateLimiter()
@@ -0,0 +1,114 @@
+"""
+Merging of concurrent calls to batchable integration tasks
+
+A task declares the function that performs many of its calls in one request:
+
+    def create_issues_batch(credentials, params_list):   # -> one result per params
+        ...
+
+    @batchable(create_issues_batch, max_batch_size=50)
+    def create_issue(credentials, params):
+        ...
+
+When a workflow enables batching (settings.batch_tasks, or "batch" on a
+node), calls of the same task against the same integration that arrive within
+TASK_BATCH_WINDOW_MS of each other are sent as one batch call. The first
+caller waits out the window, makes the call on its own thread and hands every
+other caller its own result. The others give up with a timeout if their
+task's deadline passes first.
+"""
+
+import os
+import threading
+from typing import List, Dict, Any, Optional, Callable, Tuple
+from app.utils.task_context import get_task_context
+
+# How long the first call of a batch waits for others to join it
+TASK_BATCH_WINDOW_MS = float(os.getenv("TASK_BATCH_WINDOW_MS", "50"))
+
+
+def batchable(batch_func: Callable, max_batch_size: int) -> Callable[[Callable], Callable]:
+    """Mark a task whose concurrent calls can be merged into calls of batch_func"""
+    def decorator(func: Callable) -> Callable:
+        func.batch_func = batch_func
+        func.max_batch_size = int(max_batch_size)
+        return func
+    return decorator
+
+
+class _Batch:
+    """Calls collected for one batch request"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.params: List[Dict[str, Any]] = []
+        self.results: Optional[List[Dict[str, Any]]] = None
+        self.error_kind: Optional[str] = None
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+
+class TaskBatcher:
+    """Collect concurrent calls per (integration, task) into batch calls"""
+
+    def __init__(self, window_ms: float = TASK_BATCH_WINDOW_MS):
+        self.window = max(0.0, window_ms) / 1000
+        self._open: Dict[Tuple[Any, ...], _Batch] = {}
+        self._lock = threading.Lock()
+
+    def call(self, task, credentials: Dict[str, Any], params: Dict[str, Any], integration_id: Optional[int]) -> Dict[str, Any]:
+        """Make one call of a batchable task as part of a batch; returns its own result"""
+        key = (integration_id, task.integration, task.name)
+        with self._lock:
+            batch = self._open.get(key)
+            leader = batch is None
+            if leader:
+                batch = self._open[key] = _Batch(task.max_batch_size)
+            index = len(batch.params)
+            batch.params.append(params)
+            if len(batch.params) >= batch.max_size:
+                # Full: nobody else may join
+                del self._open[key]
+                batch.full.set()
+
+        context = get_task_context()
+        if leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._open.get(key) is batch:
+                    del self._open[key]
+            self._run(task, credentials, batch)
+        elif not batch.done.wait(context.remaining() if context else None):
+            # The leader is still calling (or stuck); don't outlive this task's deadline
+            context.error_kind = "timeout"
+            return {"success": False, "message": "Timed out waiting for the batch call"}
+
+        result = batch.results[index]
+        if context and not leader and not result.get("success", False):
+            # Only the leader's context saw the HTTP response
+            context.error_kind = batch.error_kind
+        return result
+
+    @staticmethod
+    def _run(task, credentials: Dict[str, Any], batch: _Batch):
+        context = get_task_context()
+        results = None
+        try:
+            results = task.batch_func(credentials, batch.params)
+            if len(results) != len(batch.params):
+                raise ValueError(f"batch call returned {len(results)} results for {len(batch.params)} calls")
+        except Exception as e:
+            if context:
+                context.error_kind = "exception"
+            results = [{"success": False, "message": f"Batch call failed: {str(e)}"} for _ in batch.params]
+        finally:
+            if results is None:
+                # Interrupted, e.g. by SystemExit; the other callers must not wait forever
+                results = [{"success": False, "message": "Batch call was not made"} for _ in batch.params]
+            batch.error_kind = context.error_kind if context else None
+            batch.results = results
+            batch.done.set()
+
+
+# Global instance
+task_batcher = TaskBatcher()
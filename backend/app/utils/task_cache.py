@@ -0,0 +1,85 @@
+"""
+Memoized results of cacheable integration tasks
+
+A task opts in with the cacheable decorator:
+
+    @cacheable(ttl_seconds=60)
+    def test_connection(credentials):
+        ...
+
+The engine then serves repeat calls with the same integration and params
+from this cache until the TTL runs out. Only successful results are cached,
+and entries of an integration are dropped when it is updated or deleted.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, Tuple
+
+# Maximum number of cached task results; 0 disables the cache
+TASK_CACHE_SIZE = int(os.getenv("TASK_CACHE_SIZE", "1024"))
+
+
+def cacheable(ttl_seconds: float) -> Callable[[Callable], Callable]:
+    """Mark a read-only, idempotent task as safe to serve from the result cache"""
+    def decorator(func: Callable) -> Callable:
+        func.cache_ttl = float(ttl_seconds)
+        return func
+    return decorator
+
+
+class TaskResultCache:
+    """Bounded LRU of task results keyed by a hash of (integration id, task, params)"""
+
+    def __init__(self, maxsize: int = TASK_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[Optional[int], float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(integration_id: Optional[int], task: str, params: Optional[Dict[str, Any]]) -> str:
+        payload = json.dumps([integration_id, task, params or {}], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.maxsize <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            # Copy so a caller cannot change the cached result
+            return copy.deepcopy(entry[2])
+
+    def put(self, key: str, integration_id: Optional[int], result: Dict[str, Any], ttl_seconds: float):
+        if self.maxsize <= 0 or ttl_seconds <= 0:
+            return
+        entry = (integration_id, time.monotonic() + ttl_seconds, copy.deepcopy(result))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate_integration(self, integration_id: int):
+        """Drop the cached results of one integration"""
+        with self._lock:
+            for key in [k for k, entry in self._entries.items() if entry[0] == integration_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Global instance
+task_cache = TaskResultCache()
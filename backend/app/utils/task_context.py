@@ -0,0 +1,67 @@
+"""
+Context of the task currently running on a thread
+
+The engine enters a task_scope around every task call so shared helpers such
+as http_client know which integration they are calling on behalf of, without
+changing the (credentials, params) signature of the task functions.
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+
+class TaskContext:
+    """Per-call state shared between the engine and the HTTP layer"""
+
+    def __init__(
+        self,
+        integration_id: Optional[int] = None,
+        integration_type: Optional[str] = None,
+        deadline: Optional[float] = None
+    ):
+        self.integration_id = integration_id
+        self.integration_type = integration_type.lower() if integration_type else None
+        # time.monotonic() value after which the engine has given up on this call
+        self.deadline = deadline
+        # Seconds spent waiting on rate limits during this call
+        self.rate_limit_wait = 0.0
+        # Classification of the last failure seen by the HTTP layer:
+        # timeout, connection, rate_limit, server_error, client_error, exception
+        self.error_kind: Optional[str] = None
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, or None if there is none"""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def record_response(self, status_code: int):
+        """Classify an HTTP response; successful responses clear the error"""
+        if status_code == 429:
+            self.error_kind = "rate_limit"
+        elif status_code >= 500:
+            self.error_kind = "server_error"
+        elif status_code >= 400:
+            self.error_kind = "client_error"
+        else:
+            self.error_kind = None
+
+
+_current_task: contextvars.ContextVar[Optional[TaskContext]] = contextvars.ContextVar("current_task", default=None)
+
+
+def get_task_context() -> Optional[TaskContext]:
+    """The context of the task running on this thread, if any"""
+    return _current_task.get()
+
+
+@contextmanager
+def task_scope(context: TaskContext):
+    """Make context the current task context for the duration of the block"""
+    token = _current_task.set(context)
+    try:
+        yield context
+    finally:
+        _current_task.reset(token)
@@ -0,0 +1,171 @@
+"""
+Standalone execution worker
+
+Claims executions from the durable queue and runs them outside the API
+process. Start as many as needed, on as many hosts as needed, against the
+same database:
+
+    EXECUTION_BACKEND=queue uvicorn app.main:app      # API enqueues async runs
+    python -m app.worker --concurrency 8               # one or more workers
+"""
+
+import argparse
+import os
+import signal
+import socket
+import threading
+import time
+import uuid
+from typing import Set, Dict, Optional
+from app.database import SessionLocal, init_db
+from app.services.log_writer import log_writer
+from app.services.workflow_service import WorkflowService
+from app.services.execution_queue import ExecutionQueue, LEASE_SECONDS, MAX_ATTEMPTS
+from app.services.admission import AdmissionControl, ADMISSION_POLL_SECONDS
+from app.services.task_registry import task_registry
+from app.utils.process_pool import process_pool
+
+
+class Worker:
+    """Pull executions off the queue and run them with a fixed number of threads"""
+
+    def __init__(
+        self,
+        concurrency: int = 4,
+        poll_interval: float = 1.0,
+        lease_seconds: int = LEASE_SECONDS,
+        max_attempts: int = MAX_ATTEMPTS
+    ):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.stopping = threading.Event()
+        self._held_jobs: Set[int] = set()
+        self._held_lock = threading.Lock()
+        # Workflows found without a free slot, until the time.monotonic() to look again
+        self._saturated: Dict[int, float] = {}
+
+    def run(self):
+        """Run until stop() is called, then finish in-flight executions"""
+        print(f"Worker {self.worker_id} started with {self.concurrency} thread(s)")
+        threads = [
+            threading.Thread(target=self._consume, name=f"worker-{i}", daemon=True)
+            for i in range(self.concurrency)
+        ]
+        threads.append(threading.Thread(target=self._maintain, name="worker-heartbeat", daemon=True))
+        for thread in threads:
+            thread.start()
+
+        while not self.stopping.is_set():
+            self.stopping.wait(1.0)
+
+        for thread in threads:
+            thread.join()
+        log_writer.shutdown()
+        process_pool.shutdown()
+        print(f"Worker {self.worker_id} stopped")
+
+    def stop(self, *args):
+        """Stop claiming new jobs"""
+        self.stopping.set()
+
+    def _consume(self):
+        while not self.stopping.is_set():
+            db = SessionLocal()
+            try:
+                job = ExecutionQueue.claim(db, self.worker_id, self.lease_seconds, self._saturated_workflows())
+                if not job:
+                    self.stopping.wait(self.poll_interval)
+                    continue
+
+                with self._held_lock:
+                    self._held_jobs.add(job.id)
+                try:
+                    status = self._run_job(db, job.execution_id)
+                    if status is None:
+                        # No free slot: hand the job back and skip the workflow for a while
+                        with self._held_lock:
+                            self._saturated[job.workflow_id] = time.monotonic() + ADMISSION_POLL_SECONDS
+                        ExecutionQueue.defer(db, job.id, self.worker_id, ADMISSION_POLL_SECONDS)
+                    else:
+                        ExecutionQueue.complete(db, job.id, self.worker_id, status)
+                finally:
+                    with self._held_lock:
+                        self._held_jobs.discard(job.id)
+            except Exception as e:
+                print(f"Worker {self.worker_id} error: {e}")
+                self.stopping.wait(self.poll_interval)
+            finally:
+                db.close()
+
+    def _saturated_workflows(self) -> Set[int]:
+        now = time.monotonic()
+        with self._held_lock:
+            for workflow_id in [w for w, until in self._saturated.items() if until <= now]:
+                del self._saturated[workflow_id]
+            return set(self._saturated)
+
+    @staticmethod
+    def _run_job(db, execution_id: int) -> Optional[str]:
+        """Run a claimed execution; None if its workflow has no free slot"""
+        execution_log = WorkflowService.get_execution(db, execution_id)
+        if not execution_log:
+            return "failed"
+        if execution_log.status == "pending" and not AdmissionControl.try_start(db, execution_log):
+            return None if execution_log.status == "pending" else "done"
+        if execution_log.status in ("pending", "running"):
+            WorkflowService.run_execution(db, execution_log)
+        return "done"
+
+    def _maintain(self):
+        """Renew leases on held jobs and requeue jobs of dead workers"""
+        interval = max(1.0, self.lease_seconds / 3)
+        while not self.stopping.is_set() or self._held_jobs:
+            db = SessionLocal()
+            try:
+                with self._held_lock:
+                    held = list(self._held_jobs)
+                renewed = ExecutionQueue.heartbeat(db, held, self.worker_id, self.lease_seconds)
+                for job_id in set(held) - set(renewed):
+                    print(f"Worker {self.worker_id} lost the lease on job {job_id}")
+
+                requeued = ExecutionQueue.requeue_expired(db, self.max_attempts)
+                if requeued:
+                    print(f"Requeued {requeued} job(s) from unresponsive workers")
+            except Exception as e:
+                print(f"Worker {self.worker_id} heartbeat error: {e}")
+            finally:
+                db.close()
+
+            if self.stopping.is_set():
+                # Keep leases alive while in-flight executions drain
+                time.sleep(1.0)
+            else:
+                self.stopping.wait(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Workflow execution worker")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("WORKER_CONCURRENCY", "4")))
+    parser.add_argument("--poll-interval", type=float, default=float(os.getenv("WORKER_POLL_INTERVAL", "1.0")))
+    parser.add_argument("--lease-seconds", type=int, default=LEASE_SECONDS)
+    args = parser.parse_args()
+
+    init_db()
+    task_registry.discover()
+    if process_pool.enabled and task_registry.has_process_tasks():
+        process_pool.start()
+    worker = Worker(
+        concurrency=args.concurrency,
+        poll_interval=args.poll_interval,
+        lease_seconds=args.lease_seconds
+    )
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Migration script to add the priority column to the execution_queue table
+Run this on databases created before priority classes were added
+"""
+import sys
+import os
+
+# Add parent directory to Python path so we can import app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text, inspect
+from app.database import engine, init_db
+# Registers the tables with init_db
+import app.models
+
+INDEX_NAME = "ix_execution_queue_status_workflow_priority"
+
+def check_column_exists(table_name, column_name):
+    """Check if a column exists in a table"""
+    inspector = inspect(engine)
+    columns = [col['name'] for col in inspector.get_columns(table_name)]
+    return column_name in columns
+
+def check_index_exists(table_name, index_name):
+    """Check if an index exists on a table"""
+    inspector = inspect(engine)
+    return index_name in [index['name'] for index in inspector.get_indexes(table_name)]
+
+def upgrade():
+    """Add execution_queue.priority and the index used to pick jobs by fair share"""
+    # Creates execution_queue (with the column) if it does not exist yet
+    init_db()
+
+    with engine.connect() as conn:
+        try:
+            if check_column_exists('execution_queue', 'priority'):
+                print("✅ Column 'priority' already exists in execution_queue table")
+            else:
+                # 1 is the "api" class, the default for existing jobs
+                conn.execute(text("ALTER TABLE execution_queue ADD COLUMN priority INTEGER NOT NULL DEFAULT 1"))
+                conn.commit()
+                print("✅ Successfully added 'priority' column to execution_queue table")
+
+            if check_index_exists('execution_queue', INDEX_NAME):
+                print(f"✅ Index '{INDEX_NAME}' already exists")
+            else:
+                conn.execute(text(f"CREATE INDEX {INDEX_NAME} ON execution_queue (status, workflow_id, priority)"))
+                conn.commit()
+                print(f"✅ Successfully created index '{INDEX_NAME}'")
+            return True
+        except Exception as e:
+            print(f"❌ Error migrating execution_queue: {e}")
+            return False
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Running Database Migration")
+    print("=" * 60)
+
+    success = upgrade()
+
+    print("=" * 60)
+    if success:
+        print("✅ Migration Complete!")
+        sys.exit(0)
+    else:
+        print("❌ Migration Failed!")
+        sys.exit(1)
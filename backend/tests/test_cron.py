@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from app.utils.cron import CronExpression, get_timezone
+
+
+def test_next_after_starting_on_leap_day():
+    assert CronExpression("0 * * * *").next_after(datetime(2028, 2, 29, 12, 30)) == datetime(2028, 2, 29, 13, 0)
+    assert CronExpression("@daily").next_after(datetime(2028, 2, 29, 23, 59)) == datetime(2028, 3, 1, 0, 0)
+
+
+def test_leap_day_schedule_from_leap_day():
+    assert CronExpression("0 9 29 2 *").next_after(datetime(2028, 2, 29, 9, 0)) == datetime(2032, 2, 29, 9, 0)
+
+
+def test_leap_day_in_timezone():
+    tz = get_timezone("Europe/Berlin")
+    # 00:30 on Mar 1 in Berlin is 23:30 UTC on Feb 29
+    assert CronExpression("30 0 * * *").next_after(datetime(2028, 2, 29, 0, 0), tz) == datetime(2028, 2, 29, 23, 30)
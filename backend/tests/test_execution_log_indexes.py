@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Workflow, ExecutionLog
+from app.services.workflow_service import WorkflowService
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Workflow(id=1, name="w", workflow_data="{}"))
+    now = datetime.utcnow()
+    session.add_all(
+        ExecutionLog(workflow_id=1, status=("success", "failed", "running")[i % 3], started_at=now - timedelta(seconds=i))
+        for i in range(300)
+    )
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def query_plan(db, call):
+    """EXPLAIN QUERY PLAN of the SELECT that call issues"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        call()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    statement, parameters = next((s, p) for s, p in statements if s.lstrip().upper().startswith("SELECT"))
+    rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    return " | ".join(row[-1] for row in rows)
+
+
+@pytest.mark.parametrize("filters, index_name", [
+    ({"workflow_id": 1}, "ix_execution_logs_workflow_started_at"),
+    ({"status": "failed"}, "ix_execution_logs_status_started_at"),
+])
+def test_history_query_reads_index_without_sorting(db, filters, index_name):
+    plan = query_plan(db, lambda: WorkflowService.get_execution_logs(db, limit=100, **filters))
+    assert index_name in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_history_query_with_before_reads_index_without_sorting(db):
+    before = datetime.utcnow() - timedelta(seconds=30)
+    plan = query_plan(db, lambda: WorkflowService.get_execution_logs(db, workflow_id=1, limit=10, before=before))
+    assert "ix_execution_logs_workflow_started_at" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_indexes_exist_on_execution_logs(db):
+    names = {row[1] for row in db.execute(text("PRAGMA index_list(execution_logs)"))}
+    assert {"ix_execution_logs_workflow_started_at", "ix_execution_logs_status_started_at"} <= names